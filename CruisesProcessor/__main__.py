@@ -1,22 +1,95 @@
 #WorldTreeSystem/CruisesProcessor/main.py
 
 print("🌎 Hello World Tree!")
-from core.libs import pd
+from core.libs import pd, sys
 from core.db import get_engine
 from core.schema_helpers import FINAL_ORDER
 
 from CruisesProcessor.catalog_normalizer import parse_country_code
-from CruisesProcessor.general_reader import load_and_prepare_data
-from CruisesProcessor.general_importer import prepare_df_for_sql, ensure_table, save_inventory_to_sql, create_inventory_catalog, marcar_lote_completado, cast_dataframe
-from CruisesProcessor.general_processing import process_inventory_dataframe
+from CruisesProcessor.general_reader import get_args, load_and_prepare_data, resolve_input_files, build_ingest_cache
+from CruisesProcessor.general_importer import prepare_df_for_sql, ensure_table, save_inventory_to_sql, save_rejects, create_inventory_catalog, marcar_lote_completado, cast_dataframe, arrow_available
+from CruisesProcessor.general_processing import process_inventory_dataframe, iter_processed_chunks
+from CruisesProcessor.xlsx_read_and_merge import iter_contract_frames
 from CruisesProcessor.audit_pipeline import run_audit
 from CruisesProcessor.import_summary import generate_summary_from_df
+from CruisesProcessor.import_manifest import contracts_to_replace, record_imports
+from CruisesProcessor.catalog_queue import enqueue_pending_rows, reconcile_catalogs_cli
+from CruisesProcessor.catalog_cache import CatalogCache
+from CruisesProcessor.batch_validation import validate_cli
+
+# Subcomandos: python -m CruisesProcessor <comando> [...]
+COMMANDS = {
+    "reconcile-catalogs": reconcile_catalogs_cli,
+    "validate": validate_cli,
+}
 
 
 print("🌎 Iniciando...")
 
+
+def export_bad_rows(df_bad, tabla_destino):
+    print(f"⚠️  {len(df_bad)} filas ignoradas por ID inválido.")
+
+    # Diagnóstico (esto lo puedes dejar tal cual)
+    diag_cols = [c for c in ("contractcode", "plot", "tree_number", "tree") if c in df_bad.columns]
+    print(df_bad[diag_cols].head().to_string(index=False))
+
+    # Reordena columnas para exportar el archivo bad_rows en el orden de FINAL_ORDER
+    cols_in_final = [c for c in FINAL_ORDER if c in df_bad.columns]
+    extra_cols = [c for c in df_bad.columns if c not in FINAL_ORDER]
+    df_bad_export = df_bad[cols_in_final + extra_cols]
+
+    bad_report = f"bad_rows_{tabla_destino}.xlsx"
+    df_bad_export.to_excel(bad_report, index=False)
+    print(f"📄 Reporte de filas excluidas → {bad_report}")
+
+
+def report_duplicates(duplicated_ids):
+    if not duplicated_ids.empty:
+        print(f"\n🚨 Detectados {duplicated_ids.shape[0]} registros con IDs duplicados reales.")
+        print(duplicated_ids[['id', 'contractcode', 'plot', 'tree_number']].head(20))
+        duplicated_ids.to_csv("duplicated_ids_found.csv", index=False)
+        print("📄 Exportados duplicados a duplicated_ids_found.csv")
+    else:
+        print("\n✅ No hay IDs duplicados reales. Todo OK.")
+
+
+def build_sql_frame(df_good, dtype_backend="pyarrow"):
+    """df_good → (df_sql, dtypes) alineado a FINAL_ORDER y listo para save_inventory_to_sql."""
+    if dtype_backend == "pyarrow" and arrow_available():
+        # Una sola pasada por columna al tipo final de COLUMNS; reporta celdas no convertibles
+        df_sql, dtype_for_sql = prepare_df_for_sql(df_good, dtype_backend="pyarrow")
+        df_sql = df_sql.loc[:, ~df_sql.columns.duplicated()]
+        # Columnas sin dtype en schema (ids de catálogo, id_error) siguen como antes
+        for col in df_sql.select_dtypes(include="object").columns:
+            df_sql[col] = df_sql[col].where(df_sql[col].notna(), None)
+        return df_sql, dtype_for_sql
+
+    df_sql, dtype_for_sql = prepare_df_for_sql(df_good)
+
+    # 🎯 2) Alinea todos los dtypes contra schema.py
+    df_sql = df_sql.loc[:, ~df_sql.columns.duplicated()]
+
+    # 👇 Solo haz replace en columnas que NO son fecha
+    for col in df_sql.columns:
+        if "date" not in col.lower():
+            df_sql[col] = df_sql[col].replace({pd.NA: None})
+
+    # 🔒 Castea fechas a datetime.date, por si algo se perdió antes
+    if 'cruisedate' in df_sql.columns:
+        df_sql['cruisedate'] = pd.to_datetime(df_sql['cruisedate'], errors="coerce").dt.date
+
+    #Normaliza dtypes una sola vez
+    df_sql = cast_dataframe((df_sql))
+    return df_sql, dtype_for_sql
+
+
 def main():
-    args, df_combined = load_and_prepare_data()
+    args = get_args()
+    if args.chunked:
+        return main_chunked(args)
+
+    args, df_combined = load_and_prepare_data(args)
 
     if df_combined is None or df_combined.empty:
         print("⚠️ No se encontraron datos combinados.")
@@ -34,41 +107,24 @@ def main():
     engine = get_engine()
 
     country_code = parse_country_code(args.tabla_destino)
-    df_good, df_bad = process_inventory_dataframe(df_combined, engine, country_code)
+    df_good, df_bad = process_inventory_dataframe(
+        df_combined, engine, country_code, catalog_policy=args.catalog_policy, jobs=args.jobs
+    )
 
+    # --load-mode staged: filas malas y duplicados van a <tabla>_rejects (calculados en el servidor)
+    staged = args.load_mode == "staged"
     if not df_bad.empty:
-        print(f"⚠️  {len(df_bad)} filas ignoradas por ID inválido.")
-
-        # Diagnóstico (esto lo puedes dejar tal cual)
-        diag_cols = [c for c in ("contractcode", "plot", "tree_number", "tree") if c in df_bad.columns]
-        print(df_bad[diag_cols].head().to_string(index=False))
-
-        # Reordena columnas para exportar el archivo bad_rows en el orden de FINAL_ORDER
-        cols_in_final = [c for c in FINAL_ORDER if c in df_bad.columns]
-        extra_cols = [c for c in df_bad.columns if c not in FINAL_ORDER]
-        df_bad_export = df_bad[cols_in_final + extra_cols]
-
-        bad_report = f"bad_rows_{args.tabla_destino}.xlsx"
-        df_bad_export.to_excel(bad_report, index=False)
-        print(f"📄 Reporte de filas excluidas → {bad_report}")
+        if staged:
+            save_rejects(df_bad, args.tabla_destino, "invalid_id")
+        else:
+            export_bad_rows(df_bad, args.tabla_destino)
 
     #Chequeo de duplicados
-    duplicated_ids = df_good[df_good['id'].duplicated(keep=False)].copy()
-
-    if not duplicated_ids.empty:
-        print(f"\n🚨 Detectados {duplicated_ids.shape[0]} registros con IDs duplicados reales.")
-        print(duplicated_ids[['id', 'contractcode', 'plot', 'tree_number']].head(20))
-        duplicated_ids.to_csv("duplicated_ids_found.csv", index=False)
-        print("📄 Exportados duplicados a duplicated_ids_found.csv")
-    else:
-        print("\n✅ No hay IDs duplicados reales. Todo OK.")
+    if not staged:
+        report_duplicates(df_good[df_good['id'].duplicated(keep=False)].copy())
 
     # Insertar en SQL
-    df_sql, dtype_for_sql = prepare_df_for_sql(df_good)
-
-    # 🎯 2) Alinea todos los dtypes contra schema.py
-
-    df_sql = df_sql.loc[:, ~df_sql.columns.duplicated()]
+    df_sql, dtype_for_sql = build_sql_frame(df_good, args.dtype_backend)
     ensure_table(
         df_sql,
         engine,
@@ -76,17 +132,12 @@ def main():
         recreate=args.recreate_table
     )
 
-    # 👇 Solo haz replace en columnas que NO son fecha
-    for col in df_sql.columns:
-        if "date" not in col.lower():
-            df_sql[col] = df_sql[col].replace({pd.NA: None})
-
-    # 🔒 Castea fechas a datetime.date, por si algo se perdió antes
-    if 'cruisedate' in df_sql.columns:
-        df_sql['cruisedate'] = pd.to_datetime(df_sql['cruisedate'], errors="coerce").dt.date
-
-    #Normaliza dtypes una sola vez
-    df_sql = cast_dataframe((df_sql))
+    # Modo incremental: reemplaza solo los contratos de los archivos re-leídos
+    # (borrado y carga en la misma transacción)
+    source_files = df_combined.attrs.get("source_files", [])
+    affected = None
+    if args.incremental:
+        affected = contracts_to_replace(df_sql, source_files, args.file_fingerprints)
 
     save_inventory_to_sql(
         df_sql,
@@ -94,10 +145,98 @@ def main():
         args.tabla_destino,
         if_exists="append",  # la tabla ya existe
         dtype=dtype_for_sql,
-        progress=True
+        progress=True,
+        method=args.load_mode,
+        replace_contracts=affected,
     )
 
-if __name__ == '__main__':
-    main()
+    if args.incremental:
+        record_imports(engine, args.tabla_destino, source_files, args.file_fingerprints)
+
+    if args.catalog_policy == "queue":
+        enqueue_pending_rows(engine, args.tabla_destino, df_good)
+
+
+def main_chunked(args):
+    """
+    --chunked: lee, procesa y guarda un contrato a la vez. El lote completo
+    nunca está en memoria; sólo se acumulan filas malas y duplicados para el reporte.
+    """
+    if not resolve_input_files(args):
+        print("⚠️ No se encontraron datos combinados.")
+        return
 
+    engine = get_engine()
+    country_code = parse_country_code(args.tabla_destino)
+    catalogs = CatalogCache(engine)
+
+    frames = iter_contract_frames(args.files, workers=args.workers, cache=build_ingest_cache(args))
+    chunks = iter_processed_chunks(frames, engine, country_code, catalogs, catalog_policy=args.catalog_policy)
+
+    staged = args.load_mode == "staged"
+    bad_parts, dup_parts, all_sources = [], [], []
+    replaced = set()
+    table_ready = False
+    total_rows = rejected_rows = 0
+
+    for df_good, df_bad, source_files in chunks:
+        all_sources += source_files
+        if staged:
+            rejected_rows += save_rejects(df_bad, args.tabla_destino, "invalid_id")
+        else:
+            if not df_bad.empty:
+                bad_parts.append(df_bad)
+            dups = df_good[df_good['id'].duplicated(keep=False)]
+            if not dups.empty:
+                dup_parts.append(dups.copy())
+        if df_good.empty:
+            continue
+
+        df_sql, dtype_for_sql = build_sql_frame(df_good, args.dtype_backend)
+        if not table_ready:
+            ensure_table(df_sql, engine, args.tabla_destino, recreate=args.recreate_table)
+            table_ready = True
+
+        affected = None
+        if args.incremental:
+            # Un contrato ya re-importado en esta corrida no se vuelve a borrar
+            # (p. ej. el código previo de un archivo que cambió de contrato)
+            affected = contracts_to_replace(df_sql, source_files, args.file_fingerprints, skip=replaced)
+            replaced |= affected
+
+        save_inventory_to_sql(
+            df_sql,
+            engine,
+            args.tabla_destino,
+            if_exists="append",
+            dtype=dtype_for_sql,
+            method=args.load_mode,
+            replace_contracts=affected,
+        )
+        if args.catalog_policy == "queue":
+            enqueue_pending_rows(engine, args.tabla_destino, df_good)
+
+        total_rows += len(df_sql)
+        contracts = ", ".join(sorted(map(str, df_sql["contractcode"].dropna().unique())))
+        print(f"📦 {contracts}: {len(df_sql):,} filas guardadas ({total_rows:,} acumuladas)")
+
+    if not table_ready and not bad_parts and not rejected_rows:
+        print("⚠️ No se encontraron datos combinados.")
+        return
+
+    if bad_parts:
+        export_bad_rows(pd.concat(bad_parts, ignore_index=True), args.tabla_destino)
+    if not staged:
+        report_duplicates(pd.concat(dup_parts, ignore_index=True) if dup_parts else pd.DataFrame())
 
+    if args.incremental:
+        record_imports(engine, args.tabla_destino, all_sources, args.file_fingerprints)
+
+    print(f"\n🌳 Modo por contrato: {total_rows:,} filas guardadas en {args.tabla_destino}")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] in COMMANDS:
+        COMMANDS[sys.argv[1]](sys.argv[2:])
+    else:
+        main()
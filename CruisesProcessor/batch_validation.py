@@ -0,0 +1,146 @@
+# CruisesProcessor/batch_validation.py
+"""
+Validación previa de un lote (batch_imports.json) sin importarlo:
+
+    python -m CruisesProcessor validate --tabla_destino inventory_us_2025
+
+Por archivo: stat concurrente (existe / vacío / tamaño / fecha) y, si está,
+sólo los nombres de hoja y la fila de encabezados de la hoja de captura
+(openpyxl read-only). No se leen filas de datos ni la hoja Summary, así que un
+lote de cientos de archivos se revisa en segundos.
+
+Estados: ok, missing, empty, unreadable, missing_columns.
+El reporte se guarda en JSON y/o Excel; el comando sale con código 1 si algún
+archivo no está listo.
+"""
+from core.libs import argparse, json, os, pd, Path, datetime, ThreadPoolExecutor
+from core.paths import resolve_inventory_paths
+from core.schema_helpers import get_column, rename_columns_using_schema
+
+from CruisesProcessor.general_reader import load_batch_config
+from CruisesProcessor.utils.workbook_reader import CruiseWorkbook
+from CruisesProcessor.xlsx_read_and_merge import REQUIRED_INPUT_COLUMNS, contract_prefix
+
+VALIDATE_THREADS = 16
+REPORT_COLUMNS = [
+    "file", "contract", "status", "size_bytes", "modified", "input_sheet",
+    "sheets", "n_columns", "missing_columns", "error", "path",
+]
+
+
+def stat_file(path) -> dict:
+    """Entrada base del reporte a partir de un solo os.stat."""
+    path = Path(path)
+    entry = {"path": str(path), "file": path.name, "contract": contract_prefix(path)}
+    try:
+        st = os.stat(path)
+    except OSError as e:
+        return {**entry, "status": "missing", "error": e.strerror}
+    entry.update(size_bytes=st.st_size, modified=datetime.fromtimestamp(st.st_mtime).isoformat(timespec="seconds"))
+    if not path.is_file() or st.st_size == 0:
+        entry["status"] = "empty"
+    return entry
+
+
+def sniff_file(entry: dict) -> dict:
+    """Hojas + encabezados de la hoja de captura → columnas lógicas requeridas presentes."""
+    try:
+        with CruiseWorkbook(entry["path"]) as wb:
+            sheet = wb.resolve_input_sheet()
+            header = wb.header_row(sheet)
+            sheets = wb.sheet_names
+    except Exception as e:
+        return {**entry, "status": "unreadable", "error": f"{type(e).__name__}: {e}"}
+
+    # Mismo rename que read_metadata_and_input sobre un df sin filas
+    columns = rename_columns_using_schema(pd.DataFrame(columns=header))
+    missing = []
+    for logical in REQUIRED_INPUT_COLUMNS:
+        try:
+            get_column(logical, columns)
+        except KeyError:
+            missing.append(logical)
+
+    return {
+        **entry,
+        "status": "missing_columns" if missing else "ok",
+        "input_sheet": sheet,
+        "sheets": ", ".join(sheets),
+        "n_columns": len(header),
+        "missing_columns": ", ".join(missing),
+    }
+
+
+def validate_files(files, threads: int = VALIDATE_THREADS) -> pd.DataFrame:
+    """stat de todos los archivos y sniff de los que existen, en hilos; una fila por archivo en orden."""
+    files = list(files)
+    if not files:
+        return pd.DataFrame(columns=REPORT_COLUMNS)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(threads, len(files)))) as pool:
+        entries = list(pool.map(stat_file, files))
+        entries = list(pool.map(lambda e: e if "status" in e else sniff_file(e), entries))
+
+    report = pd.DataFrame(entries).reindex(columns=REPORT_COLUMNS)
+    # Un mismo archivo listado dos veces en el lote se importaría dos veces
+    report["duplicated"] = report["path"].duplicated(keep="first")
+    return report
+
+
+def write_report(report: pd.DataFrame, output: str, fmt: str = "both") -> list[str]:
+    """Guarda <output>.json y/o <output>.xlsx; devuelve las rutas escritas."""
+    written = []
+    if fmt in ("json", "both"):
+        summary = {
+            "generated": datetime.now().isoformat(timespec="seconds"),
+            "files": len(report),
+            "ready": bool((report["status"] == "ok").all() and not report["duplicated"].any()),
+            "by_status": report["status"].value_counts().to_dict(),
+            "files_detail": json.loads(report.to_json(orient="records")),
+        }
+        with open(f"{output}.json", "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        written.append(f"{output}.json")
+    if fmt in ("xlsx", "both"):
+        report.to_excel(f"{output}.xlsx", index=False)
+        written.append(f"{output}.xlsx")
+    return written
+
+
+def validate_cli(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m CruisesProcessor validate",
+        description="Revisa un lote (existencia, tamaño, hoja de captura y columnas clave) sin importarlo",
+    )
+    parser.add_argument("--tabla_destino", help="Lote de batch_imports.json")
+    parser.add_argument("--files", nargs="+", help="Archivos XLSX a revisar (en vez del lote)")
+    parser.add_argument("--batch_imports_path", default="CruisesProcessor/batch_imports.json")
+    parser.add_argument("--threads", type=int, default=VALIDATE_THREADS, help="Hilos para stat + lectura de encabezados")
+    parser.add_argument("--output", help="Ruta base del reporte (por defecto validation_<tabla_destino>)")
+    parser.add_argument("--format", choices=("json", "xlsx", "both"), default="both")
+    args = parser.parse_args(argv)
+
+    if not args.files and not args.tabla_destino:
+        parser.error("indica --tabla_destino o --files")
+    files = args.files or load_batch_config(args.tabla_destino, args.batch_imports_path).get("archivos", [])
+    files = resolve_inventory_paths(files)
+
+    print(f"🔎 Validando {len(files)} archivos...")
+    report = validate_files(files, threads=args.threads)
+
+    counts = report["status"].value_counts()
+    for status, n in counts.items():
+        print(f"   {'✅' if status == 'ok' else '❌'} {status}: {n}")
+    not_ready = report[(report["status"] != "ok") | report["duplicated"]]
+    if not not_ready.empty:
+        print(not_ready[["file", "status", "missing_columns", "error"]].fillna("").to_string(index=False))
+
+    output = args.output or f"validation_{args.tabla_destino or 'files'}"
+    for path in write_report(report, output, args.format):
+        print(f"📄 Reporte → {path}")
+
+    if not_ready.empty:
+        print("🎉 Lote listo para importar.")
+    else:
+        print(f"⛔ {len(not_ready)} archivos no están listos.")
+        raise SystemExit(1)
@@ -0,0 +1,125 @@
+#CruisesProcessor/catalog_cache.py
+"""
+Caché de catálogos (cat_status, cat_species, cat_defect, ...) para una corrida.
+
+Antes cada paso del pipeline leía su catálogo por separado: ensure_catalog_entries
+hacía SELECT * por campo, normalize_catalogs otro SELECT por columna de COLUMNS y
+calculate_dead_alive uno más para cat_status. CatalogCache carga todas las tablas
+en una sola consulta (UNION ALL de row_to_json) y sólo vuelve a la base después
+de insertar valores nuevos, recargando únicamente los catálogos tocados.
+
+    catalogs = CatalogCache(engine)
+    catalogs.text_to_id("cat_species", "nombre")   # {'Teca': 1, ...}
+    catalogs.refresh(["cat_species"])               # tras un INSERT
+"""
+from core.libs import json, pd, text
+from core.schema import COLUMNS
+
+
+def catalog_tables() -> list:
+    """Catálogos referenciados por columnas de input en COLUMNS, en orden de aparición."""
+    tables = []
+    for col_def in COLUMNS:
+        table = col_def.get("catalog_table")
+        if col_def.get("source") == "input" and table and table not in tables:
+            tables.append(table)
+    return tables
+
+
+def clean_catalog_text(value) -> str:
+    """Normalización usada para comparar valores del input contra el catálogo."""
+    return str(value).strip().lower() if pd.notna(value) else ""
+
+
+class CatalogCache:
+    def __init__(self, engine, tables=None, schema: str = "public"):
+        self.engine = engine
+        self.schema = schema
+        self.tables = list(tables) if tables is not None else catalog_tables()
+        self.round_trips = 0
+        self._frames = {}
+        self._maps = {}
+        self.refresh(self.tables)
+
+    # ───── Carga ─────
+    def qualified(self, table: str) -> str:
+        return f'"{self.schema}"."{table}"'
+
+    def refresh(self, tables=None):
+        """Recarga `tables` (por defecto todas) en un solo round trip."""
+        tables = list(tables or self.tables)
+        if not tables:
+            return self
+        if self.engine is None:
+            raise RuntimeError("CatalogCache sin engine (¿deserializado en un worker?): no se puede recargar")
+
+        union = "\nUNION ALL\n".join(
+            f"SELECT '{t}' AS catalog, row_to_json(c)::text AS row FROM {self.qualified(t)} c"
+            for t in tables
+        )
+        with self.engine.connect() as conn:
+            rows = conn.execute(text(union)).fetchall()
+        self.round_trips += 1
+
+        by_table = {t: [] for t in tables}
+        for catalog, row in rows:
+            by_table[catalog].append(json.loads(row))
+        for t in tables:
+            self._frames[t] = pd.DataFrame(by_table[t])
+            if t not in self.tables:
+                self.tables.append(t)
+        self._maps = {k: v for k, v in self._maps.items() if k[0] not in tables}
+        return self
+
+    # ───── Consultas ─────
+    def frame(self, table: str) -> pd.DataFrame:
+        if table not in self._frames:
+            self.refresh([table])
+        return self._frames[table].copy()
+
+    def column(self, table: str, col: str) -> pd.Series:
+        frame = self._frames.get(table)
+        if frame is None:
+            frame = self.refresh([table])._frames[table]
+        if col not in frame.columns:
+            return pd.Series([], dtype=object)
+        return frame[col]
+
+    def text_to_id(self, table: str, text_col: str, id_col: str = "id") -> dict:
+        """Mapa texto (strip) → id, como lo arma normalize_catalogs."""
+        key = (table, "text_to_id", text_col, id_col)
+        if key not in self._maps:
+            names = self.column(table, text_col).astype(str).str.strip()
+            self._maps[key] = dict(zip(names, self.column(table, id_col)))
+        return self._maps[key]
+
+    def normalized_names(self, table: str, name_field: str = "nombre") -> set:
+        """Valores del catálogo normalizados con clean_catalog_text."""
+        key = (table, "normalized", name_field)
+        if key not in self._maps:
+            self._maps[key] = set(map(clean_catalog_text, self.column(table, name_field).dropna().unique()))
+        return self._maps[key]
+
+    def status_flags(self):
+        """(mapping_dead, mapping_alive): nombre → 0/1 según DeadTreeValue/AliveTree de cat_status."""
+        key = ("cat_status", "flags")
+        if key not in self._maps:
+            names = self.column("cat_status", "nombre")
+            keep = names.notna() & ~names.duplicated()
+            dead = pd.to_numeric(self.column("cat_status", "DeadTreeValue"), errors="coerce")
+            alive = pd.to_numeric(self.column("cat_status", "AliveTree"), errors="coerce")
+            if dead.empty:
+                dead = pd.Series(0, index=names.index)
+            if alive.empty:
+                alive = pd.Series(0, index=names.index)
+            self._maps[key] = (
+                dict(zip(names[keep], dead[keep].fillna(0).astype(int))),
+                dict(zip(names[keep], alive[keep].fillna(0).astype(int))),
+            )
+        return self._maps[key]
+
+    # ───── Pickle (workers) ─────
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["engine"] = None  # el engine no viaja a otros procesos
+        return state
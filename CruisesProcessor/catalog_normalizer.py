@@ -3,7 +3,8 @@ from core.libs import pd, re, unicodedata
 from core.schema import COLUMNS
 from core.schema_helpers import get_column
 from sqlalchemy import text
-from core.schema_helpers import get_column
+from CruisesProcessor.catalog_cache import CatalogCache, clean_catalog_text
+from CruisesProcessor.catalog_queue import CATALOG_POLICIES, tag_pending_rows
 
 
 PAIS_CONFIG = {
@@ -37,26 +38,22 @@ def parse_catalog_value(val: str):
     return val_str
 
 
-def normalize_catalogs(df, engine, country_code):
-    for col_def in COLUMNS:
+def normalize_catalogs(df, engine, country_code, catalogs: CatalogCache = None):
+    campo_texto = PAIS_CONFIG[country_code.upper()]["col"]
+    catalog_defs = [
+        col_def for col_def in COLUMNS
         # Usar .get() para evitar KeyError si falta "source"
-        if col_def.get("source") != "input" or "catalog_table" not in col_def:
-            continue
+        if col_def.get("source") == "input" and "catalog_table" in col_def
+    ]
+    if catalogs is None:
+        catalogs = CatalogCache(engine, tables=[c["catalog_table"] for c in catalog_defs])
 
+    for col_def in catalog_defs:
         # Obtener el nombre real de la columna en el DataFrame
         raw_col = get_column(col_def["key"], df)
 
-        catalog = col_def["catalog_table"]  # p. ej. "cat_pest"
-        campo_texto = PAIS_CONFIG[country_code.upper()]["col"]
-        campo_id = "id"
-
-        # 1) Leer todo el catálogo desde SQL:
-        qry = text(f'SELECT {campo_id}, {campo_texto} FROM public."{catalog}"')
-        cat_df = pd.read_sql(qry, engine)
-
-        # 2) Armar un mapping texto→id
-        cat_df[campo_texto] = cat_df[campo_texto].astype(str).str.strip()
-        val_map = dict(zip(cat_df[campo_texto], cat_df[campo_id]))
+        # 1-2) Mapping texto→id desde la caché (p. ej. "cat_pest")
+        val_map = catalogs.text_to_id(col_def["catalog_table"], campo_texto)
 
         # 3) Aplicar el mapeo
         df[col_def["key"] + "_raw"] = df[raw_col].astype(str).str.strip()
@@ -68,21 +65,29 @@ def normalize_catalogs(df, engine, country_code):
     return df
 
 
-def ensure_catalog_entries(df: pd.DataFrame, engine, field: str, catalog_table: str, name_field: str = "nombre"):
+def ensure_catalog_entries(df: pd.DataFrame, engine, field: str, catalog_table: str, name_field: str = "nombre",
+                           catalogs: CatalogCache = None, policy: str = "pause"):
     """
     Garantiza que todos los valores únicos en df[field] existan en el catálogo dado.
-    Si faltan, los inserta y pausa para edición manual.
+    Si faltan, según `policy`:
+      - pause: los inserta y pausa para edición manual
+      - queue: los inserta, marca las filas (_pending_<catálogo>) y sigue
+      - fail:  detiene el proceso sin tocar el catálogo
+    Con `catalogs` se usa la caché compartida y sólo se recarga este catálogo tras insertar.
     """
+    if policy not in CATALOG_POLICIES:
+        raise ValueError(f"❌ policy inválida '{policy}'. Opciones: {CATALOG_POLICIES}")
+
     # Obtener el nombre real de la columna en el DataFrame
     field_col = get_column(field, df)
 
     # 1. Leer catálogo
-    sql = f"SELECT * FROM {catalog_table}"
-    cat = pd.read_sql(sql, engine)
+    if catalogs is None:
+        catalogs = CatalogCache(engine, tables=[catalog_table])
 
     # Normalizar SOLO para comparación, mantener valores originales
-    clean = lambda s: str(s).strip().lower() if pd.notna(s) else ""
-    catalog_values_normalized = set(map(clean, cat[name_field].dropna().unique()))
+    clean = clean_catalog_text
+    catalog_values_normalized = catalogs.normalized_names(catalog_table, name_field)
 
     # Mantener valores originales en un dict {normalized: original}
     field_values_original = df[field_col].dropna().unique()
@@ -100,21 +105,28 @@ def ensure_catalog_entries(df: pd.DataFrame, engine, field: str, catalog_table:
         for val in missing_values:
             print(f"   - '{val}'")
 
+        if policy == "fail":
+            raise RuntimeError(f"⛔ Valores nuevos en '{field}' sin entrada en {catalog_table} (--catalog-policy=fail).")
+
         # Insertar automáticamente CON VALORES ORIGINALES
         with engine.begin() as conn:
             for val in missing_values:
                 conn.execute(
-                    text(f"INSERT INTO {catalog_table} ({name_field}) VALUES (:val) ON CONFLICT DO NOTHING"),
+                    text(f"INSERT INTO {catalogs.qualified(catalog_table)} ({name_field}) VALUES (:val) ON CONFLICT DO NOTHING"),
                     {"val": val}  # ← Valor ORIGINAL, no lowercase
                 )
         print(f"✅ Nuevos valores añadidos a {catalog_table}. Completa los campos faltantes manualmente.")
 
-        # Pausa para edición
-        resp = input(f"⏸️ Pausado. ¿Ya actualizaste los valores en {catalog_table}? (y/n): ").strip().lower()
-        if resp != "y":
-            raise RuntimeError(f"⛔ Proceso detenido para edición manual de {catalog_table}.")
+        if policy == "queue":
+            tagged = tag_pending_rows(df, field_col, catalog_table, missing_values)
+            print(f"📥 {tagged} filas marcadas como pendientes de {catalog_table}; el proceso continúa.")
+        else:
+            # Pausa para edición
+            resp = input(f"⏸️ Pausado. ¿Ya actualizaste los valores en {catalog_table}? (y/n): ").strip().lower()
+            if resp != "y":
+                raise RuntimeError(f"⛔ Proceso detenido para edición manual de {catalog_table}.")
 
         # Recargar catálogo
-        cat = pd.read_sql(sql, engine)
+        catalogs.refresh([catalog_table])
 
-    return cat
\ No newline at end of file
+    return catalogs.frame(catalog_table)
\ No newline at end of file
@@ -0,0 +1,191 @@
+# CruisesProcessor/catalog_queue.py
+"""
+Cola de valores de catálogo pendientes (--catalog-policy=queue).
+
+Con la política `pause` el pipeline se detiene con input() cuando aparece un
+Status/Defect/Disease/Species que no está en su catálogo. En modo `queue` el
+valor se inserta igual en el catálogo, las filas afectadas se marcan con una
+columna `_pending_<catalogo>` y el proceso sigue. Tras guardar el inventario,
+esas filas quedan registradas en masterdatabase.catalog_pending_queue.
+
+Cuando alguien completa el catálogo (nombre_en, DeadTreeValue/AliveTree, ...):
+
+    python -m CruisesProcessor reconcile-catalogs [--tabla_destino inventory_us_2025]
+
+rellena en bloque las columnas *_id (o dead_tree/alive_tree para cat_status)
+de las filas en cola y las marca como resueltas.
+"""
+from core.libs import argparse, datetime, pd, text
+from core.schema import COLUMNS
+from CruisesProcessor.catalog_cache import clean_catalog_text
+
+CATALOG_POLICIES = ("pause", "queue", "fail")
+
+QUEUE_SCHEMA = "masterdatabase"
+QUEUE_TABLE = "catalog_pending_queue"
+QUEUE_FULL = f"{QUEUE_SCHEMA}.{QUEUE_TABLE}"
+
+PENDING_PREFIX = "_pending_"
+
+
+def pending_column(catalog_table: str) -> str:
+    return f"{PENDING_PREFIX}{catalog_table}"
+
+
+def catalog_id_column(catalog_table: str) -> str:
+    """Columna del inventario que guarda el id del catálogo (p. ej. cat_species → Species_id)."""
+    for col_def in COLUMNS:
+        if col_def.get("source") == "input" and col_def.get("catalog_table") == catalog_table:
+            return col_def["key"] + "_id"
+    raise KeyError(f"❌ '{catalog_table}' no está referenciado por ninguna columna de input en schema")
+
+
+def tag_pending_rows(df: pd.DataFrame, field_col: str, catalog_table: str, missing_values) -> int:
+    """Marca (in place) las filas cuyo valor normalizado no existía en el catálogo."""
+    missing_normalized = set(map(clean_catalog_text, missing_values))
+    mask = df[field_col].map(clean_catalog_text).isin(missing_normalized)
+    col = pending_column(catalog_table)
+    if col not in df.columns:
+        df[col] = pd.Series(pd.NA, index=df.index, dtype=object)
+    df.loc[mask, col] = df.loc[mask, field_col].astype(str).str.strip()
+    return int(mask.sum())
+
+
+def ensure_queue_table(engine):
+    with engine.begin() as conn:
+        conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {QUEUE_SCHEMA}"))
+        conn.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS {QUEUE_FULL} (
+                target_table  TEXT NOT NULL,
+                tree_id       TEXT NOT NULL,
+                catalog_table TEXT NOT NULL,
+                raw_value     TEXT NOT NULL,
+                queued_at     TIMESTAMP NOT NULL DEFAULT now(),
+                resolved_at   TIMESTAMP,
+                PRIMARY KEY (target_table, tree_id, catalog_table)
+            )
+        """))
+
+
+def enqueue_pending_rows(engine, target_table: str, df: pd.DataFrame) -> int:
+    """Registra en la cola las filas marcadas con `_pending_*` ya guardadas en target_table."""
+    pending_cols = [c for c in df.columns if c.startswith(PENDING_PREFIX)]
+    if not pending_cols or "id" not in df.columns:
+        return 0
+
+    now = datetime.now()
+    rows = []
+    for col in pending_cols:
+        tagged = df.loc[df[col].notna(), ["id", col]].drop_duplicates("id")
+        rows += [
+            {"target_table": target_table, "tree_id": tree_id, "catalog_table": col[len(PENDING_PREFIX):],
+             "raw_value": raw, "queued_at": now}
+            for tree_id, raw in zip(tagged["id"], tagged[col])
+        ]
+    if not rows:
+        return 0
+
+    ensure_queue_table(engine)
+    with engine.begin() as conn:
+        conn.execute(text(f"""
+            INSERT INTO {QUEUE_FULL} (target_table, tree_id, catalog_table, raw_value, queued_at)
+            VALUES (:target_table, :tree_id, :catalog_table, :raw_value, :queued_at)
+            ON CONFLICT (target_table, tree_id, catalog_table) DO UPDATE SET
+                raw_value   = EXCLUDED.raw_value,
+                queued_at   = EXCLUDED.queued_at,
+                resolved_at = NULL
+        """), rows)
+
+    summary = pd.Series([r["catalog_table"] for r in rows]).value_counts().sort_index()
+    print(f"📥 {len(rows)} filas en cola de catálogos pendientes ({QUEUE_FULL}):")
+    for catalog, n in summary.items():
+        print(f"   - {catalog}: {n}")
+    print("   Completa los catálogos y corre: python -m CruisesProcessor reconcile-catalogs")
+    return len(rows)
+
+
+def _reconcile_sql(target_table: str, catalog_table: str, text_col: str, schema: str):
+    catalog_full = f'"{schema}"."{catalog_table}"'
+    if catalog_table == "cat_status":
+        set_clause = 'dead_tree = c."DeadTreeValue", alive_tree = c."AliveTree"'
+        ready = 'c."DeadTreeValue" IS NOT NULL AND c."AliveTree" IS NOT NULL'
+    else:
+        set_clause = f'"{catalog_id_column(catalog_table)}" = c.id'
+        ready = "TRUE"
+
+    match = f"""
+        q.target_table = :target AND q.catalog_table = :catalog AND q.resolved_at IS NULL
+        AND trim(c."{text_col}") = q.raw_value AND {ready}
+    """
+    update_rows = f"""
+        UPDATE "{schema}"."{target_table}" t
+        SET {set_clause}
+        FROM {QUEUE_FULL} q, {catalog_full} c
+        WHERE t.id = q.tree_id AND {match}
+    """
+    mark_resolved = f"""
+        UPDATE {QUEUE_FULL} q
+        SET resolved_at = now()
+        FROM {catalog_full} c
+        WHERE {match}
+    """
+    return update_rows, mark_resolved
+
+
+def reconcile_catalogs(engine, target_table: str = None, schema: str = "public") -> dict:
+    """
+    Rellena en bloque los *_id de las filas en cola cuyo valor ya existe (completo)
+    en el catálogo. Devuelve {(tabla, catálogo): (filas actualizadas, pendientes)}.
+    """
+    from CruisesProcessor.catalog_normalizer import PAIS_CONFIG, parse_country_code
+
+    ensure_queue_table(engine)
+    where, params = "resolved_at IS NULL", {}
+    if target_table:
+        where += " AND target_table = :target"
+        params["target"] = target_table
+    pending = pd.read_sql(
+        text(f"SELECT DISTINCT target_table, catalog_table FROM {QUEUE_FULL} WHERE {where} ORDER BY 1, 2"),
+        engine, params=params,
+    )
+    if pending.empty:
+        print("✅ No hay filas pendientes de catálogo.")
+        return {}
+
+    results = {}
+    for target, catalog in pending.itertuples(index=False):
+        # cat_status siempre se mapea por `nombre` (calculate_dead_alive); el resto por idioma del país
+        try:
+            text_col = "nombre" if catalog == "cat_status" else PAIS_CONFIG[parse_country_code(target)]["col"]
+        except (ValueError, KeyError):
+            text_col = "nombre"
+
+        update_rows, mark_resolved = _reconcile_sql(target, catalog, text_col, schema)
+        params = {"target": target, "catalog": catalog}
+        with engine.begin() as conn:
+            updated = conn.execute(text(update_rows), params).rowcount
+            conn.execute(text(mark_resolved), params)
+            still = conn.execute(
+                text(f"""
+                    SELECT COUNT(DISTINCT raw_value) FROM {QUEUE_FULL}
+                    WHERE target_table = :target AND catalog_table = :catalog AND resolved_at IS NULL
+                """),
+                params,
+            ).scalar()
+        results[(target, catalog)] = (updated, still)
+        icon = "✅" if not still else "⏳"
+        print(f"{icon} {target} ← {catalog}: {updated} filas actualizadas, {still} valores aún sin completar")
+    return results
+
+
+def reconcile_catalogs_cli(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m CruisesProcessor reconcile-catalogs",
+        description="Rellena los *_id de filas importadas con --catalog-policy=queue",
+    )
+    parser.add_argument("--tabla_destino", help="Solo esta tabla de inventario (por defecto todas)")
+    parser.add_argument("--schema", default="public", help="Schema de catálogos e inventarios")
+    args = parser.parse_args(argv)
+
+    from core.db import get_engine
+    reconcile_catalogs(get_engine(), args.tabla_destino, schema=args.schema)
@@ -2,39 +2,23 @@
 
 from core.libs import pd, text
 from core.schema_helpers import get_column
+from CruisesProcessor.catalog_cache import CatalogCache
+from CruisesProcessor.catalog_queue import CATALOG_POLICIES, tag_pending_rows
 
 
-def calculate_dead_alive(df: pd.DataFrame, engine) -> pd.DataFrame:
+def ensure_status_entries(df: pd.DataFrame, engine, catalogs: CatalogCache, policy: str = "pause") -> CatalogCache:
     """
-    Agrega las columnas 'dead_tree' y 'alive_tree' mapeando el texto de 'status'
-    contra los valores de cat_status.
-    También avisa si hay statuses nuevos que no están en el catálogo.
+    Avisa si hay statuses nuevos que no están en cat_status, los inserta y pausa
+    para que se completen 'DeadTreeValue' y 'AliveTree'. Sólo recarga cat_status
+    en la caché si hubo inserciones. Con policy="queue" marca las filas y sigue;
+    con policy="fail" se detiene sin insertar.
     """
-    # Obtener el nombre real de la columna status en este DataFrame
+    if policy not in CATALOG_POLICIES:
+        raise ValueError(f"❌ policy inválida '{policy}'. Opciones: {CATALOG_POLICIES}")
     status_col = get_column("Status", df)
 
-    # 1) Leer cat_status completo con nombre y nombre_en
-    sql = """
-        SELECT
-            id,
-            nombre,
-            "DeadTreeValue" AS dead,
-            "AliveTree" AS alive
-        FROM cat_status
-    """
-    cat = pd.read_sql(sql, engine)
-
-    # 2) Construir los diccionarios mapping_dead / mapping_alive para ambos idiomas
-    mapping_dead = {}
-    mapping_alive = {}
-    for _, row in cat.iterrows():
-        for clave in [row["nombre"]]:
-            if pd.notna(clave) and clave not in mapping_dead:
-                mapping_dead[clave] = int(row["dead"]) if not pd.isna(row["dead"]) else 0
-                mapping_alive[clave] = int(row["alive"]) if not pd.isna(row["alive"]) else 0
-
     # 3️⃣ Detectar nuevos Status
-    catalog_values = set(cat["nombre"].dropna().unique())
+    catalog_values = set(catalogs.column("cat_status", "nombre").dropna().unique())
     status_values = set(df[status_col].dropna().unique())
     missing_statuses = sorted(status_values - catalog_values)
     if missing_statuses:
@@ -42,36 +26,52 @@ def calculate_dead_alive(df: pd.DataFrame, engine) -> pd.DataFrame:
         for val in missing_statuses:
             print(f"   - '{val}'")
 
+        if policy == "fail":
+            raise RuntimeError("⛔ Status nuevos sin entrada en cat_status (--catalog-policy=fail).")
+
         # Insertar automáticamente
         with engine.begin() as conn:
             for val in missing_statuses:
                 conn.execute(
-                    text("INSERT INTO cat_status (nombre) VALUES (:val) ON CONFLICT DO NOTHING"),
+                    text(f"INSERT INTO {catalogs.qualified('cat_status')} (nombre) VALUES (:val) ON CONFLICT DO NOTHING"),
                     {"val": val}
                 )
         print("✅ Nuevos Status añadidos a cat_status. Por favor completa los campos 'DeadTreeValue' y 'AliveTree'.")
 
-        # Pausar para edición manual
-        resp = input("⏸️ Pausado. ¿Ya actualizaste los valores en la base de datos? (y/n): ").strip().lower()
-        if resp != "y":
-            raise RuntimeError("⛔ Proceso detenido por el usuario para edición manual de cat_status.")
+        if policy == "queue":
+            tagged = tag_pending_rows(df, status_col, "cat_status", missing_statuses)
+            print(f"📥 {tagged} filas marcadas como pendientes de cat_status; el proceso continúa.")
+        else:
+            # Pausar para edición manual
+            resp = input("⏸️ Pausado. ¿Ya actualizaste los valores en la base de datos? (y/n): ").strip().lower()
+            if resp != "y":
+                raise RuntimeError("⛔ Proceso detenido por el usuario para edición manual de cat_status.")
 
         # Recargar catálogo ya actualizado
-        cat = pd.read_sql("""
-            SELECT id, nombre, "DeadTreeValue" AS dead, "AliveTree" AS alive
-            FROM cat_status
-        """, engine)
-        mapping_dead = {
-            row["nombre"]: int(row["dead"]) if not pd.isna(row["dead"]) else 0
-            for _, row in cat.iterrows() if pd.notna(row["nombre"])
-        }
-        mapping_alive = {
-            row["nombre"]: int(row["alive"]) if not pd.isna(row["alive"]) else 0
-            for _, row in cat.iterrows() if pd.notna(row["nombre"])
-        }
+        catalogs.refresh(["cat_status"])
+
+    return catalogs
+
+
+def calculate_dead_alive(df: pd.DataFrame, engine, catalogs: CatalogCache = None, policy: str = "pause") -> pd.DataFrame:
+    """
+    Agrega las columnas 'dead_tree' y 'alive_tree' mapeando el texto de 'status'
+    contra los valores de cat_status.
+    También avisa si hay statuses nuevos que no están en el catálogo.
+    """
+    # Obtener el nombre real de la columna status en este DataFrame
+    status_col = get_column("Status", df)
+
+    # 1) cat_status desde la caché (una sola lectura por corrida)
+    if catalogs is None:
+        catalogs = CatalogCache(engine, tables=["cat_status"])
+    ensure_status_entries(df, engine, catalogs, policy=policy)
+
+    # 2) Diccionarios nombre → DeadTreeValue / AliveTree
+    mapping_dead, mapping_alive = catalogs.status_flags()
 
     # 4️⃣ Mapear
     df["dead_tree"] = df[status_col].map(mapping_dead).fillna(0).astype(int)
     df["alive_tree"] = df[status_col].map(mapping_alive).fillna(0).astype(int)
 
-    return df
\ No newline at end of file
+    return df
@@ -36,29 +36,23 @@ def add_imputed_dead_rows(df: pd.DataFrame, contract_col: str, plot_col: str, de
         .to_dict()
     )
 
-    # 5. Generar filas a imputar
-    rows_to_add = []
-    for _, row in valid_plots.iterrows():
-        contract = row[contract_col]
-        plot = row[plot_col]
-        target_count = avg_per_contract.get(contract, 0)
-
-        # Obtener fila original del árbol muerto
-        dead_row = df[
-            (df[contract_col] == contract) &
-            (df[plot_col] == plot) &
-            (df[dead_col] == 1)
-            ].iloc[0]
-
-        # Calcular imputaciones necesarias
-        needed = max(0, target_count - 1)  # Restar el árbol existente
+    # 5. Generar filas a imputar: primera fila muerta de cada parcela válida,
+    #    repetida (promedio del contrato - 1) veces
+    dead_pos = np.flatnonzero((df[dead_col] == 1).to_numpy(dtype=bool, na_value=False))
+    first_dead = (
+        df.iloc[dead_pos][[contract_col, plot_col]]
+        .assign(_pos=dead_pos)
+        .drop_duplicates([contract_col, plot_col], keep="first")
+    )
+    to_impute = valid_plots[[contract_col, plot_col]].merge(first_dead, on=[contract_col, plot_col], how="inner")
 
-        for _ in range(needed):
-            rows_to_add.append(dead_row.to_dict())
+    target_count = to_impute[contract_col].map(avg_per_contract).fillna(0).astype(int)
+    needed = np.maximum(0, target_count.to_numpy() - 1)  # Restar el árbol existente
+    rows_to_add = np.repeat(to_impute["_pos"].to_numpy(), needed)
 
     # 6. Añadir filas y reportar
-    if rows_to_add:
-        added = pd.DataFrame(rows_to_add)
+    if len(rows_to_add):
+        added = df.iloc[rows_to_add]
         df = pd.concat([df, added], ignore_index=True)
         print("\n=== 🪵 Resumen de imputación ===")
         print(f"Árboles imputados: {len(rows_to_add)}")
@@ -1,5 +1,5 @@
 #CruisesProcessor/filldown
-from core.libs import pd
+from core.libs import np, pd
 from core.schema import COLUMNS
 
 # Extraer HEADER_COLS desde schema.py
@@ -11,28 +11,69 @@ HEADER_COLS = [
     )
 ]
 
+# Columnas que identifican el archivo/contrato de origen (la primera que exista)
+GROUP_COLS = ("source_file", "contractcode")
+
+
+def _fill_groups(df: pd.DataFrame, headers: pd.DataFrame, group_col: str | None) -> np.ndarray:
+    """Códigos enteros del grupo de cada fila; un solo grupo si no hay columna de origen."""
+    group_col = group_col or next((c for c in GROUP_COLS if c in df.columns), None)
+    if group_col is None or group_col not in df.columns:
+        return np.zeros(len(df), dtype=np.intp)
+    keys = headers[group_col] if group_col in headers.columns else df[group_col]
+    codes, _ = pd.factorize(keys)
+
+    # Una fila sin contrato pertenece al bloque que la precede (como en el Excel)
+    missing = codes < 0
+    if missing.all():
+        return np.zeros(len(df), dtype=np.intp)
+    if missing.any():
+        last = np.where(missing, 0, np.arange(len(codes)))
+        np.maximum.accumulate(last, out=last)
+        codes = codes[last]
+        first = int(np.argmax(~missing))
+        codes[:first] = codes[first]
+    return codes
+
+
 def forward_fill_headers(df: pd.DataFrame,
-                         cols: list[str] | None = None) -> pd.DataFrame:
+                         cols: list[str] | None = None,
+                         group_col: str | None = None) -> pd.DataFrame:
     """
-    Aplica fill-down (ffill + bfill) solo a filas que no estén completamente vacías.
-    Las filas vacías en columnas clave se eliminan antes.
+    Aplica fill-down (ffill + bfill) a las columnas de encabezado dentro de cada
+    archivo/contrato (group_col; por defecto source_file o contractcode), así un
+    valor nunca pasa de un contrato al siguiente.
+    Las filas vacías en columnas clave se eliminan antes. Sólo se tocan `cols`;
+    el resto del DataFrame no se copia ni se modifica.
     """
     cols = cols or HEADER_COLS
-    df_filled = df.copy()
 
     # Asegurar que solo use columnas existentes
-    existing = [col for col in cols if col in df_filled.columns]
+    existing = [col for col in cols if col in df.columns]
+    if not existing:
+        return df.copy(deep=False)
+
+    # "" → NA en los encabezados; en el pipeline remove_blank_rows ya lo hizo para todas las columnas de texto
+    headers = df[existing].replace("", pd.NA)
 
     # 🔥 Eliminar filas completamente vacías en columnas clave
-    df_filled = df_filled.replace("", pd.NA)
-    df_filled = df_filled.dropna(subset=existing, how="all")
-
-    # ✅ Aplicar filldown solo a las filas parcialmente completas
-    mask_non_empty = df_filled[existing].notna().any(axis=1)
-    df_filled.loc[mask_non_empty, existing] = (
-        df_filled.loc[mask_non_empty, existing]
-        .ffill()
-        .bfill()
-    )
+    missing = headers.isna().to_numpy()
+    keep = ~missing.all(axis=1)
+    if keep.all():
+        out = df.copy(deep=False)
+    else:
+        out = df.take(np.flatnonzero(keep))
+        headers = headers[keep]
+        missing = missing[keep]
+
+    # ✅ Una sola pasada agrupada
+    groups = _fill_groups(out, headers, group_col)
+    filled = headers.groupby(groups, sort=False).ffill()
+
+    # Tras el ffill sólo quedan huecos al inicio de un grupo: bfill únicamente si los hay
+    starts = np.r_[True, groups[1:] != groups[:-1]] if len(groups) else np.zeros(0, dtype=bool)
+    if missing[starts].any():
+        filled = filled.groupby(groups, sort=False).bfill()
 
-    return df_filled
+    out[existing] = filled
+    return out
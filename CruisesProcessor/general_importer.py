@@ -5,14 +5,16 @@ CAMBIOS DE SEGURIDAD:
 - Se mantiene toda la lógica de negocio intacta
 """
 
-from core.libs import text, inspect, pd, datetime, to_datetime
+from core.libs import text, inspect, pd, np, datetime, to_datetime, io
 from core.schema_helpers import rename_columns_using_schema, get_dtypes_for_dataframe, _SA_TO_PD, FINAL_ORDER, DTYPES
+from sqlalchemy import Date, Float, Integer, Numeric, SmallInteger, Text
 from core.db import get_engine
 from core.backup_manager import backup_table  # ✅ NUEVO
 from core.safe_ops import safe_drop_table  # ✅ NUEVO
+from CruisesProcessor.import_manifest import delete_contract_rows
 
 
-def prepare_df_for_sql(df):
+def prepare_df_for_sql(df, dtype_backend=None):
     # 1) Renombra todas las columnas usando el schema (al nombre SQL)
     df = rename_columns_using_schema(df)
 
@@ -24,6 +26,8 @@ def prepare_df_for_sql(df):
 
     # 3) Castea tipos mínimos según DTYPES
     dtypes = get_dtypes_for_dataframe(df)
+    if dtype_backend == "pyarrow" and arrow_available():
+        return cast_dataframe(df, dtype_backend="pyarrow"), dtypes
     for col, dtype in dtypes.items():
         if col in df.columns:
             try:
@@ -171,6 +175,125 @@ def ensure_table(df, engine, table_name, recreate=False):
                         print(f"❌ No se pudo agregar PK en 'id': {e}")
 
 
+INTEGER_PG_TYPES = {"smallint", "integer", "bigint"}
+COPY_NULL = "\\N"
+COPY_CHUNK_ROWS = 100_000
+
+
+def _target_column_types(cursor, table_full):
+    """{columna: tipo SQL} de la tabla destino (format_type de pg_attribute)."""
+    cursor.execute("""
+        SELECT a.attname, format_type(a.atttypid, a.atttypmod)
+        FROM pg_attribute a
+        WHERE a.attrelid = %s::regclass AND a.attnum > 0 AND NOT a.attisdropped
+    """, (table_full,))
+    return dict(cursor.fetchall())
+
+
+def _cast_from_text(col, pg_type):
+    # float → int igual que lo hace el INSERT parametrizado (3.0 → 3)
+    if pg_type in INTEGER_PG_TYPES:
+        return f's."{col}"::double precision::{pg_type}'
+    return f's."{col}"::{pg_type}'
+
+
+def copy_into_staging(cursor, df, stage_name, cols, progress=False, label=None, row_number=False):
+    """
+    Crea una tabla temporal de texto y vuelca el DataFrame con COPY FROM STDIN
+    (CSV en memoria, por bloques de COPY_CHUNK_ROWS filas).
+    Con row_number=True agrega _row (bigserial): el orden de llegada de cada fila.
+    """
+    stage_cols = ", ".join(f'"{c}" TEXT' for c in cols)
+    if row_number:
+        stage_cols = f"_row BIGSERIAL, {stage_cols}"
+    cols_quoted = ", ".join(f'"{c}"' for c in cols)
+    cursor.execute(f'CREATE TEMP TABLE {stage_name} ({stage_cols}) ON COMMIT DROP')
+
+    copy_sql = f"COPY {stage_name} ({cols_quoted}) FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')"
+    starts = range(0, len(df), COPY_CHUNK_ROWS)
+    if progress:
+        from tqdm import tqdm
+        starts = tqdm(starts, desc=f"COPY → {label or stage_name}", unit="bloques", ncols=80)
+
+    for start in starts:
+        buf = io.StringIO()
+        df.iloc[start:start + COPY_CHUNK_ROWS].to_csv(buf, index=False, header=False, na_rep=COPY_NULL)
+        buf.seek(0)
+        cursor.copy_expert(copy_sql, buf)
+
+
+REJECTS_SUFFIX = "_rejects"
+REJECT_REASONS = ("missing_id", "duplicate_in_batch", "conflict_existing", "invalid_id")
+
+
+def rejects_table_name(table_name):
+    return f"{table_name}{REJECTS_SUFFIX}"
+
+
+def _ensure_rejects_table(cursor, rejects_full, cols):
+    """<tabla>_rejects: columnas del lote como TEXT + motivo, copias en el lote y fecha."""
+    cursor.execute(
+        f"CREATE TABLE IF NOT EXISTS {rejects_full} ("
+        f"reject_reason TEXT NOT NULL, reject_copies INTEGER, "
+        f"rejected_at TIMESTAMPTZ NOT NULL DEFAULT now())"
+    )
+    add_cols = ", ".join(f'ADD COLUMN IF NOT EXISTS "{c}" TEXT' for c in cols)
+    cursor.execute(f"ALTER TABLE {rejects_full} {add_cols}")
+
+
+def _flag_rejects(cursor, stage_name, table_full, id_type):
+    """
+    Un GROUP BY sobre el staging marca las copias repetidas de cada id (gana la
+    primera, como ON CONFLICT DO NOTHING) y un EXISTS contra la tabla destino
+    los ids que ya estaban. Resultado en la temporal stage_rejects (_row, reason, copies).
+    """
+    cursor.execute(f"""
+        CREATE TEMP TABLE stage_rejects ON COMMIT DROP AS
+        SELECT s._row,
+               CASE WHEN s."id" IS NULL THEN 'missing_id'
+                    WHEN s._row <> g.first_row THEN 'duplicate_in_batch'
+                    ELSE 'conflict_existing' END AS reason,
+               g.copies
+        FROM {stage_name} s
+        LEFT JOIN (
+            SELECT "id", min(_row) AS first_row, count(*) AS copies
+            FROM {stage_name} WHERE "id" IS NOT NULL GROUP BY "id"
+        ) g ON g."id" = s."id"
+        WHERE s."id" IS NULL
+           OR s._row <> g.first_row
+           OR EXISTS (SELECT 1 FROM {table_full} t WHERE t."id" = {_cast_from_text("id", id_type)})
+    """)
+    cursor.execute("CREATE INDEX ON stage_rejects (_row)")
+    cursor.execute("SELECT reason, count(*) FROM stage_rejects GROUP BY reason")
+    return dict(cursor.fetchall())
+
+
+def save_rejects(df, table_name, reason, schema=None):
+    """Guarda filas descartadas en pandas (p. ej. df_bad por ID inválido) en <tabla>_rejects."""
+    if df.empty:
+        return 0
+    df = df.loc[:, ~df.columns.duplicated()]
+    cols = df.columns.tolist()
+    cols_quoted = ", ".join(f'"{c}"' for c in cols)
+    rejects_full = f'{schema + "." if schema else ""}"{rejects_table_name(table_name)}"'
+
+    conn = get_engine().raw_connection()
+    try:
+        cursor = conn.cursor()
+        _ensure_rejects_table(cursor, rejects_full, cols)
+        copy_into_staging(cursor, df, "stage_rejects_load", cols)
+        cursor.execute(
+            f"INSERT INTO {rejects_full} (reject_reason, {cols_quoted}) "
+            f"SELECT %s, {cols_quoted} FROM stage_rejects_load",
+            (reason,),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    print(f"🗃️  {len(df)} filas ({reason}) → {rejects_table_name(table_name)}")
+    return len(df)
+
+
 def save_inventory_to_sql(df,
                           connection_string,
                           table_name,
@@ -178,70 +301,138 @@ def save_inventory_to_sql(df,
                           schema=None,
                           dtype=None,
                           progress=False,
-                          chunksize=1000):
-    """Limpia nombres de columnas y guarda el DataFrame en SQL con tipos opcionales."""
+                          chunksize=1000,
+                          method="copy",
+                          replace_contracts=None):
+    """
+    Limpia nombres de columnas y guarda el DataFrame en SQL con tipos opcionales.
+
+    method:
+      - "copy" (default): COPY FROM STDIN a una tabla temporal y luego
+        INSERT ... SELECT ... ON CONFLICT (id) DO NOTHING en una sola sentencia.
+      - "executemany": inserción por lotes de `chunksize` filas (ruta anterior).
+      - "staged": COPY a la temporal, duplicados y conflictos calculados en el
+        servidor (GROUP BY + anti-join) y guardados en <tabla>_rejects en vez
+        de perderse en silencio. Devuelve {motivo: filas}.
+    Todos conservan la misma semántica de IDs duplicados (gana el primero).
+
+    replace_contracts: contratos cuyas filas se borran antes de insertar, en la
+    misma transacción que la carga (--incremental); si la carga falla no se pierde nada.
+    """
 
     print("\n=== INICIO DE IMPORTACIÓN ===")
 
     try:
         engine = get_engine()
-        conn = engine.raw_connection()
-        cursor = conn.cursor()
-
         table_full = f'{schema + "." if schema else ""}"{table_name}"'
 
-        conn.commit()
-
         cols = df.columns.tolist()
         cols_quoted = ", ".join([f'"{c}"' for c in cols])
-        placeholders = ", ".join(["%s"] * len(cols))
 
-        table_full = f'{schema + "." if schema else ""}"{table_name}"'
-
-        from sqlalchemy import inspect, text
         insp = inspect(engine)
         existing = [c["name"] for c in insp.get_columns(table_name, schema=schema)]
-
         conflict = ' ON CONFLICT (id) DO NOTHING' if 'id' in existing else ''
-        insert_query = (
-            f'INSERT INTO {table_full} ({cols_quoted}) '
-            f'VALUES ({placeholders})'
-            f'{conflict}'
-        )
 
-        data = df.values.tolist()
-
-        from sqlalchemy import inspect
-        insp = inspect(engine)
-        table_cols = [col["name"] for col in insp.get_columns(table_name)]
-
-        if progress:
-            from tqdm import tqdm
-            iterator = tqdm(
-                range(0, len(data), chunksize),
-                desc=f"Insertando → {table_name}",
-                unit="filas",
-                ncols=80
-            )
-        else:
-            iterator = range(0, len(data), chunksize)
-
-        for start in iterator:
-            batch = data[start:start + chunksize]
-            cursor.executemany(insert_query, batch)
-
-        conn.commit()
-        cursor.close()
-        conn.close()
+        # Borrado de contratos (--incremental) y carga en una sola transacción
+        with engine.begin() as sa_conn:
+            cursor = sa_conn.connection.cursor()
+            if replace_contracts:
+                delete_contract_rows(cursor, table_name, replace_contracts, schema)
+
+            if method == "copy":
+                target_types = _target_column_types(cursor, table_full)
+                stage_name = "stage_inventory_load"
+                copy_into_staging(cursor, df, stage_name, cols, progress=progress, label=table_name)
+
+                select_cols = ", ".join(_cast_from_text(c, target_types[c]) for c in cols)
+                cursor.execute(
+                    f'INSERT INTO {table_full} ({cols_quoted}) '
+                    f'SELECT {select_cols} FROM {stage_name} s'
+                    f'{conflict}'
+                )
+                inserted = cursor.rowcount
+
+            elif method == "staged":
+                target_types = _target_column_types(cursor, table_full)
+                stage_name = "stage_inventory_load"
+                copy_into_staging(cursor, df, stage_name, cols, progress=progress, label=table_name, row_number=True)
+
+                rejected = {}
+                keep = ""
+                if "id" in cols and "id" in target_types:
+                    rejected = _flag_rejects(cursor, stage_name, table_full, target_types["id"])
+                    keep = " WHERE NOT EXISTS (SELECT 1 FROM stage_rejects r WHERE r._row = s._row)"
+
+                select_cols = ", ".join(_cast_from_text(c, target_types[c]) for c in cols)
+                cursor.execute(
+                    f'INSERT INTO {table_full} ({cols_quoted}) '
+                    f'SELECT {select_cols} FROM {stage_name} s{keep}'
+                    f'{conflict}'
+                )
+                inserted = cursor.rowcount
+
+                if rejected:
+                    rejects_full = f'{schema + "." if schema else ""}"{rejects_table_name(table_name)}"'
+                    _ensure_rejects_table(cursor, rejects_full, cols)
+                    stage_cols = ", ".join(f's."{c}"' for c in cols)
+                    cursor.execute(
+                        f"INSERT INTO {rejects_full} (reject_reason, reject_copies, {cols_quoted}) "
+                        f"SELECT r.reason, r.copies, {stage_cols} "
+                        f"FROM {stage_name} s JOIN stage_rejects r ON r._row = s._row ORDER BY s._row"
+                    )
+                    detail = ", ".join(f"{n} {reason}" for reason, n in sorted(rejected.items()))
+                    print(f"🗃️  Rechazadas → {rejects_table_name(table_name)}: {detail}")
+
+            elif method == "executemany":
+                placeholders = ", ".join(["%s"] * len(cols))
+                insert_query = (
+                    f'INSERT INTO {table_full} ({cols_quoted}) '
+                    f'VALUES ({placeholders})'
+                    f'{conflict}'
+                )
 
-        print(f"✅ Bulk insert completado: \n '{table_name}' ({len(data)} filas)")
+                data = df.values.tolist()
+
+                if progress:
+                    from tqdm import tqdm
+                    iterator = tqdm(
+                        range(0, len(data), chunksize),
+                        desc=f"Insertando → {table_name}",
+                        unit="filas",
+                        ncols=80
+                    )
+                else:
+                    iterator = range(0, len(data), chunksize)
+
+                for start in iterator:
+                    batch = data[start:start + chunksize]
+                    cursor.executemany(insert_query, batch)
+                inserted = None  # executemany no reporta filas omitidas por conflicto
+
+            else:
+                raise ValueError(f"method desconocido: {method!r} (usa 'copy', 'staged' o 'executemany')")
+
+            cursor.close()
+
+        detail = f", {inserted} insertadas" if inserted is not None else ""
+        print(f"✅ Bulk insert completado: \n '{table_name}' ({len(df)} filas{detail})")
+        if method == "staged":
+            return rejected
     except Exception as e:
         print(f"❌ Error al realizar bulk insert: \n {str(e)}")
         raise
 
 
-def cast_dataframe(df):
-    """Convierte in-place las columnas presentes al dtype esperado."""
+def cast_dataframe(df, dtype_backend=None):
+    """
+    Convierte in-place las columnas presentes al dtype esperado.
+
+    Con dtype_backend="pyarrow" cada columna tipada en COLUMNS se parsea una sola
+    vez a su pd.ArrowDtype final (ver cast_dataframe_arrow).
+    """
+    if dtype_backend == "pyarrow":
+        return cast_dataframe_arrow(df)
+
     for col, sa_type in get_dtypes_for_dataframe(df).items():
         pd_dtype = _SA_TO_PD.get(sa_type)
         if pd_dtype is None or col not in df.columns:
@@ -267,6 +458,143 @@ def cast_dataframe(df):
     return df
 
 
+# ───── Ruta Arrow ─────
+# Formatos de cruisedate, en orden. ISO va antes que dayfirst: parseando valor por
+# valor, dayfirst leería 2024-05-06 como 5 de junio.
+DATE_FORMATS = ("%m/%d/%Y", "%Y-%m-%d", "dayfirst")
+CAST_ERROR_SAMPLES = 5
+
+
+def arrow_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def arrow_dtype_for(sa_type):
+    """Tipo SQLAlchemy de COLUMNS → pd.ArrowDtype final (None si no aplica)."""
+    import pyarrow as pa
+
+    if isinstance(sa_type, Text):
+        return pd.ArrowDtype(pa.string())
+    if isinstance(sa_type, Date):
+        return pd.ArrowDtype(pa.date32())
+    if isinstance(sa_type, SmallInteger):
+        return pd.ArrowDtype(pa.int16())
+    if isinstance(sa_type, Integer):
+        return pd.ArrowDtype(pa.int64())
+    if isinstance(sa_type, (Float, Numeric)):
+        return pd.ArrowDtype(pa.float64())
+    return None
+
+
+def _is_blank(values: pd.Series) -> pd.Series:
+    """Valores vacíos (NA o texto en blanco): no cuentan como error de conversión."""
+    return values.isna() | values.map(lambda v: isinstance(v, str) and not v.strip())
+
+
+def _parse_dates(values: pd.Series) -> pd.Series:
+    """Prueba DATE_FORMATS en orden; cada formato sólo sobre lo que aún no se pudo leer."""
+    parsed = pd.Series(pd.NaT, index=values.index, dtype="datetime64[ns]")
+    for fmt in DATE_FORMATS:
+        todo = parsed.isna() & values.notna()
+        if not todo.any():
+            break
+        if fmt == "dayfirst":
+            parsed[todo] = pd.to_datetime(values[todo], errors="coerce", dayfirst=True)
+        else:
+            parsed[todo] = pd.to_datetime(values[todo], errors="coerce", format=fmt)
+    return parsed.dt.normalize()
+
+
+def _parse_uniques(uniques: pd.Series, arrow_type):
+    """Valores únicos (object) → array numpy ya en el tipo final, NaN/NaT donde no se pudo."""
+    import pyarrow as pa
+
+    if pa.types.is_string(arrow_type):
+        return uniques.astype(str).to_numpy(dtype=object), np.zeros(len(uniques), dtype=bool)
+    if pa.types.is_date(arrow_type):
+        parsed = _parse_dates(uniques)
+    else:
+        parsed = pd.to_numeric(uniques, errors="coerce")
+        if pa.types.is_integer(arrow_type):
+            parsed = parsed.where(parsed % 1 == 0)
+    failed = parsed.isna().to_numpy()
+    return parsed.to_numpy(), failed
+
+
+def _arrow_column(s: pd.Series, dtype):
+    """
+    Parsea una columna a `dtype` (pd.ArrowDtype) trabajando sobre sus valores únicos:
+    factorize una vez, convierte los únicos y arma el array Arrow con take.
+    Devuelve (serie, celdas no convertibles, muestra de valores).
+    """
+    import pyarrow as pa
+
+    arrow_type = dtype.pyarrow_dtype
+    if pd.api.types.is_numeric_dtype(s.dtype) and pa.types.is_floating(arrow_type):
+        return s.astype(dtype), 0, []
+    if pa.types.is_string(arrow_type) and s.dtype == object:
+        # Caso común (todo texto o NA): pyarrow lo convierte directo, sin factorize
+        try:
+            arr = pa.array(s.to_numpy(), type=arrow_type, from_pandas=True)
+            return pd.Series(pd.arrays.ArrowExtensionArray(arr), index=s.index), 0, []
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            pass
+
+    codes, uniques = pd.factorize(s, use_na_sentinel=True)
+    if len(uniques) == 0:
+        return pd.Series(pd.NA, index=s.index, dtype=dtype), 0, []
+    uniques = pd.Series(np.asarray(uniques, dtype=object))
+    parsed, failed = _parse_uniques(uniques, arrow_type)
+
+    bad_unique = failed.copy()
+    if failed.any():
+        bad_unique[failed] = ~_is_blank(uniques[failed]).to_numpy()
+    n_bad, sample = 0, []
+    if bad_unique.any():
+        counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        n_bad = int(counts[bad_unique].sum())
+        sample = uniques[bad_unique].astype(str).head(CAST_ERROR_SAMPLES).tolist()
+
+    take = np.where(codes < 0, 0, codes)
+    null = (codes < 0) | failed[take]
+    values = parsed[take]
+    arr = pa.array(values, mask=null, type=None if pa.types.is_date(arrow_type) else arrow_type)
+    arr = arr.cast(arrow_type)
+    return pd.Series(pd.arrays.ArrowExtensionArray(arr), index=s.index), n_bad, sample
+
+
+def cast_dataframe_arrow(df, report=True):
+    """
+    Convierte cada columna tipada en COLUMNS (SQLALCHEMY_DTYPES) a su pd.ArrowDtype
+    final en una sola pasada: texto → string, NUMERIC/FLOAT → double, INT → int,
+    DATE → date32 (probando DATE_FORMATS). Los textos del Input se repiten mucho,
+    así que cada columna se parsea sobre sus valores únicos.
+
+    Las celdas con valor que no se pudieron convertir quedan nulas y se reportan
+    en df.attrs["cast_errors"] = {columna: {"count": n, "sample": [...]}}.
+    """
+    errors = {}
+    for col, sa_type in get_dtypes_for_dataframe(df).items():
+        dtype = arrow_dtype_for(sa_type)
+        if dtype is None or col not in df.columns or df[col].dtype == dtype:
+            continue
+
+        df[col], n_bad, sample = _arrow_column(df[col], dtype)
+        if n_bad:
+            errors[col] = {"count": n_bad, "sample": sample}
+
+    df.attrs["cast_errors"] = errors
+    if report and errors:
+        print("⚠️ Celdas no convertibles al tipo del schema (quedan NULL):")
+        for col, info in errors.items():
+            print(f"   - {col}: {info['count']} (ej: {info['sample']})")
+    return df
+
+
 def marcar_lote_completado(batch_imports_path, tabla_destino, tabla_sql):
     from core.libs import Path, json
 
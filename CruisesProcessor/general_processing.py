@@ -8,33 +8,83 @@ from CruisesProcessor.dead_alive_calculator import calculate_dead_alive
 from CruisesProcessor.dead_tree_imputer import add_imputed_dead_rows
 from CruisesProcessor.tree_id import split_by_id_validity
 from CruisesProcessor.catalog_normalizer import ensure_catalog_entries
+from CruisesProcessor.catalog_cache import CatalogCache
+from CruisesProcessor.catalog_queue import PENDING_PREFIX, tag_pending_rows
+from CruisesProcessor.dead_alive_calculator import ensure_status_entries
+from core.libs import pd, np, io, redirect_stdout, ProcessPoolExecutor
+from core.schema import COLUMNS
+from core.schema_helpers import get_column
 
-def process_inventory_dataframe(df, engine, country_code):
+# Columnas que el pipeline resuelve con get_column. En modo combinado el concat
+# las trae (vacías) de otros archivos; por contrato puede faltar alguna.
+PIPELINE_COLUMNS = ["Stand #", "Plot #", "Tree #", "dbh_in", "tht_ft"] + [
+    c["key"] for c in COLUMNS if c.get("source") == "input" and "catalog_table" in c
+]
+
+
+def ensure_pipeline_columns(df):
+    """Agrega como vacías (NA) las columnas del pipeline que el contrato no trae."""
+    for logical in PIPELINE_COLUMNS:
+        try:
+            get_column(logical, df)
+        except KeyError:
+            df[get_column(logical)] = pd.NA
+    return df
+
+
+# Campo de input que alimenta cada catálogo revisado por ensure_*_entries
+CATALOG_FIELDS = {
+    "cat_status": "Status",
+    "cat_defect": "Defect",
+    "cat_disease": "Disease",
+    "cat_species": "Species",
+}
+
+
+def process_inventory_dataframe(df, engine, country_code, catalogs=None, catalog_policy="pause", jobs=1):
+    # Todos los catálogos en una sola lectura; sólo se recargan tras insertar valores nuevos
+    if catalogs is None:
+        catalogs = CatalogCache(engine)
+    if jobs and jobs > 1:
+        return process_by_contract(df, engine, country_code, catalogs, catalog_policy, jobs)
+    return process_contract_chunk(df, engine, country_code, catalogs, catalog_policy)
+
+
+def iter_processed_chunks(frames, engine, country_code, catalogs=None, catalog_policy="pause"):
+    """
+    Modo --chunked: procesa cada DataFrame de `frames` (un contrato, ver
+    iter_contract_frames) de forma independiente y genera
+    (df_good, df_bad, source_files) para volcarlo a SQL antes de leer el siguiente.
+    """
+    if catalogs is None:
+        catalogs = CatalogCache(engine)
+    for raw in frames:
+        source_files = raw.attrs.get("source_files", [])
+        df_good, df_bad = process_contract_chunk(ensure_pipeline_columns(raw), engine, country_code, catalogs, catalog_policy)
+        del raw
+        yield df_good, df_bad, source_files
+
+
+def process_contract_chunk(df, engine, country_code, catalogs, catalog_policy="pause"):
+    """clean → fill-down → unidades → dead/alive → catálogos → doyle → imputación → IDs."""
     df = clean_cruise_dataframe(df)
     df = remove_blank_rows(df)
     df = forward_fill_headers(df)
-    if "sheet_used" in df.columns and country_code in {"CR", "MX", "GT"}:
-        input2_mask = df["sheet_used"].str.lower().eq("input (2)")
-        if input2_mask.any():
-            print(f"🧪 Saltando normalización de unidades para {input2_mask.sum()} filas de Input (2)")
-            df.loc[~input2_mask, :] = standardize_units(df.loc[~input2_mask, :])
-        else:
-            df = standardize_units(df)
-    else:
-        df = standardize_units(df)
+    df = standardize_chunk_units(df, country_code)
 
-    df = calculate_dead_alive(df, engine)
+    df = calculate_dead_alive(df, engine, catalogs=catalogs, policy=catalog_policy)
 
     # 1️⃣ - *Asegura* que todos los catálogos tengan los valores antes de normalizar
-    ensure_catalog_entries(df, engine, field="Defect", catalog_table="cat_defect")
-    ensure_catalog_entries(df, engine, field="Disease", catalog_table="cat_disease")
-    ensure_catalog_entries(df, engine, field="Species", catalog_table="cat_species")
+    ensure_catalog_entries(df, engine, field="Defect", catalog_table="cat_defect", catalogs=catalogs, policy=catalog_policy)
+    ensure_catalog_entries(df, engine, field="Disease", catalog_table="cat_disease", catalogs=catalogs, policy=catalog_policy)
+    ensure_catalog_entries(df, engine, field="Species", catalog_table="cat_species", catalogs=catalogs, policy=catalog_policy)
     # Puedes meter más si agregas otros catálogos
 
     df = normalize_catalogs(
         df,
         engine,
-        country_code
+        country_code,
+        catalogs=catalogs,
     )
 
     df = calculate_doyle(df)
@@ -46,3 +96,114 @@ def process_inventory_dataframe(df, engine, country_code):
 
     df_good, df_bad = split_by_id_validity(df)
     return df_good, df_bad
+
+
+def standardize_chunk_units(df, country_code):
+    """standardize_units, salvo filas de la hoja 'Input (2)' en CR/MX/GT (ya vienen en pulgadas/pies)."""
+    if "sheet_used" in df.columns and country_code in {"CR", "MX", "GT"}:
+        input2_mask = df["sheet_used"].str.lower().eq("input (2)")
+        if input2_mask.any():
+            print(f"🧪 Saltando normalización de unidades para {input2_mask.sum()} filas de Input (2)")
+            df.loc[~input2_mask, :] = standardize_units(df.loc[~input2_mask, :])
+            return df
+    return standardize_units(df)
+
+
+# ───── --jobs N: etapas por contrato en un pool de procesos ─────
+JOB_BATCHES_PER_WORKER = 4
+_WORKER_STATE = {}
+
+
+def _init_contract_worker(catalogs, country_code):
+    # Catálogos ya resueltos (sin engine): sólo lectura dentro del worker
+    _WORKER_STATE["catalogs"] = catalogs
+    _WORKER_STATE["country_code"] = country_code
+
+
+def _process_resolved_batch(df):
+    """fill-down → unidades → dead/alive → ids de catálogo → doyle → imputación → IDs de un bloque de contratos."""
+    catalogs = _WORKER_STATE["catalogs"]
+    country_code = _WORKER_STATE["country_code"]
+    log = io.StringIO()
+    with redirect_stdout(log):
+        df = forward_fill_headers(df)
+        df = standardize_chunk_units(df, country_code)
+
+        # El fill-down puede copiar un valor pendiente (queue) a filas sin marcar
+        for col in [c for c in df.columns if c.startswith(PENDING_PREFIX)]:
+            catalog_table = col[len(PENDING_PREFIX):]
+            if catalog_table in CATALOG_FIELDS:
+                field_col = get_column(CATALOG_FIELDS[catalog_table], df)
+                tag_pending_rows(df, field_col, catalog_table, df[col].dropna().unique())
+
+        df = calculate_dead_alive(df, None, catalogs=catalogs)
+        df = normalize_catalogs(df, None, country_code, catalogs=catalogs)
+        df = calculate_doyle(df)
+        df = add_imputed_dead_rows(df, contract_col="contractcode", plot_col="plot", dead_col="dead_tree")
+        df = df.drop(columns=["Status", "status_id", "status_text_raw"], errors="ignore")
+        df_good, df_bad = split_by_id_validity(df)
+    return df_good, df_bad, log.getvalue()
+
+
+def resolve_catalog_entries(df, engine, catalogs, catalog_policy="pause"):
+    """
+    Paso serial de --jobs: asegura Status/Defect/Disease/Species en sus catálogos
+    sobre el lote completo (inserciones, pausas y marcas de la cola ocurren aquí,
+    una sola vez) para que los workers sólo lean la caché.
+    """
+    for catalog_table, field in CATALOG_FIELDS.items():
+        if catalog_table == "cat_status":
+            ensure_status_entries(df, engine, catalogs, policy=catalog_policy)
+        else:
+            ensure_catalog_entries(df, engine, field=field, catalog_table=catalog_table,
+                                   catalogs=catalogs, policy=catalog_policy)
+    return catalogs
+
+
+def contract_batches(df, n_batches, contract_col="contractcode"):
+    """
+    Parte df en hasta n_batches bloques contiguos de contratos completos y de
+    tamaño parecido (en filas), respetando el orden de aparición de los contratos.
+    """
+    codes, _ = pd.factorize(df[contract_col], use_na_sentinel=False)
+    sizes = np.bincount(codes)
+    target = max(1, -(-len(df) // max(1, n_batches)))
+    batch_of_contract = (np.cumsum(sizes) - sizes) // target
+    row_batch = batch_of_contract[codes]
+    order = np.argsort(row_batch, kind="stable")
+    bounds = np.flatnonzero(np.diff(row_batch[order])) + 1
+    return [df.iloc[idx] for idx in np.split(order, bounds)]
+
+
+def process_by_contract(df, engine, country_code, catalogs, catalog_policy="pause", jobs=2):
+    """
+    --jobs N: limpia y resuelve catálogos una vez, parte el lote en bloques de
+    contratos completos y corre el resto del pipeline de cada bloque en N procesos.
+    Los bloques se concatenan en su orden original, sin importar cuál termina primero.
+    """
+    df = clean_cruise_dataframe(df)
+    df = remove_blank_rows(df)
+    resolve_catalog_entries(df, engine, catalogs, catalog_policy)
+
+    n_contracts = df["contractcode"].nunique(dropna=False)
+    jobs = max(1, min(int(jobs), n_contracts))
+    if jobs == 1:
+        return process_contract_chunk(df, engine, country_code, catalogs, catalog_policy)
+
+    # Varios bloques por proceso: reparte mejor los contratos grandes sin pagar
+    # el costo fijo del pipeline por cada contrato chico
+    batches = contract_batches(df, jobs * JOB_BATCHES_PER_WORKER)
+    del df
+    print(f"⚙️ Procesando {n_contracts} contratos en {len(batches)} bloques con {jobs} procesos...")
+
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_contract_worker,
+                             initargs=(catalogs, country_code)) as executor:
+        results = list(executor.map(_process_resolved_batch, batches))
+
+    goods, bads = [], []
+    for df_good, df_bad, log in results:
+        if log:
+            print(log, end="")
+        goods.append(df_good)
+        bads.append(df_bad)
+    return pd.concat(goods, ignore_index=True), pd.concat(bads, ignore_index=True)
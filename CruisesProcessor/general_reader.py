@@ -3,6 +3,11 @@ from core.libs import argparse, json
 from CruisesProcessor.xlsx_read_and_merge import combine_files
 from CruisesProcessor.import_summary import generate_summary_from_df
 from CruisesProcessor.general_preparation import contracts_missing_metrics
+from CruisesProcessor.import_manifest import select_changed_files
+from core.db import get_engine
+from CruisesProcessor.utils.ingest_cache import IngestCache
+from CruisesProcessor.utils.onedriver import AVAILABILITY_BACKENDS, preflight_files, set_availability_backend
+from CruisesProcessor.catalog_queue import CATALOG_POLICIES
 from core.paths import resolve_inventory_paths
 
 def get_args():
@@ -16,6 +21,22 @@ def get_args():
     parser.add_argument("--save_summary", action="store_true", help="Guardar resumen en archivo")
     parser.add_argument("--recreate-table", action="store_true", help="Si se especifica, recrea la tabla SQL antes de volcar datos")
     parser.add_argument("--no-sql", action="store_true", help="NO guardar en BD (solo procesar y exportar a Excel)") # ✅ NUEVO
+    parser.add_argument("--workers", type=int, default=1, help="Procesos para leer los XLSX en paralelo (1 = secuencial)")
+    parser.add_argument("--incremental", action="store_true", help="Solo re-importa archivos nuevos o modificados según el manifiesto de importación")
+    parser.add_argument("--no-cache", action="store_true", help="No usar el caché de ingesta (siempre re-lee los XLSX)")
+    parser.add_argument("--refresh-cache", action="store_true", help="Re-lee todos los XLSX y reescribe el caché de ingesta")
+    parser.add_argument("--dtype-backend", choices=("pyarrow", "numpy"), default="pyarrow",
+                        help="Tipos para SQL: pyarrow (una pasada, reporta celdas no convertibles) o numpy (ruta anterior)")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="Procesos para el pipeline por contrato (fill-down, unidades, doyle, imputación, IDs)")
+    parser.add_argument("--chunked", action="store_true",
+                        help="Procesa y guarda contrato por contrato (memoria ~ contrato más grande, no el lote completo)")
+    parser.add_argument("--availability-backend", choices=AVAILABILITY_BACKENDS, default="auto",
+                        help="Cómo verificar que los XLSX están locales: auto, windows (OneDrive), posix (stat), rclone (montaje FUSE) o none")
+    parser.add_argument("--load-mode", choices=("copy", "staged"), default="copy",
+                        help="copy: COPY + ON CONFLICT DO NOTHING; staged: duplicados/conflictos/IDs inválidos → <tabla>_rejects")
+    parser.add_argument("--catalog-policy", choices=CATALOG_POLICIES, default="pause",
+                        help="Valores nuevos de catálogo: pause (input), queue (sigue y encola) o fail (detiene)")
     return parser.parse_args()
 
 
@@ -33,6 +54,17 @@ Resultado:
 ⚠️  Filtra solo archivos que necesitan métrica (salta los ya procesados)
 
 
+MODO INCREMENTAL (solo archivos nuevos o modificados):
+------------------------------------------------------
+python -m CruisesProcessor --tabla_destino inventory_cr_2024 --incremental
+
+Resultado:
+✅ Compara cada archivo contra masterdatabase.cruise_import_manifest (hash)
+✅ Re-lee solo los archivos nuevos o modificados
+✅ Borra y re-inserta solo las filas de esos contratos en inventory_cr_2024
+⏩ Todo lo demás se salta
+
+
 MODO SEGURO (guarda en tabla paralela con sufijo 'b'):
 ------------------------------------------------------
 python -m CruisesProcessor --tabla_destino inventory_cr_2024 --no-sql
@@ -67,6 +99,96 @@ VENTAJAS DEL MODO SEGURO:
 6. Si algo sale mal, simplemente DROP inventory_cr_2024b
 
 
+LECTURA RÁPIDA (paralela + caché de ingesta):
+---------------------------------------------
+python -m CruisesProcessor --tabla_destino inventory_cr_2024 --workers 6
+
+- --workers N        lee los XLSX en N procesos (mismo orden de salida)
+- Caché de ingesta   activo por defecto (requiere pyarrow), en tmp/ingest_cache
+- --refresh-cache    re-lee todo y reescribe el caché
+- --no-cache         ignora el caché por completo
+
+
+PROCESAMIENTO EN PARALELO (--jobs):
+-----------------------------------
+python -m CruisesProcessor --tabla_destino inventory_us_2025 --workers 6 --jobs 8
+
+- Los catálogos se revisan una sola vez sobre el lote (pausas/cola igual que siempre)
+- Luego el lote se parte en bloques de contratos completos y fill-down, unidades,
+  dead/alive, ids de catálogo, doyle, imputación e IDs corren en N procesos
+- Los bloques se concatenan en el orden original (salida determinista)
+- El fill-down se hace por contrato también en serie: mismo resultado con o sin --jobs
+- Con --chunked no aplica (ya se procesa un contrato a la vez)
+
+
+TIPOS PARA SQL (--dtype-backend):
+---------------------------------
+- pyarrow (default)  cada columna de COLUMNS se parsea una vez a su pd.ArrowDtype;
+                     celdas no convertibles (p. ej. dbh 'n/a') quedan NULL y se listan
+- numpy              ruta anterior (astype por columna + replace NA → None)
+
+
+CORRIDAS DESATENDIDAS (catálogos en cola):
+------------------------------------------
+python -m CruisesProcessor --tabla_destino inventory_us_2025 --catalog-policy queue
+
+- pause (default)    valores nuevos de Status/Defect/Disease/Species → input() y espera
+- queue              los inserta en el catálogo, marca las filas y sigue;
+                     quedan en masterdatabase.catalog_pending_queue
+- fail               se detiene sin tocar los catálogos
+
+Después de completar los catálogos (nombre_en, DeadTreeValue, AliveTree...):
+python -m CruisesProcessor reconcile-catalogs [--tabla_destino inventory_us_2025]
+
+
+RECHAZOS EN LA BASE (--load-mode staged):
+-----------------------------------------
+python -m CruisesProcessor --tabla_destino inventory_us_2025 --load-mode staged
+
+- Las filas se cargan con COPY a una tabla temporal; duplicados del lote (GROUP BY id)
+  e ids que ya existen en la tabla (anti-join) se calculan en PostgreSQL
+- En vez de perderse con ON CONFLICT DO NOTHING, quedan en inventory_us_2025_rejects
+  con reject_reason: duplicate_in_batch / conflict_existing / missing_id / invalid_id
+- Las filas con ID inválido también van ahí (no se escriben bad_rows_*.xlsx ni duplicated_ids_found.csv)
+
+SELECT reject_reason, count(*) FROM inventory_us_2025_rejects GROUP BY 1;
+
+
+VALIDAR UN LOTE ANTES DE IMPORTAR:
+----------------------------------
+python -m CruisesProcessor validate --tabla_destino inventory_us_2025 [--format json|xlsx|both]
+
+- stat de todos los archivos + hojas y fila de encabezados (openpyxl read-only), en hilos
+- Por archivo: ok / missing / empty / unreadable / missing_columns (tree_number, status)
+- Reporte validation_<tabla>.json / .xlsx; sale con código 1 si algo no está listo
+
+
+ARCHIVOS EN LA NUBE (--availability-backend):
+---------------------------------------------
+python -m CruisesProcessor --tabla_destino inventory_us_2025 --availability-backend rclone
+
+- Antes de leer, todo el lote se verifica en paralelo (hilos); los que no están
+  se reintentan juntos y luego se omiten, sin esperas por archivo
+- auto (default)     windows en Windows; rclone si el archivo está en un montaje FUSE; si no posix
+- windows            OneDrive Files On-Demand (ctypes) con Excel como último recurso
+- posix              stat: existe y tamaño > 0
+- rclone             stat + lectura de la cabecera (rclone mount, onedriver)
+- none               sin verificación
+
+
+MODO POR CONTRATO (--chunked):
+------------------------------
+python -m CruisesProcessor --tabla_destino inventory_us_2025 --chunked
+
+- Lee, procesa y guarda un contrato a la vez (clean → fill-down → unidades →
+  dead/alive → catálogos → doyle → imputación → IDs → SQL)
+- Memoria ~ contrato más grande, no el país/año completo
+- Agrupa por el contract_code del Summary (primera pasada sólo de metadatos),
+  no por el prefijo del nombre del archivo
+- El fill-down y la detección de unidades ya no cruzan de un contrato a otro
+- Compatible con --workers, --incremental y --catalog-policy
+
+
 COMPARAR DESPUÉS:
 ----------------
 SELECT COUNT(*) FROM inventory_cr_2024;   -- Original
@@ -95,9 +217,21 @@ def load_batch_config(tabla_destino, path="CruisesProcessor/batch_imports.json")
     raise ValueError(f"❌ No se encontró lote con tabla_destino={tabla_destino}")
 
 
-def load_and_prepare_data():
-    args = get_args()
+def build_ingest_cache(args):
+    """Caché de ingesta según --no-cache / --refresh-cache (None si está desactivado)."""
+    if args.no_cache:
+        return None
+    if not IngestCache.available():
+        print("ℹ️  Caché de ingesta desactivado: instala pyarrow para habilitarlo.")
+        return None
+    return IngestCache(refresh=args.refresh_cache)
+
 
+def resolve_input_files(args) -> bool:
+    """
+    Completa args.files (batch_imports.json, paths absolutos, disponibilidad, filtros de modo)
+    y args.file_fingerprints. Devuelve False si no queda nada que procesar.
+    """
     # 1. Cargar archivos desde batch si no vienen por argumento
     if not args.files:
         lote = load_batch_config(args.tabla_destino, args.batch_imports_path)
@@ -108,8 +242,26 @@ def load_and_prepare_data():
     # 2. Resolver paths absolutos
     args.files = resolve_inventory_paths(args.files)
 
+    # 2b. Pre-flight: verificar en paralelo que los archivos estén disponibles localmente
+    set_availability_backend(args.availability_backend)
+    args.files, unavailable = preflight_files(args.files)
+    for f in unavailable:
+        print(f"⛔ No disponible (se omite): {f}")
+    if not args.files:
+        print("⛔ Ningún archivo del lote está disponible localmente.")
+        return False
+
     # 3. ✅ NUEVO: Filtrar archivos SOLO si NO está en modo --no-sql
-    if args.year and not args.no_sql:
+    args.file_fingerprints = {}
+    if args.incremental:
+        # MODO INCREMENTAL: solo archivos nuevos o modificados según el manifiesto
+        args.files, args.file_fingerprints = select_changed_files(
+            args.files, get_engine(), args.tabla_destino, workers=args.workers
+        )
+        if not args.files:
+            print("🎉 Ningún archivo cambió desde la última importación. Nada que procesar.")
+            return False
+    elif args.year and not args.no_sql:
         # MODO NORMAL: filtrar solo archivos que necesitan métricas
         missing_contracts = contracts_missing_metrics(args.year)
         files_filtered = []
@@ -127,12 +279,25 @@ def load_and_prepare_data():
         print(f"   Total archivos a procesar: {len(args.files)}")
         print("="*80 + "\n")
 
-    # 4. Cargar los archivos (si quedaron)
     if not args.files:
         print("🎉 Todos los archivos ya están métricados. Nada que procesar.")
+        return False
+    return True
+
+
+def load_and_prepare_data(args=None):
+    args = args or get_args()
+
+    # 1-3. Resolver archivos del lote
+    if not resolve_input_files(args):
         return args, None
 
-    df_combined = combine_files(explicit_files=args.files)
+    # 4. Cargar los archivos (si quedaron)
+    df_combined = combine_files(
+        explicit_files=args.files,
+        workers=args.workers,
+        cache=build_ingest_cache(args),
+    )
     print(f"🔍 [load_and_prepare_data DESPUÉS de combine_files] Columnas: {df_combined.columns.tolist()}")
 
     if df_combined is not None and not df_combined.empty:
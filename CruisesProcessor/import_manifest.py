@@ -0,0 +1,184 @@
+# CruisesProcessor/import_manifest.py
+"""
+Manifiesto de importación de cruceros (modo --incremental).
+
+Registra, por archivo XLSX y tabla destino, el hash del contenido, el número
+de filas y el contrato importado. En la siguiente corrida solo se vuelven a
+leer los archivos nuevos o modificados (más los demás archivos de sus
+contratos), y en la tabla inventory_<cc>_<yyyy> solo se reemplazan las filas
+de los contratos afectados, en la misma transacción que la carga.
+"""
+from core.libs import pd, text, Path, datetime
+from CruisesProcessor.utils.ingest_cache import file_content_hash
+
+MANIFEST_SCHEMA = "masterdatabase"
+MANIFEST_TABLE = "cruise_import_manifest"
+MANIFEST_FULL = f"{MANIFEST_SCHEMA}.{MANIFEST_TABLE}"
+
+
+def ensure_manifest_table(engine):
+    with engine.begin() as conn:
+        conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {MANIFEST_SCHEMA}"))
+        conn.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS {MANIFEST_FULL} (
+                file_path     TEXT NOT NULL,
+                target_table  TEXT NOT NULL,
+                file_hash     TEXT NOT NULL,
+                file_size     BIGINT,
+                file_mtime    DOUBLE PRECISION,
+                row_count     INTEGER,
+                contract_code TEXT,
+                imported_at   TIMESTAMP NOT NULL DEFAULT now(),
+                PRIMARY KEY (file_path, target_table)
+            )
+        """))
+
+
+def load_manifest(engine, target_table: str) -> pd.DataFrame:
+    ensure_manifest_table(engine)
+    return pd.read_sql(
+        text(f"""
+            SELECT file_path, file_hash, file_size, file_mtime, row_count, contract_code
+            FROM {MANIFEST_FULL}
+            WHERE target_table = :table
+        """),
+        engine,
+        params={"table": target_table},
+    )
+
+
+def select_changed_files(files: list[str], engine, target_table: str, workers: int = 1) -> tuple[list[str], dict]:
+    """
+    Compara los archivos del lote contra el manifiesto.
+
+    Si tamaño y mtime coinciden con lo registrado, el archivo se da por igual
+    sin leerlo; si no, se calcula el hash y solo cuenta como cambio si difiere.
+    De los archivos cambiados se lee el contract_code de la hoja Summary (el que
+    se borra al guardar) para arrastrar los demás archivos de ese contrato.
+
+    Returns:
+        (archivos nuevos o modificados, {path: {"hash", "size", "mtime"}})
+    """
+    manifest = load_manifest(engine, target_table).set_index("file_path")
+
+    changed, fingerprints = [], {}
+    for f in files:
+        path = Path(f)
+        if not path.exists():
+            print(f"⛔ No existe: {f}")
+            continue
+
+        st = path.stat()
+        if f in manifest.index:
+            prev = manifest.loc[f]
+            if prev["file_size"] == st.st_size and prev["file_mtime"] == st.st_mtime:
+                print(f"⏩ SKIP {path.name} (sin cambios desde la última importación)")
+                continue
+
+        file_hash = file_content_hash(path)
+        fingerprints[f] = {"hash": file_hash, "size": st.st_size, "mtime": st.st_mtime}
+
+        if f in manifest.index and manifest.loc[f, "file_hash"] == file_hash:
+            # Solo cambió el mtime: se actualiza el manifiesto, no se re-importa
+            record_imports(
+                engine, target_table,
+                [{"path": f,
+                  "contract_code": manifest.loc[f, "contract_code"],
+                  "rows": manifest.loc[f, "row_count"]}],
+                fingerprints,
+            )
+            print(f"⏩ SKIP {path.name} (contenido idéntico)")
+            continue
+
+        changed.append(f)
+
+    # Un contrato se borra completo antes de re-importarlo: sus otros archivos
+    # (sin cambios) se re-leen también, si no sus filas se perderían. El código
+    # es el de la hoja Summary, no el prefijo del nombre (XY01_*.xlsx puede ser AB02)
+    from CruisesProcessor.xlsx_read_and_merge import contract_sort_keys  # import circular a nivel de módulo
+
+    def previous_contract(f):
+        return manifest.loc[f, "contract_code"] if f in manifest.index else None
+
+    summary_codes = contract_sort_keys([Path(f) for f in changed], workers=workers) if changed else {}
+    contracts = {previous_contract(f) for f in changed} | set(summary_codes.values())
+    contracts = {str(c) for c in contracts if c is not None and pd.notna(c)}
+    siblings = [
+        f for f in files
+        if f not in changed and f in manifest.index and str(previous_contract(f)) in contracts
+    ]
+    for f in siblings:
+        st = Path(f).stat()
+        fingerprints[f] = {"hash": manifest.loc[f, "file_hash"], "size": st.st_size, "mtime": st.st_mtime}
+    for f in changed + siblings:
+        # Código con el que quedó importado: si el archivo cambió de contrato, las filas viejas también se borran
+        fingerprints[f]["previous_contract"] = previous_contract(f)
+
+    print(f"🔄 Incremental: {len(changed)} de {len(files)} archivos nuevos o modificados"
+          + (f" (+{len(siblings)} del mismo contrato)" if siblings else ""))
+    return [f for f in files if f in set(changed + siblings)], fingerprints
+
+
+def contracts_to_replace(df_sql, source_files: list[dict], fingerprints: dict, skip=()) -> set:
+    """
+    Contratos cuyas filas se reemplazan al guardar este bloque: los del bloque,
+    los del archivo según la lectura y el código previo del manifiesto.
+    `skip`: contratos ya re-importados en esta corrida (modo --chunked).
+    """
+    codes = set(df_sql["contractcode"].dropna()) | {f["contract_code"] for f in source_files}
+    codes |= {fingerprints.get(f["path"], {}).get("previous_contract") for f in source_files}
+    return {str(c) for c in codes if c is not None and pd.notna(c)} - set(skip)
+
+
+def delete_contract_rows(cursor, table_name: str, contract_codes, schema=None) -> int:
+    """
+    Borra de la tabla de inventario las filas de los contratos a re-importar.
+    Recibe el cursor de la carga (save_inventory_to_sql) para que el borrado y
+    el insert queden en la misma transacción.
+    """
+    codes = sorted({str(c) for c in contract_codes if pd.notna(c)})
+    if not codes:
+        return 0
+
+    table_full = f'{schema + "." if schema else ""}"{table_name}"'
+    cursor.execute(f"DELETE FROM {table_full} WHERE contractcode = ANY(%s)", (codes,))
+    print(f"🧽 {cursor.rowcount} filas previas eliminadas de {table_name} ({len(codes)} contratos)")
+    return cursor.rowcount
+
+
+def record_imports(engine, target_table: str, source_files: list[dict], fingerprints: dict) -> None:
+    """Upsert en el manifiesto de los archivos importados en esta corrida."""
+    rows = []
+    for entry in source_files:
+        fp = fingerprints.get(entry["path"])
+        if fp is None:
+            continue
+        rows.append({
+            "file_path": entry["path"],
+            "target_table": target_table,
+            "file_hash": fp["hash"],
+            "file_size": int(fp["size"]),
+            "file_mtime": float(fp["mtime"]),
+            "row_count": None if pd.isna(entry.get("rows")) else int(entry["rows"]),
+            "contract_code": entry.get("contract_code"),
+            "imported_at": datetime.now(),
+        })
+    if not rows:
+        return
+
+    ensure_manifest_table(engine)
+    with engine.begin() as conn:
+        conn.execute(text(f"""
+            INSERT INTO {MANIFEST_FULL}
+                (file_path, target_table, file_hash, file_size, file_mtime, row_count, contract_code, imported_at)
+            VALUES
+                (:file_path, :target_table, :file_hash, :file_size, :file_mtime, :row_count, :contract_code, :imported_at)
+            ON CONFLICT (file_path, target_table) DO UPDATE SET
+                file_hash     = EXCLUDED.file_hash,
+                file_size     = EXCLUDED.file_size,
+                file_mtime    = EXCLUDED.file_mtime,
+                row_count     = EXCLUDED.row_count,
+                contract_code = EXCLUDED.contract_code,
+                imported_at   = EXCLUDED.imported_at
+        """), rows)
+    print(f"📒 Manifiesto actualizado: {len(rows)} archivos en {MANIFEST_FULL}")
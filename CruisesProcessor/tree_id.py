@@ -1,5 +1,5 @@
 #Cruise/tree_id
-from core.libs import pd
+from core.libs import pd, np, os
 from core.schema_helpers import get_column
 
 PLOT_LOGICAL     = "Plot #"
@@ -7,12 +7,77 @@ STAND_LOGICAL = "Stand #"
 TREE_LOGICAL     = "Tree #"
 CONTRACT_LOGICAL = "ContractCode"
 
+ERR_CONTRACT = "❌ Falta contractcode"
+ERR_PLOT     = "❌ Falta plot"
+ERR_TREE     = "❌ tree_number no numérico"
+ERR_UNKNOWN  = "❌ Desconocido"
+
+_NON_ASCII = r"[^\x00-\x7f]"
+
+
 def pad_plot(val: str) -> str:
     val = str(val).strip()
     numeric = ''.join(filter(str.isdigit, val))
     alpha   = ''.join(filter(str.isalpha, val))
     return numeric.zfill(3) + alpha
 
+
+def parse_stand(x) -> str:
+    if pd.isnull(x) or str(x).strip() == "" or str(x).lower() == "nan":
+        return ""
+    try:
+        return str(int(float(x))).zfill(2)
+    except Exception:
+        return str(x).strip()
+
+
+def on_uniques(s: pd.Series, func) -> pd.Series:
+    """
+    Aplica `func` (operación vectorizada Series → Series) sólo sobre los valores
+    únicos de `s` y la expande de vuelta. Plots, stands y contratos se repiten
+    miles de veces, así que los .str de pandas (bucles Python) corren sobre decenas
+    de valores en vez de millones.
+    """
+    codes, uniques = pd.factorize(s, use_na_sentinel=False)
+    mapped = func(pd.Series(uniques))
+    return pd.Series(np.asarray(mapped, dtype=object)[codes], index=s.index, dtype=object)
+
+
+def pad_plot_series(plot_str: pd.Series) -> pd.Series:
+    """
+    Versión vectorizada de pad_plot sobre strings ya limpios.
+    Para ASCII: dígitos [0-9] + zfill(3) + letras [A-Za-z]. Las filas con
+    caracteres no-ASCII (str.isdigit/isalpha aceptan unicode) caen a pad_plot.
+    """
+    digits = plot_str.str.replace(r"[^0-9]+", "", regex=True)
+    alpha = plot_str.str.replace(r"[^A-Za-z]+", "", regex=True)
+    out = digits.str.zfill(3) + alpha
+
+    non_ascii = plot_str.str.contains(_NON_ASCII, regex=True, na=False)
+    if non_ascii.any():
+        out[non_ascii] = plot_str[non_ascii].map(pad_plot)
+    return out
+
+
+def parse_stand_series(stand: pd.Series) -> pd.Series:
+    """
+    Versión vectorizada de parse_stand.
+    Numérico → trunc a entero + zfill(2); objeto/texto → parse_stand por valor único.
+    """
+    if not pd.api.types.is_numeric_dtype(stand) or pd.api.types.is_bool_dtype(stand):
+        return on_uniques(stand, lambda u: u.map(parse_stand))
+
+    out = pd.Series("", index=stand.index, dtype=object)
+    # int(float(x)): pasar por float64 replica la pérdida de precisión del original
+    f = stand.astype("float64")
+    fast = np.isfinite(f) & (f.abs() < 2**63)
+    out[fast] = on_uniques(f[fast].astype("int64"), lambda u: u.astype(str).str.zfill(2))
+    rest = f.notna() & ~fast  # ±inf o fuera de rango int64
+    if rest.any():
+        out[rest] = f[rest].map(parse_stand)
+    return out
+
+
 def split_by_id_validity(df: pd.DataFrame):
     df = df.copy()
 
@@ -21,56 +86,54 @@ def split_by_id_validity(df: pd.DataFrame):
     contract_col = get_column(CONTRACT_LOGICAL, df)
     stand_col = get_column(STAND_LOGICAL, df)
 
-    df["plot_str"] = df[plot_col].astype(str).str.strip()
-    df["plot_clean"] = df["plot_str"].apply(pad_plot)
+    # astype(str) antes de factorizar: 1 y 1.0 son el mismo único pero no el mismo str
+    df["plot_str"] = on_uniques(df[plot_col].astype(str), lambda u: u.str.strip())
+    df["plot_clean"] = on_uniques(df["plot_str"], pad_plot_series)
     df["tree_num"] = pd.to_numeric(df[tree_col], errors="coerce")
     df["contractcode"] = df[contract_col]
 
     # Nuevo: procesar Stand #
     if stand_col is not None:
-        def parse_stand(x):
-            if pd.isnull(x) or str(x).strip() == "" or str(x).lower() == "nan":
-                return ""
-            try:
-                return str(int(float(x))).zfill(2)
-            except Exception:
-                return str(x).strip()
-
-        df["stand_str"] = df[stand_col].apply(parse_stand)
+        df["stand_str"] = parse_stand_series(df[stand_col])
     else:
         df["stand_str"] = ""
 
     bad_mask = (
             df["contractcode"].isna() |
-            df["contractcode"].str.strip().eq("") |
+            on_uniques(df["contractcode"], lambda u: u.str.strip()).eq("") |
             df["plot_clean"].eq("") |
             df["tree_num"].isna()
     )
     ok = ~bad_mask
 
-    df.loc[ok, "tree_padded"] = df.loc[ok, "tree_num"].astype(int).astype(str).str.zfill(3)
+    df.loc[ok, "tree_padded"] = on_uniques(
+        df.loc[ok, "tree_num"].astype(int), lambda u: u.astype(str).str.zfill(3)
+    )
 
     df.loc[ok, "id"] = (
-        df.loc[ok, "contractcode"].str.upper().str.strip() +
+        on_uniques(df.loc[ok, "contractcode"], lambda u: u.str.upper().str.strip()) +
         df.loc[ok, "stand_str"] +
         df.loc[ok, "plot_clean"] +
         df.loc[ok, "tree_padded"]
     )
 
-    def detect_id_error(row):
-        if pd.isna(row["contractcode"]) or str(row["contractcode"]).strip() == "":
-            return "❌ Falta contractcode"
-        if pd.isna(row["plot_clean"]) or str(row["plot_clean"]).strip() == "":
-            return "❌ Falta plot"
-        if pd.isna(row["tree_num"]):
-            return "❌ tree_number no numérico"
-        return "❌ Desconocido"
-
-    df.loc[bad_mask, "id_error"] = df.loc[bad_mask].apply(detect_id_error, axis=1)
+    # Etiqueta de error: primera condición que falla, en el mismo orden que antes
+    bad = df.loc[bad_mask]
+    contract_missing = bad["contractcode"].isna() | bad["contractcode"].astype(str).str.strip().eq("")
+    plot_missing = bad["plot_clean"].isna() | bad["plot_clean"].astype(str).str.strip().eq("")
+    error = np.select(
+        [contract_missing, plot_missing, bad["tree_num"].isna()],
+        [ERR_CONTRACT, ERR_PLOT, ERR_TREE],
+        default=ERR_UNKNOWN,
+    )
+    if len(bad):
+        df.loc[bad_mask, "id_error"] = pd.Series(error, index=bad.index, dtype=object)
+    else:
+        df["id_error"] = np.nan  # mismo dtype que dejaba el .apply sobre un frame vacío
 
     # Si tienes `path` en el df, inclúyelo
     if "path" in df.columns:
-        df.loc[bad_mask, "id_error"] += df.loc[bad_mask]["path"].apply(lambda p: f" ← archivo: {os.path.basename(p)}")
+        df.loc[bad_mask, "id_error"] += " ← archivo: " + bad["path"].map(os.path.basename)
 
     drop_cols = ["plot_str", "plot_clean", "tree_num", "stand_str","tree_padded"]
     return (
@@ -1,5 +1,5 @@
 #core/cleaners.py
-from core.libs import pd
+from core.libs import pd, np
 
 def standardize_units(df):
     """
@@ -50,9 +50,26 @@ def remove_blank_rows(df: pd.DataFrame,
                       campos_clave: list[str] = None) -> pd.DataFrame:
     """
     Elimina filas completamente vacías en los campos clave (útiles).
+    Vacío = NA o "". Los "" de todas las columnas de texto pasan a NA (como el
+    replace del frame completo, que llegarían a SQL como '' o romperían el cast
+    numérico), pero sólo se reescriben las columnas que tienen algún "".
     """
     campos_clave = campos_clave or ["plot", "tree_number", "Status"]
     campos_existentes = [c for c in campos_clave if c in df.columns]
 
-    df = df.replace("", pd.NA)
-    return df.dropna(subset=campos_existentes, how="all")
+    # Posición → máscara de "" (sólo columnas object/string pueden traerlos)
+    empty = {}
+    for i, dtype in enumerate(df.dtypes):
+        if dtype == object or isinstance(dtype, pd.StringDtype):
+            m = df.iloc[:, i].eq("").to_numpy(dtype=bool, na_value=False)
+            if m.any():
+                empty[i] = m
+
+    blank = np.ones(len(df), dtype=bool)
+    for c in campos_existentes:
+        blank &= (df[c].isna() | df[c].eq("")).to_numpy()
+    keep = np.flatnonzero(~blank)
+    df = df.take(keep)
+    for i, m in empty.items():
+        df.isetitem(i, df.iloc[:, i].mask(m[keep], pd.NA))
+    return df
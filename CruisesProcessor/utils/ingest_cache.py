@@ -0,0 +1,166 @@
+# CruisesProcessor/utils/ingest_cache.py
+"""
+Caché local de ingesta para los XLSX de cruceros.
+
+Guarda, por archivo, el DataFrame ya renombrado según schema
+(salida de read_metadata_and_input) en parquet y sus metadatos en JSON.
+La llave combina ruta, tamaño, mtime y hash del contenido, además de una
+huella de core.schema.COLUMNS: si cambian los aliases, el caché se invalida solo.
+"""
+from core.libs import pd, json, hashlib, os, time, datetime, Path
+from core.paths import TEMP_DIR
+from core.schema import COLUMNS
+
+INGEST_CACHE_DIR = TEMP_DIR / "ingest_cache"
+CACHE_VERSION = 1
+DEFAULT_MAX_AGE_DAYS = 30
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3  # 2 GB
+
+_SCHEMA_FINGERPRINT = hashlib.sha256(
+    json.dumps(COLUMNS, sort_keys=True, ensure_ascii=False).encode("utf-8")
+).hexdigest()[:16]
+
+
+def file_content_hash(path, chunk_size: int = 1 << 20) -> str:
+    """Hash BLAKE2b del contenido del archivo (lectura por bloques)."""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _encode_meta(value):
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    if isinstance(value, pd.Timestamp):
+        return {"__datetime__": value.to_pydatetime().isoformat()}
+    return str(value)
+
+
+def _decode_meta(obj):
+    if "__datetime__" in obj:
+        return datetime.fromisoformat(obj["__datetime__"])
+    return obj
+
+
+class IngestCache:
+    """
+    Caché de (df, meta) por archivo XLSX. Es picklable para poder usarse
+    dentro del pool de combine_files (--workers).
+
+    Args:
+        cache_dir: carpeta donde viven los .parquet / .json
+        refresh: si True, ignora lo guardado y vuelve a escribirlo (--refresh-cache)
+        max_age_days: entradas sin uso por más días se eliminan en evict()
+        max_bytes: tamaño máximo total; se eliminan primero las menos usadas
+    """
+
+    def __init__(self, cache_dir=INGEST_CACHE_DIR, refresh=False,
+                 max_age_days=DEFAULT_MAX_AGE_DAYS, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.refresh = refresh
+        self.max_age_days = max_age_days
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def available() -> bool:
+        """El caché requiere pyarrow para parquet."""
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def key_for(self, path) -> str:
+        path = Path(path)
+        st = path.stat()
+        parts = [
+            f"v{CACHE_VERSION}",
+            _SCHEMA_FINGERPRINT,
+            str(path.resolve()),
+            str(st.st_size),
+            str(st.st_mtime_ns),
+            file_content_hash(path),
+        ]
+        return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+
+    def _paths(self, key):
+        return self.cache_dir / f"{key}.parquet", self.cache_dir / f"{key}.json"
+
+    def get(self, path):
+        """Devuelve (df, meta) si hay entrada válida, o None."""
+        if self.refresh:
+            return None
+        try:
+            data_path, meta_path = self._paths(self.key_for(path))
+            if not (data_path.exists() and meta_path.exists()):
+                return None
+            df = pd.read_parquet(data_path)
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f, object_hook=_decode_meta)
+            # Marca de uso para la expulsión por antigüedad / LRU
+            now = time.time()
+            os.utime(data_path, (now, now))
+            os.utime(meta_path, (now, now))
+            return df, meta
+        except Exception:
+            return None
+
+    def put(self, path, df: pd.DataFrame, meta: dict) -> bool:
+        """Guarda (df, meta). Escritura atómica: tmp + os.replace."""
+        tmp_files = []
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            data_path, meta_path = self._paths(self.key_for(path))
+            tmp_data = data_path.with_name(f"{data_path.name}.{os.getpid()}.tmp")
+            tmp_meta = meta_path.with_name(f"{meta_path.name}.{os.getpid()}.tmp")
+            tmp_files = [tmp_data, tmp_meta]
+
+            df.to_parquet(tmp_data, index=False)
+            with open(tmp_meta, "w", encoding="utf-8") as f:
+                json.dump(meta, f, default=_encode_meta, ensure_ascii=False)
+
+            os.replace(tmp_data, data_path)
+            os.replace(tmp_meta, meta_path)
+            return True
+        except Exception as e:
+            print(f"⚠️  Caché no guardado para {Path(path).name}: {e}")
+            for tmp in tmp_files:
+                if tmp.exists():
+                    tmp.unlink()
+            return False
+
+    def evict(self) -> int:
+        """Elimina entradas viejas y, si se excede max_bytes, las menos usadas."""
+        if not self.cache_dir.exists():
+            return 0
+
+        entries = {}
+        for f in self.cache_dir.iterdir():
+            if f.suffix in (".parquet", ".json"):
+                st = f.stat()
+                last_used, size = entries.get(f.stem, (0, 0))
+                entries[f.stem] = (max(last_used, st.st_mtime), size + st.st_size)
+
+        cutoff = time.time() - self.max_age_days * 86400
+        removed = [key for key, (last_used, _) in entries.items() if last_used < cutoff]
+
+        remaining = sorted(
+            ((last_used, size, key) for key, (last_used, size) in entries.items() if key not in removed),
+            reverse=True,
+        )
+        total = 0
+        for last_used, size, key in remaining:
+            total += size
+            if total > self.max_bytes:
+                removed.append(key)
+
+        for key in removed:
+            for f in self._paths(key):
+                if f.exists():
+                    f.unlink()
+
+        if removed:
+            print(f"🧹 Caché de ingesta: {len(removed)} entradas expulsadas")
+        return len(removed)
@@ -1,5 +1,4 @@
 # utils/metadata_extractor.py
-from core.libs import load_workbook
 
 
 # define all your labels, in Spanish and English, normalized to lowercase without accents
@@ -21,50 +20,57 @@ LABELS = {
 
 print("📄 Extrayendo metadatos...")
 
-def extract_metadata_from_excel(path):
+
+# Helper to normalize cell text
+def norm(txt):
+    return str(txt).strip().lower().rstrip(":") if txt is not None else ""
+
+
+def scan_summary_rows(rows, max_label_col=None, lookahead=5):
     """
-    Returns a dict with keys: contract_code, farmer_name, cruise_date.
-    Scans the 'Summary' sheet for any of the LABELS, then walks
-    right from the label cell until it finds a non-empty value.
+    Busca las etiquetas de LABELS en una rejilla de valores (tuplas por fila,
+    como las devuelve ws.iter_rows(values_only=True)) y, para cada etiqueta,
+    camina a la derecha hasta `lookahead` columnas buscando un valor no vacío.
+    Solo se consideran etiquetas en las primeras `max_label_col` columnas.
     """
-    try:
-        wb = load_workbook(path, data_only=True)
-        # pick a sheet named "Summary" (any casing), or fall back to first sheet
-        summary = next((s for s in wb.sheetnames if s.lower()=="summary"), wb.sheetnames[0])
-        ws = wb[summary]
+    grid = [tuple(row) for row in rows]
 
-        metadata = {}
+    # Posiciones (fila, col) → texto normalizado, en orden de lectura
+    positions = {}
+    for r, row in enumerate(grid):
+        for c, value in enumerate(row[:max_label_col]):
+            txt = norm(value)
+            if txt:
+                positions[(r, c)] = txt
 
-        # Helper to normalize cell text
-        def norm(txt):
-            return str(txt).strip().lower().rstrip(":") if txt is not None else ""
+    metadata = {}
+    # For each metadata field, look for any of its labels
+    for field, candidates in LABELS.items():
+        for (r, c), cell_txt in positions.items():
+            if cell_txt in candidates:
+                # walk to the right until we find a real value
+                for offset in range(1, lookahead + 1):
+                    row = grid[r]
+                    val = row[c + offset] if c + offset < len(row) else None
+                    if val not in (None, "",):
+                        metadata[field] = val
+                        break
+                break
 
-        # Build a flat mapping of all cells (row, col) → normalized text
-        # so we can find label positions even if they’re merged
-        positions = {}
-        for row in ws.iter_rows():
-            for cell in row:
-                txt = norm(cell.value)
-                if txt:
-                    positions[(cell.row, cell.column)] = txt
+    return metadata
 
-        # For each metadata field, look for any of its labels
-        for field, candidates in LABELS.items():
-            if field in metadata:
-                continue
-            # scan every label possibility
-            for (r, c), cell_txt in positions.items():
-                if cell_txt in candidates:
-                    # walk to the right until we find a real value
-                    for offset in range(1, 6):  # look up to 5 cols over
-                        val = ws.cell(row=r, column=c+offset).value
-                        if val not in (None, "",):
-                            metadata[field] = val
-                            break
-                    break
 
-        return metadata
+def extract_metadata_from_excel(path):
+    """
+    Returns a dict with keys: contract_code, farmer_name, cruise_date.
+    Scans the label region of the 'Summary' sheet for any of the LABELS, then walks
+    right from the label cell until it finds a non-empty value.
+    """
+    from CruisesProcessor.utils.workbook_reader import CruiseWorkbook
 
+    try:
+        with CruiseWorkbook(path) as wb:
+            return wb.extract_metadata()
     except Exception as e:
         print(f"❌ Error extrayendo metadatos: {e}")
-        return {}
\ No newline at end of file
+        return {}
@@ -1,5 +1,32 @@
 #CruisesProcessor/OneDriver
-from core.libs import Path, ctypes, time
+"""
+Disponibilidad local de los XLSX antes de leerlos (OneDrive / montajes en la nube).
+
+Backends (--availability-backend, o la variable CRUISES_AVAILABILITY_BACKEND):
+- windows  atributo RECALL_ON_DATA_ACCESS + lectura, con Excel (COM) como último recurso
+- posix    stat: existe, es archivo y tiene tamaño > 0
+- rclone   montajes FUSE (rclone, onedriver): stat + lectura de la cabecera del
+           archivo, que obliga al montaje a bajar el contenido
+- none     no verifica nada (la lectura falla sola si el archivo no está)
+- auto     windows en Windows; rclone si el archivo vive en un montaje FUSE; si no posix
+
+preflight_files revisa todo el lote antes de empezar a leer (en hilos, salvo
+windows que usa COM y va en serie), así los archivos que no están no pasan por
+los reintentos con sleep de read_metadata_and_input.
+"""
+from core.libs import Path, ctypes, time, os, sleep, lru_cache, ThreadPoolExecutor
+
+AVAILABILITY_BACKENDS = ("auto", "windows", "posix", "rclone", "none")
+BACKEND_ENV = "CRUISES_AVAILABILITY_BACKEND"  # la heredan los procesos de --workers
+
+PREFLIGHT_THREADS = 16
+PREFLIGHT_RETRIES = 2
+PREFLIGHT_DELAY = 5  # segundos entre pasadas sobre los que faltan
+
+# Cabecera zip de .xlsx/.xlsm: si la lectura devuelve esto, el contenido ya bajó
+_ZIP_MAGIC = b"PK\x03\x04"
+_FUSE_CLOUD_FS = ("fuse.rclone", "fuse.onedriver", "fuse.onedrive", "rclone")
+
 
 def force_open_excel(path):
     try:
@@ -19,26 +46,147 @@ def force_open_excel(path):
         return False
 
 
-def force_download(path: Path) -> bool:
-    """
-    Intenta forzar la descarga de un archivo desde OneDrive.
-    Devuelve True si el archivo está disponible localmente.
-    """
+# ───── Backends ─────
+def _is_local_file(path: Path) -> bool:
+    try:
+        st = path.stat()
+    except OSError:
+        return False
+    return path.is_file() and st.st_size > 0
+
+
+def check_windows(path: Path) -> bool:
+    """Fuerza la descarga de OneDrive (Files On-Demand) y, si sigue sin estar, abre con Excel."""
+    FILE_ATTRIBUTE_RECALL_ON_DATA_ACCESS = 0x00400000
+    attrs = ctypes.windll.kernel32.GetFileAttributesW(str(path))
+    if attrs & FILE_ATTRIBUTE_RECALL_ON_DATA_ACCESS:
+        # Intentamos leer para forzar la descarga
+        with open(path, "rb"):
+            pass
+
+    if _is_local_file(path):
+        return True
+
+    # Último recurso: abrir con Excel si todavía no está local
+    print(f"🟡 Intentando forzar descarga con Excel: {path.name}")
+    return force_open_excel(path)
+
+
+def check_posix(path: Path) -> bool:
+    return _is_local_file(path)
+
+
+def check_rclone(path: Path) -> bool:
+    """stat + lectura de la cabecera: el montaje (VFS) descarga el archivo al leerlo."""
+    if not _is_local_file(path):
+        return False
+    with open(path, "rb") as f:
+        head = f.read(len(_ZIP_MAGIC))
+    if path.suffix.lower() in (".xlsx", ".xlsm"):
+        return head == _ZIP_MAGIC
+    return len(head) > 0
+
+
+def check_none(path: Path) -> bool:
+    return True
+
+
+_CHECKS = {"windows": check_windows, "posix": check_posix, "rclone": check_rclone, "none": check_none}
+
+
+@lru_cache(maxsize=1)
+def _mount_table() -> tuple[tuple[str, str], ...]:
+    """(punto de montaje, fstype) de /proc/self/mounts, el más largo primero."""
+    mounts = []
     try:
-        FILE_ATTRIBUTE_RECALL_ON_DATA_ACCESS = 0x00400000
-        attrs = ctypes.windll.kernel32.GetFileAttributesW(str(path))
-        if attrs & FILE_ATTRIBUTE_RECALL_ON_DATA_ACCESS:
-            # Intentamos leer para forzar la descarga
-            with open(path, "rb"):
-                pass
+        with open("/proc/self/mounts", encoding="utf-8") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 3:
+                    mounts.append((parts[1].replace("\\040", " "), parts[2]))
+    except OSError:
+        return ()
+    return tuple(sorted(mounts, key=lambda m: len(m[0]), reverse=True))
+
+
+def mount_fstype(path: Path) -> str | None:
+    """fstype del montaje que contiene `path` (None fuera de Linux)."""
+    target = os.path.abspath(path)
+    for point, fstype in _mount_table():
+        if target == point or target.startswith(point.rstrip("/") + "/"):
+            return fstype
+    return None
 
-        if path.exists() and path.stat().st_size > 0:
-            return True
 
-        # Último recurso: abrir con Excel si todavía no está local
-        print(f"🟡 Intentando forzar descarga con Excel: {path.name}")
-        return force_open_excel(path)
+def resolve_backend(path: Path, backend: str | None = None) -> str:
+    """Backend efectivo para `path` ('auto' → windows / rclone / posix)."""
+    backend = backend or get_availability_backend()
+    if backend != "auto":
+        return backend
+    if os.name == "nt":
+        return "windows"
+    fstype = mount_fstype(path) or ""
+    return "rclone" if fstype in _FUSE_CLOUD_FS or fstype.startswith("fuse") else "posix"
 
+
+def get_availability_backend() -> str:
+    return os.environ.get(BACKEND_ENV, "auto")
+
+
+def set_availability_backend(backend: str) -> None:
+    """Fija el backend para este proceso y los que lance (pool de --workers)."""
+    if backend not in AVAILABILITY_BACKENDS:
+        raise ValueError(f"❌ Backend '{backend}' no soportado. Opciones: {AVAILABILITY_BACKENDS}")
+    os.environ[BACKEND_ENV] = backend
+
+
+def force_download(path: Path, backend: str | None = None) -> bool:
+    """
+    Intenta forzar la descarga de un archivo desde OneDrive / el montaje en la nube.
+    Devuelve True si el archivo está disponible localmente.
+    """
+    path = Path(path)
+    try:
+        return _CHECKS[resolve_backend(path, backend)](path)
     except Exception as e:
         print(f"⚠️ No se pudo forzar descarga de: {path.name} → {e}")
         return False
+
+
+# ───── Pre-flight del lote ─────
+def preflight_files(files, backend: str | None = None, threads: int = PREFLIGHT_THREADS,
+                    retries: int = PREFLIGHT_RETRIES, delay: float = PREFLIGHT_DELAY):
+    """
+    Revisa todos los archivos y devuelve (disponibles, faltantes), ambos en el
+    orden original. Los faltantes se reintentan juntos `retries` veces con una
+    sola espera por pasada.
+
+    posix / rclone / none van en hilos (es I/O). windows va en serie en el hilo
+    que llama: el respaldo con Excel usa COM, que no está inicializado en los
+    hilos del pool y abriría un Excel por archivo.
+    """
+    files = list(files)
+    if not files:
+        return [], []
+
+    def check(f):
+        return force_download(Path(f), backend)
+
+    serial = {f for f in files if resolve_backend(Path(f), backend) == "windows"}
+    status = {}
+    pending = files
+    with ThreadPoolExecutor(max_workers=max(1, min(threads, len(files)))) as pool:
+        for attempt in range(retries + 1):
+            if attempt:
+                print(f"🔁 Pre-flight {attempt}/{retries}: {len(pending)} archivos aún no disponibles…")
+                sleep(delay)
+            threaded = [f for f in pending if f not in serial]
+            status.update(zip(threaded, pool.map(check, threaded)))
+            status.update((f, check(f)) for f in pending if f in serial)
+            pending = [f for f in pending if not status[f]]
+            if not pending:
+                break
+
+    available = [f for f in files if status[f]]
+    missing = [f for f in files if not status[f]]
+    return available, missing
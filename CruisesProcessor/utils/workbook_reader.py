@@ -0,0 +1,86 @@
+# CruisesProcessor/utils/workbook_reader.py
+from core.libs import pd, load_workbook, Path
+
+# Hojas de captura en orden de preferencia (comparación en minúsculas)
+PREFERRED_INPUT_SHEETS = ["input (2)", "input", "datainput", "Sheet1"]
+
+# Región de la hoja Summary donde viven las etiquetas de LABELS.
+# El valor puede estar hasta SUMMARY_VALUE_LOOKAHEAD columnas a la derecha.
+SUMMARY_SCAN_ROWS = 60
+SUMMARY_SCAN_COLS = 20
+SUMMARY_VALUE_LOOKAHEAD = 5
+
+
+class CruiseWorkbook:
+    """
+    Abre un XLSX de crucero UNA sola vez (openpyxl read-only) y expone:
+     - sheet_names / resolve_input_sheet(): hoja de captura preferida
+     - read_sheet(): DataFrame vía pandas reutilizando el mismo workbook
+     - extract_metadata(): contract_code, farmer_name, cruise_date desde Summary
+
+    Uso:
+        with CruiseWorkbook(path) as wb:
+            df = wb.read_sheet(wb.resolve_input_sheet(), dtype=str, na_filter=False)
+            meta = wb.extract_metadata()
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        # Mismos flags que usa pandas internamente → mismo resultado que pd.read_excel(path)
+        self.book = load_workbook(self.path, read_only=True, data_only=True, keep_links=False)
+        self._xls = pd.ExcelFile(self.book, engine="openpyxl")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        # Cierra el ExcelFile y, con él, el workbook read-only (libera el archivo)
+        self._xls.close()
+
+    @property
+    def sheet_names(self) -> list[str]:
+        return self.book.sheetnames
+
+    def resolve_input_sheet(self, preferred=None) -> str:
+        """Devuelve la hoja de captura preferida, o la primera hoja si no hay ninguna."""
+        for pref in preferred or PREFERRED_INPUT_SHEETS:
+            matches = [s for s in self.sheet_names if s.lower().strip() == pref]
+            if matches:
+                return matches[0]
+        return self.sheet_names[0]
+
+    def read_sheet(self, sheet_name, **kwargs) -> pd.DataFrame:
+        """pd.read_excel sobre el workbook ya abierto (no vuelve a parsear el ZIP)."""
+        return pd.read_excel(self._xls, sheet_name=sheet_name, **kwargs)
+
+    def header_row(self, sheet_name) -> list[str]:
+        """Sólo la primera fila de la hoja, con los mismos nombres que pondría pandas."""
+        first = next(self.book[sheet_name].iter_rows(min_row=1, max_row=1, values_only=True), ())
+        header = list(first)
+        while header and header[-1] is None:  # celdas vacías al final no son columnas
+            header.pop()
+        return [f"Unnamed: {i}" if v is None else str(v) for i, v in enumerate(header)]
+
+    def summary_sheet(self):
+        # pick a sheet named "Summary" (any casing), or fall back to first sheet
+        name = next((s for s in self.sheet_names if s.lower() == "summary"), self.sheet_names[0])
+        return self.book[name]
+
+    def extract_metadata(self) -> dict:
+        """Metadatos de la hoja Summary, leyendo solo la región acotada de etiquetas."""
+        from CruisesProcessor.utils.metadata_extractor import scan_summary_rows
+
+        try:
+            rows = self.summary_sheet().iter_rows(
+                min_row=1,
+                max_row=SUMMARY_SCAN_ROWS,
+                max_col=SUMMARY_SCAN_COLS + SUMMARY_VALUE_LOOKAHEAD,
+                values_only=True,
+            )
+            return scan_summary_rows(rows, max_label_col=SUMMARY_SCAN_COLS, lookahead=SUMMARY_VALUE_LOOKAHEAD)
+        except Exception as e:
+            print(f"❌ Error extrayendo metadatos: {e}")
+            return {}
@@ -3,9 +3,10 @@ from core.schema import (
     COLUMNS,
 )
 from core.schema_helpers import rename_columns_using_schema, clean_column_name, get_column as get_column
-from core.libs import pd, warnings, Path, os, tqdm, traceback, sleep
+from core.libs import pd, warnings, Path, os, tqdm, traceback, sleep, deque, islice, ProcessPoolExecutor
 
-from CruisesProcessor.utils.metadata_extractor import extract_metadata_from_excel
+from CruisesProcessor.utils.workbook_reader import CruiseWorkbook
+from CruisesProcessor.utils.ingest_cache import IngestCache
 from CruisesProcessor.utils.onedriver import force_download
 from CruisesProcessor.general_importer import cast_dataframe
 
@@ -30,6 +31,9 @@ warnings.filterwarnings(
 )
 
 
+# Columnas lógicas sin las cuales un archivo se descarta (load_cruise_file, validate)
+REQUIRED_INPUT_COLUMNS = ("tree_number", "status")
+
 
 def read_metadata_and_input(file_path: str) -> tuple[pd.DataFrame | None, dict]:
     """
@@ -61,21 +65,11 @@ def read_metadata_and_input(file_path: str) -> tuple[pd.DataFrame | None, dict]:
             print(f"⛔ No se pudo acceder a: {file_path} tras {max_retries} intentos")
             return None, {}
 
-        # Proceder con la lectura
-        xls = pd.ExcelFile(file_path)
-        raw_sheets = xls.sheet_names
-
-        preferred_sheets = ["input (2)", "input", "datainput", "Sheet1"]
-        target = None
-        for pref in preferred_sheets:
-            matches = [s for s in raw_sheets if s.lower().strip() == pref]
-            if matches:
-                target = matches[0]
-                break
-        if not target:
-            target = raw_sheets[0]
-
-        df = pd.read_excel(xls, sheet_name=target, dtype=str, na_filter=False)
+        # Proceder con la lectura: un solo load del workbook para Input + Summary
+        with CruiseWorkbook(path) as wb:
+            target = wb.resolve_input_sheet()
+            df = wb.read_sheet(target, dtype=str, na_filter=False)
+            meta = wb.extract_metadata()
 
         # 1️⃣  Normaliza dtypes (solo una vez)
         df = cast_dataframe(df)
@@ -106,7 +100,7 @@ def read_metadata_and_input(file_path: str) -> tuple[pd.DataFrame | None, dict]:
         #print(">>> Columnas DESPUÉS de quitar cat_*_id viejas:", df.columns.tolist())
 
         # 5️⃣ Devolver el DataFrame listo para pasar a normalize_catalogs
-        meta = extract_metadata_from_excel(file_path) or {}
+        meta = meta or {}
         meta["sheet_used"] = target  # ← esto es clave
         return df, meta
 
@@ -115,19 +109,212 @@ def read_metadata_and_input(file_path: str) -> tuple[pd.DataFrame | None, dict]:
         traceback.print_exc()
         return None, {}
 
-def combine_files(explicit_files=None, base_path=None, filter_func=None):
+def load_cruise_file(path: Path, cache: IngestCache | None = None) -> tuple[pd.DataFrame | None, dict, str | None]:
+    """
+    Lee un solo archivo de crucero y lo deja listo para concatenar.
+    Si se pasa `cache`, reutiliza el df/meta guardado cuando el archivo no cambió.
+
+    Se ejecuta tanto en modo secuencial como dentro del pool de procesos
+    (--workers N), por eso nunca lanza excepciones: devuelve (df, meta, aviso).
+    - df None + aviso None → archivo omitido en silencio (no disponible en la nube)
+    - df None + aviso      → archivo descartado; el aviso se imprime en el proceso padre
+    """
+    path = Path(path)
+    file = path.name
+
+    # ⬇️ Verifica y descarga si está en la nube
+    if not force_download(path):
+        return None, {}, None  # Silencioso
+
+    try:
+        # Leer archivo y metadatos (o recuperarlos del caché de ingesta)
+        cached = cache.get(path) if cache else None
+        if cached is not None:
+            df, meta = cached
+        else:
+            df, meta = read_metadata_and_input(path)
+            if cache and df is not None and not df.empty:
+                cache.put(path, df, meta)
+
+        if df is None:
+            return None, meta, f"   ⚠️  Archivo no procesado: {file}"
+
+        if df.empty:
+            return None, meta, f"   ⚠️  Archivo vacío: {file}"
+
+        df = rename_columns_using_schema(df)
+
+        # Validación básica de columnas - PASAR df
+        required_cols = [get_column(c, df) for c in REQUIRED_INPUT_COLUMNS]
+        missing = [c for c in required_cols if c not in df.columns]
+        if missing:
+            return None, meta, f"   ❌ Faltan columnas clave: {', '.join(missing)}"
+
+        # Limpieza inicial
+        df = df.dropna(subset=required_cols, how="all")
+        df = df.reset_index(drop=True)
+
+        # Añadir metadatos
+        df["contractcode"] = meta.get("contract_code", "DESCONOCIDO")
+        df["farmername"] = meta.get("farmer_name", "SIN_NOMBRE")
+        df["cruisedate"] = meta.get("cruise_date", pd.NaT)
+
+        return df, meta, None
+
+    except Exception as e:
+        return None, {}, f"   🔥 Error crítico en {file}: {str(e)}"
+
+
+def iter_loaded_files(all_files: list[Path], workers: int = 1, cache: IngestCache | None = None):
+    """
+    Genera (path, (df, meta, aviso)) en el MISMO orden que all_files.
+
+    Con workers > 1 usa un ProcessPoolExecutor, pero solo mantiene en vuelo
+    una ventana de workers * 2 archivos: cada resultado se entrega en cuanto
+    llega su turno y se libera, en lugar de acumular todos los futures.
+    """
+    if workers <= 1:
+        for path in all_files:
+            yield path, load_cruise_file(path, cache)
+        return
+
+    files_iter = iter(all_files)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque(
+            (path, executor.submit(load_cruise_file, path, cache))
+            for path in islice(files_iter, workers * 2)
+        )
+        while pending:
+            path, future = pending.popleft()
+            result = future.result()
+
+            next_path = next(files_iter, None)
+            if next_path is not None:
+                pending.append((next_path, executor.submit(load_cruise_file, next_path, cache)))
+
+            yield path, result
+
+
+def source_entry(path: Path, df: pd.DataFrame, meta: dict) -> dict:
+    """Archivo → contrato / filas (para el manifiesto incremental)."""
+    return {"path": str(path), "contract_code": meta.get("contract_code"), "rows": len(df)}
+
+
+def iter_cruise_frames(all_files: list[Path], workers: int = 1, cache: IngestCache | None = None, filter_func=None):
+    """
+    Genera (path, df, meta) de cada archivo utilizable, en orden, con barra de progreso.
+    Los avisos de archivos descartados o filtrados se imprimen aquí.
+    """
+    loaded = iter_loaded_files(all_files, workers, cache)
+    for path, (df, meta, warning) in tqdm(loaded, total=len(all_files), unit="archivo"):
+        if df is None:
+            if warning:
+                print(warning)
+            continue
+
+        # Filtrado por metadatos
+        if filter_func and not filter_func(meta):
+            print(f"   🚫 Filtrado por códigos: {path.name}")
+            continue
+
+        yield path, df, meta
+
+
+def contract_prefix(path) -> str:
+    """Código de contrato según el nombre del archivo (CR0123_xxx.xlsx → CR0123)."""
+    return Path(path).name.split("_")[0]
+
+
+def read_contract_code(path) -> str | None:
+    """Sólo el contract_code de la hoja Summary (read-only, región acotada); None si no se puede leer."""
+    try:
+        if not force_download(Path(path)):
+            return None
+        with CruiseWorkbook(path) as wb:
+            # Mismo default que load_cruise_file
+            return wb.extract_metadata().get("contract_code", "DESCONOCIDO")
+    except Exception:
+        return None
+
+
+def contract_sort_keys(all_files: list[Path], workers: int = 1) -> dict:
+    """
+    Primera pasada de --chunked: contrato de cada archivo según sus metadatos
+    (el mismo que load_cruise_file pone en contractcode). Si no se puede leer,
+    el prefijo del nombre.
+    """
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            codes = list(executor.map(read_contract_code, all_files, chunksize=8))
+    else:
+        codes = [read_contract_code(path) for path in all_files]
+    return {
+        path: str(code) if code is not None else contract_prefix(path)
+        for path, code in zip(all_files, codes)
+    }
+
+
+def iter_contract_frames(explicit_files, workers=1, cache=None, filter_func=None):
+    """
+    Modo --chunked: genera un DataFrame por contrato en vez de concatenar todo el lote.
+
+    Una primera pasada lee sólo el contract_code de la hoja Summary de cada archivo
+    y los archivos se ordenan (estable) por ese código, así los de un mismo contrato
+    quedan juntos aunque el prefijo del nombre no coincida; se acumulan hasta que
+    cambia el contractcode leído. En df.attrs["source_files"] va la lista de
+    archivos del contrato, como en combine_files. Sólo un contrato vive en memoria
+    a la vez (más los que estén en vuelo en el pool con workers > 1).
+    """
+    all_files = [Path(f) for f in explicit_files]
+    if not all_files:
+        print("❌ No hay archivos para procesar")
+        return
+
+    workers = max(1, min(int(workers or 1), len(all_files)))
+    keys = contract_sort_keys(all_files, workers)
+    all_files = sorted(all_files, key=keys.get)
+    buffer, sources, current, flushed = [], [], None, set()
+
+    def flush():
+        chunk = pd.concat(buffer, ignore_index=True) if len(buffer) > 1 else buffer[0]
+        chunk.attrs["source_files"] = list(sources)
+        flushed.add(current)
+        return chunk
+
+    for path, df, meta in iter_cruise_frames(all_files, workers, cache, filter_func):
+        code = df["contractcode"].iat[0] if len(df) else None
+        if buffer and code != current:
+            yield flush()
+            buffer, sources = [], []
+        if code in flushed:
+            print(f"⚠️  {path.name}: el contrato {code} ya se guardó en otro bloque (metadatos distintos en la 1a pasada)")
+        current = code
+        buffer.append(df)
+        sources.append(source_entry(path, df, meta))
+
+    if buffer:
+        yield flush()
+    if cache:
+        cache.evict()
+
+
+def combine_files(explicit_files=None, base_path=None, filter_func=None, workers=1, cache=None):
     """Combina archivos XLSX de inventario forestal.
 
     Args:
         base_path (str/Path): Ruta base (se ignora si explicit_files está presente)
         filter_func (callable, optional): Función para filtrar metadatos
         explicit_files (list, optional): Lista explícita de paths de archivos a procesar
+        workers (int, optional): Procesos para leer archivos en paralelo (1 = secuencial)
+        cache (IngestCache, optional): Caché de ingesta por hash de contenido
 
     Returns:
-        pd.DataFrame: DataFrame combinado
+        pd.DataFrame: DataFrame combinado. En df.attrs["source_files"] queda
+        la lista de archivos leídos con su contrato y número de filas.
     """
 
     df_list = []
+    source_files = []  # archivo → contrato / filas (para el manifiesto incremental)
     all_files = []
 
     # Priorizar archivos explícitos si existen
@@ -153,63 +340,28 @@ def combine_files(explicit_files=None, base_path=None, filter_func=None):
         print("❌ No hay archivos para procesar")
         return pd.DataFrame()
 
-    print("⚙️ Iniciando procesamiento de archivos...")
-    for path in tqdm(all_files, unit="archivo"):
-        # ⬇️ Verifica y descarga si está en la nube
-        if not force_download(path):
-            continue  # Silencioso
-
-        file = path.name
-        try:
-            # Leer archivo y metadatos
-            df, meta = read_metadata_and_input(path)
-
-            if df is None:
-                print(f"   ⚠️  Archivo no procesado: {file}")
-                continue
+    workers = max(1, min(int(workers or 1), len(all_files)))
+    if workers > 1:
+        print(f"⚙️ Iniciando procesamiento de archivos con {workers} procesos...")
+    else:
+        print("⚙️ Iniciando procesamiento de archivos...")
 
-            if df.empty:
-                print(f"   ⚠️  Archivo vacío: {file}")
-                continue
+    for path, df, meta in iter_cruise_frames(all_files, workers, cache, filter_func):
+        df_list.append(df)
+        source_files.append(source_entry(path, df, meta))
+        #print(f"   ✅ Procesado exitoso: {len(df)} filas")
 
-            # En xlsx_read_and_merge.py línea ~175
-            df = rename_columns_using_schema(df)
-
-            # Validación básica de columnas - PASAR df
-            required_cols = [get_column("tree_number", df), get_column("status", df)]
-            missing = [c for c in required_cols if c not in df.columns]
-            if missing:
-                print(f"   ❌ Faltan columnas clave: {', '.join(missing)}")
-                continue
-
-            # Filtrado por metadatos
-            if filter_func and not filter_func(meta):
-                print(f"   🚫 Filtrado por códigos: {file}")
-                continue
-
-            # Limpieza inicial
-            df = df.dropna(subset=required_cols, how="all")
-            df = df.reset_index(drop=True)
-
-            # Añadir metadatos
-            df["contractcode"] = meta.get("contract_code", "DESCONOCIDO")
-            df["farmername"] = meta.get("farmer_name", "SIN_NOMBRE")
-            df["cruisedate"] = meta.get("cruise_date", pd.NaT)
-
-            df_list.append(df)
-            #print(f"   ✅ Procesado exitoso: {len(df)} filas")
-
-        except Exception as e:
-            print(f"   🔥 Error crítico en {file}: {str(e)}")
-            continue
+    if cache:
+        cache.evict()
 
     if not df_list:
         print("❌ Ningún archivo pudo ser procesado")
         return pd.DataFrame()
 
     combined = pd.concat(df_list, ignore_index=True)
+    combined.attrs["source_files"] = source_files
     print("\n📊 Combinación finalizada")
     print(f"🌳 Total de árboles procesados: {len(combined):,}")
     #print(f"📅 Rango de fechas: {combined['cruisedate'].min()} a {combined['cruisedate'].max()}")
 
-    return combined
\ No newline at end of file
+    return combined
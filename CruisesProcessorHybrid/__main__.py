@@ -29,6 +29,9 @@ import json
 from datetime import datetime
 from typing import Dict, List, Tuple, Optional
 
+from CruisesProcessor.utils.workbook_reader import CruiseWorkbook
+from core.doyle_calculator import basal_area, FORM_FACTOR
+
 warnings.filterwarnings('ignore', category=UserWarning, module='openpyxl')
 
 # ============================================================================
@@ -112,10 +115,12 @@ def extract_contract_from_filename(filename: str) -> str:
     return Path(filename).stem
 
 
-def read_input_sheet(file_path: Path, sheet_name: str) -> Optional[pd.DataFrame]:
-    """Lee una hoja Input o Input(2)"""
+def read_input_sheet(workbook: CruiseWorkbook, sheet_name: str) -> Optional[pd.DataFrame]:
+    """Lee una hoja Input o Input(2) del workbook ya abierto"""
+    if sheet_name not in workbook.sheet_names:
+        return None
     try:
-        df = pd.read_excel(file_path, sheet_name=sheet_name, header=0)
+        df = workbook.read_sheet(sheet_name, header=0)
         df = df.dropna(how='all').dropna(axis=1, how='all')
         return df if not df.empty else None
     except:
@@ -126,14 +131,21 @@ def get_best_sheet(file_path: Path) -> Tuple[Optional[pd.DataFrame], Optional[st
     """
     Retorna el mejor sheet disponible.
     Priority: Input (2) > Input
+    El archivo se abre una sola vez para ambas hojas.
     """
-    df_input2 = read_input_sheet(file_path, "Input (2)")
-    if df_input2 is not None:
-        return df_input2, "Input (2)"
+    try:
+        workbook = CruiseWorkbook(file_path)
+    except:
+        return None, None
+
+    with workbook:
+        df_input2 = read_input_sheet(workbook, "Input (2)")
+        if df_input2 is not None:
+            return df_input2, "Input (2)"
 
-    df_input = read_input_sheet(file_path, "Input")
-    if df_input is not None:
-        return df_input, "Input"
+        df_input = read_input_sheet(workbook, "Input")
+        if df_input is not None:
+            return df_input, "Input"
 
     return None, None
 
@@ -300,11 +312,11 @@ def compute_inventory_metrics(df: pd.DataFrame) -> pd.DataFrame:
 
     # Basal area (m²) from DBH (cm)
     if 'dbh' in df.columns and 'basal_area' not in df.columns:
-        df['basal_area'] = np.pi * (df['dbh'] / 200) ** 2
+        df['basal_area'] = basal_area(df['dbh'], unit="cm")
 
-    # Volume estimation (simplified - replace with actual formula)
+    # Volume estimation: basal area × height × form factor (core.doyle_calculator)
     if 'volume' not in df.columns and 'dbh' in df.columns and 'tht' in df.columns:
-        df['volume'] = df['basal_area'] * df['tht'] * 0.5  # Form factor approximation
+        df['volume'] = df['basal_area'] * df['tht'] * FORM_FACTOR
 
     print(f"   ✅ Computed metrics for {len(df):,} records")
 
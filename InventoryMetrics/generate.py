@@ -2,47 +2,55 @@
 """
 ✅ SAFE VERSION: Usa to_sql_with_backup en lugar de to_sql directo
 Ya tenía backup_table(), ahora usa el wrapper completo
+
+--incremental: sólo recalcula los contratos cuya firma cambió (filas, cruisedate
+máxima, hash de filas; ver metrics_state) y hace upsert por pkid, sin backup ni
+reemplazo de la tabla completa.
 """
 
 from tqdm import tqdm
 from InventoryMetrics.processing_metrics import aggregate_contracts
+from InventoryMetrics.sql_metrics import aggregate_contracts_sql
 from InventoryMetrics.generate_helpers import safe_numeric
 from InventoryMetrics.inventory_retriever import get_inventory_tables, get_cruise_date
-from InventoryMetrics.generate_helpers import clean_and_fuse_metrics
+from InventoryMetrics.generate_helpers import clean_and_fuse_metrics, collapse_to_pkid
 
-from core.libs import re, pd, text, argparse
+from core.libs import re, pd, text, argparse, inspect
 from core.db import get_engine
 from core.schema_helpers import get_column
 from core.safe_ops import to_sql_with_backup  # ✅ NUEVO: Reemplaza to_sql normal
 
 from InventoryMetrics.generate_helpers import create_cat_inventory_tables
 from InventoryMetrics.inventory_retriever import get_inventory_tables
-from InventoryMetrics.planting_times import pretty_tree_age
+from InventoryMetrics.planting_times import tree_age_text
+from InventoryMetrics.metrics_state import (
+    METRICS_TABLE, table_country_year, sql_in_list, contract_signatures, diff_signatures,
+    load_state, record_state, upsert_metrics, delete_metrics,
+)
 
 
-def main(where="1=1"):
-    print("📊 Generando métricas de inventario...")
-    engine = get_engine()
-    tables = get_inventory_tables(engine)
-    create_cat_inventory_tables(engine, tables)
-
-    all_dfs = []
-    for table in tqdm(tables, desc="Procesando tablas"):
-        df = pd.read_sql(f"SELECT * FROM public.{table} WHERE {where}", engine)
-        m = re.match(r"inventory_([a-z]+)_(\d{4})", table)
-        country, year = m.groups()
-        year = int(year)
-        df_metrics = aggregate_contracts(
-            df,
-            engine,
-            country=country,
-            year=year,
-            include_all_contracts=True
-        )
-        all_dfs.append(df_metrics)
+def table_metrics(engine, table, where="1=1", aggregation="sql", schema="public"):
+    """Métricas por contrato de una tabla inventory_<country>_<year>."""
+    country, year = table_country_year(table)
+    if aggregation == "sql":
+        # Agregación en PostgreSQL: solo viaja una fila por contrato
+        return aggregate_contracts_sql(engine, table, country=country, year=year, schema=schema, where=where)
+    df = pd.read_sql(f"SELECT * FROM {schema}.{table} WHERE {where}", engine)
+    return aggregate_contracts(
+        df,
+        engine,
+        country=country,
+        year=year,
+        include_all_contracts=True
+    )
+
 
+def finalize_metrics(engine, all_dfs, metrics_schema="masterdatabase"):
+    """Fusiona las métricas de todas las tablas y agrega planting_year/date y tree_age."""
     df_full = pd.concat(all_dfs, ignore_index=True)
     df_final = clean_and_fuse_metrics(df_full)
+    # pkid es la llave de inventory_metrics (upsert de --incremental): una fila por contrato y año
+    df_final = collapse_to_pkid(df_final)
 
     # --- Añade el campo type_of_metric si no existe ---
     if "type_of_metric" not in df_final.columns:
@@ -53,7 +61,7 @@ def main(where="1=1"):
     # --- AQUÍ HACES EL MERGE Y CÁLCULO ---
     # Trae planting_year y planting_date
     contracts = pd.read_sql(
-        "SELECT contract_code, planting_year, planting_date FROM masterdatabase.contract_tree_information",
+        f"SELECT contract_code, planting_year, planting_date FROM {metrics_schema}.contract_tree_information",
         engine
     )
     df_final = df_final.merge(
@@ -63,11 +71,8 @@ def main(where="1=1"):
         right_on="contract_code"
     )
 
-    # Calcula tree_age usando pretty_tree_age
-    df_final["tree_age"] = [
-        pretty_tree_age(row["planting_date"], row["inventory_date"])
-        for _, row in df_final.iterrows()
-    ]
+    # Calcula tree_age (pretty_tree_age por columna)
+    df_final["tree_age"] = tree_age_text(df_final["planting_date"], df_final["inventory_date"])
     # --- FIN DEL CÁLCULO ---
 
     # ---- LIMPIEZA DE SUFIJOS (_x, _y) ----
@@ -83,6 +88,22 @@ def main(where="1=1"):
             if suffix in df_final.columns:
                 df_final.drop(suffix, axis=1, inplace=True)
     # ---- FIN LIMPIEZA DE SUFIJOS ----
+    return df_final
+
+
+def refresh_full(engine, tables, where="1=1", aggregation="sql",
+                 source_schema="public", metrics_schema="masterdatabase"):
+    """
+    Recalcula todos los contratos y reemplaza inventory_metrics (con backup).
+    Con un filtro --where la tabla queda parcial: se vacía el estado y la próxima
+    corrida --incremental recalcula todo.
+    """
+    create_cat_inventory_tables(engine, tables, schema=source_schema)
+    all_dfs = [
+        table_metrics(engine, table, where, aggregation, source_schema)
+        for table in tqdm(tables, desc="Procesando tablas")
+    ]
+    df_final = finalize_metrics(engine, all_dfs, metrics_schema)
 
     # ✅ CAMBIO CRÍTICO: Usa to_sql_with_backup en lugar de backup_table + to_sql
     # CÓDIGO ANTERIOR:
@@ -94,16 +115,88 @@ def main(where="1=1"):
     to_sql_with_backup(
         df_final,
         engine,
-        "inventory_metrics",
-        schema="masterdatabase",
+        METRICS_TABLE,
+        schema=metrics_schema,
         if_exists="replace",
         index=False
     )
-    print("✅ Métricas insertadas en masterdatabase.inventory_metrics")
+    print(f"✅ Métricas insertadas en {metrics_schema}.{METRICS_TABLE}")
+
+    # Firmas de partida para la próxima corrida --incremental (siempre de la tabla completa)
+    signatures = {}
+    if where.strip() == "1=1":
+        signatures = {t: contract_signatures(engine, t, source_schema) for t in tables}
+    record_state(engine, signatures, schema=metrics_schema, replace=True)
+    return {"contracts": len(df_final), "upserted": len(df_final), "deleted": 0}
+
+
+def refresh_incremental(engine, tables, where="1=1", aggregation="sql",
+                        source_schema="public", metrics_schema="masterdatabase"):
+    """
+    Recalcula sólo los contratos cuya firma (filas, cruisedate máxima, hash de
+    filas) cambió desde la última corrida y hace upsert por pkid. Las firmas son
+    siempre de la tabla completa; con un filtro --where sólo se recalcula la parte
+    filtrada de esos contratos, no se borra nada y el estado no se actualiza.
+    """
+    if not inspect(engine).has_table(METRICS_TABLE, schema=metrics_schema):
+        print(f"ℹ️  {metrics_schema}.{METRICS_TABLE} no existe: corrida completa")
+        return refresh_full(engine, tables, where, aggregation, source_schema, metrics_schema)
+
+    state = load_state(engine, schema=metrics_schema)
+    unfiltered = where.strip() == "1=1"
+
+    all_dfs, signatures, removed, touched = [], {}, {}, set()
+    for table in tqdm(tables, desc="Firmas por contrato"):
+        _, year = table_country_year(table)
+        current = contract_signatures(engine, table, source_schema)
+        changed, gone = diff_signatures(current, state[state["source_table"] == table])
+        signatures[table] = current[current["contract_code"].isin(changed)]
+        if unfiltered:
+            removed[table] = gone
+            touched.update(f"{c} {year}" for c in changed + gone)
+        if not changed:
+            continue
+
+        codes = f"contractcode IN ({sql_in_list(changed)})"
+        create_cat_inventory_tables(engine, [table], where=codes, schema=source_schema)
+        all_dfs.append(table_metrics(engine, table, f"({where}) AND {codes}", aggregation, source_schema))
+
+    # Tablas que ya no existen: sus contratos salen de las métricas
+    if unfiltered:
+        for table, group in state[~state["source_table"].isin(tables)].groupby("source_table"):
+            _, year = table_country_year(table)
+            removed[table] = group["contract_code"].tolist()
+            touched.update(f"{c} {year}" for c in removed[table])
+
+    n_changed = sum(len(s) for s in signatures.values())
+    print(f"🔄 Incremental: {n_changed} contratos nuevos o modificados, "
+          f"{sum(len(r) for r in removed.values())} eliminados")
+
+    df_final = finalize_metrics(engine, all_dfs, metrics_schema) if all_dfs else pd.DataFrame(columns=["pkid"])
+    upserted = upsert_metrics(engine, df_final, METRICS_TABLE, metrics_schema)
+    # Contratos que desaparecieron o que ya no dan métricas (sin filas válidas)
+    deleted = delete_metrics(engine, touched - set(df_final["pkid"]), METRICS_TABLE, metrics_schema)
+    print(f"✅ {upserted} filas upsert, {deleted} borradas en {metrics_schema}.{METRICS_TABLE}")
+
+    if unfiltered:
+        record_state(engine, signatures, removed, schema=metrics_schema)
+    return {"contracts": n_changed, "upserted": upserted, "deleted": deleted}
+
+
+def main(where="1=1", aggregation="sql", incremental=False):
+    print("📊 Generando métricas de inventario...")
+    engine = get_engine()
+    tables = get_inventory_tables(engine)
+    refresh = refresh_incremental if incremental else refresh_full
+    return refresh(engine, tables, where=where, aggregation=aggregation)
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument('--where', type=str, default="1=1", help="Filtro WHERE SQL, ej: \"region = 'Guatemala'\"")
+    parser.add_argument('--aggregation', choices=("sql", "pandas"), default="sql",
+                        help="sql: métricas agrupadas en PostgreSQL; pandas: SELECT * + aggregate_contracts")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Sólo recalcula los contratos que cambiaron desde la última corrida (upsert por pkid)")
     args = parser.parse_args()
-    main(where=args.where)
\ No newline at end of file
+    main(where=args.where, aggregation=args.aggregation, incremental=args.incremental)
\ No newline at end of file
@@ -8,7 +8,7 @@ def safe_numeric(series):
         return pd.Series([None] * len(series), index=series.index)
 
 
-def create_cat_inventory_tables(engine, tables: list[str], where: str = None):
+def create_cat_inventory_tables(engine, tables: list[str], where: str = None, schema: str = "public"):
     """
     Genera las tablas cat_inventory_<country>_<year> a partir de cada tabla inventory_<country>_<year>.
     Permite filtrar usando un WHERE SQL (por ejemplo, solo contratos de Guatemala).
@@ -23,7 +23,7 @@ def create_cat_inventory_tables(engine, tables: list[str], where: str = None):
         try:
             base_query = f"""
                 SELECT DISTINCT contractcode, cruisedate
-                FROM public.{table}
+                FROM {schema}.{table}
                 WHERE contractcode IS NOT NULL
             """
             # Si se pasa un filtro extra, agréguelo al WHERE (con AND)
@@ -51,16 +51,24 @@ def add_cruise_date_to_metrics(engine, df_metrics, country, year):
     # df_metrics['cruise_date'] = df_metrics['cruise_date_x'].combine_first(df_metrics['cruise_date_y'])
     return df_metrics
 
-def fuse_rows(group):
-    # Fusiona columna a columna: toma el primer valor no nulo (útil) de cada campo.
-    if len(group) == 1:
-        return group.iloc[0]
-    result = {}
-    for col in group.columns:
-        vals = group[col]
-        value = next((v for v in vals if pd.notnull(v) and v != ''), None)
-        result[col] = value
-    return pd.Series(result)
+def fuse_rows(df, keys):
+    """
+    Fusiona las filas con la misma llave columna a columna: el primer valor no
+    nulo y no vacío de cada campo ('' cuenta como nulo). Un solo replace +
+    groupby().first() en vez de recorrer grupos y valores en Python.
+    """
+    return df.replace("", pd.NA).groupby(keys, dropna=False, sort=True).first().reset_index()
+
+def collapse_to_pkid(df):
+    """
+    Una fila por pkid (contrato + año). Un crucero de varios días deja varias
+    cruisedate en cat_inventory y, con la misma métrica, varias filas por pkid:
+    se queda la de inventory_date más reciente, completada con los demás valores no nulos.
+    """
+    if not df["pkid"].duplicated().any():
+        return df
+    latest_first = df.sort_values("inventory_date", ascending=False, na_position="last", kind="stable")
+    return fuse_rows(latest_first, ["pkid"])[df.columns]
 
 def clean_and_fuse_metrics(df_full):
     """
@@ -79,16 +87,17 @@ def clean_and_fuse_metrics(df_full):
 
     # Llaves de unicidad (ajusta si tu lógica de pipeline lo requiere)
     keys = ["contract_code", "inventory_year", "inventory_date"]
-    df_final = df_full.groupby(keys, dropna=False).apply(fuse_rows).reset_index(drop=True)
+    df_final = fuse_rows(df_full, keys)
 
     # Calcula pkid si falta
     if "pkid" not in df_final.columns or df_final["pkid"].isnull().any():
         df_final["pkid"] = df_final["contract_code"].astype(str) + " " + df_final["inventory_year"].astype(str)
 
     # Recalcula progress
-    df_final["progress"] = df_final.apply(
-        lambda row: "OK" if pd.notnull(row.get("total_trees")) and pd.notnull(row.get("survival")) else "error", axis=1
-    )
+    ok = np.ones(len(df_final), dtype=bool)
+    for col in ("total_trees", "survival"):
+        ok &= df_final[col].notna().to_numpy() if col in df_final.columns else False
+    df_final["progress"] = np.where(ok, "OK", "error")
 
     # Normaliza y evita columnas duplicadas
     if 'planting_year_y' in df_final.columns:
@@ -0,0 +1,185 @@
+# InventoryMetrics/metrics_state.py
+"""
+Estado de masterdatabase.inventory_metrics para el modo --incremental.
+
+Por tabla inventory_<cc>_<yyyy> y contrato se guarda una firma: número de filas,
+cruisedate máxima y una suma de hashes de las filas (detecta correcciones que no
+cambian el conteo). En la siguiente corrida una sola consulta agrupada por tabla
+da las firmas actuales; sólo los contratos con firma distinta se recalculan y se
+hace upsert (ON CONFLICT (pkid)) en inventory_metrics, sin backup ni reescritura
+completa. Los contratos que ya no están en la tabla se borran de las métricas.
+"""
+from core.libs import pd, re, text, datetime
+from InventoryMetrics.sql_metrics import table_column_types
+
+STATE_SCHEMA = "masterdatabase"
+STATE_TABLE = "inventory_metrics_state"
+METRICS_TABLE = "inventory_metrics"
+
+SIGNATURE_COLUMNS = ["contract_code", "row_count", "max_cruisedate", "content_hash"]
+
+
+def table_country_year(table: str) -> tuple[str, int]:
+    country, year = re.match(r"inventory_([a-z]+)_(\d{4})", table).groups()
+    return country, int(year)
+
+
+def sql_in_list(values) -> str:
+    """Lista SQL de literales de texto ('a', 'b') con las comillas escapadas."""
+    return ", ".join("'" + str(v).replace("'", "''") + "'" for v in values)
+
+
+def ensure_state_table(engine, schema=STATE_SCHEMA):
+    with engine.begin() as conn:
+        conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {schema}"))
+        conn.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS {schema}.{STATE_TABLE} (
+                source_table   TEXT NOT NULL,
+                contract_code  TEXT NOT NULL,
+                row_count      BIGINT NOT NULL,
+                max_cruisedate TEXT,
+                content_hash   NUMERIC,
+                refreshed_at   TIMESTAMP NOT NULL DEFAULT now(),
+                PRIMARY KEY (source_table, contract_code)
+            )
+        """))
+
+
+def load_state(engine, schema=STATE_SCHEMA) -> pd.DataFrame:
+    ensure_state_table(engine, schema)
+    return pd.read_sql(
+        text(f"SELECT source_table, {', '.join(SIGNATURE_COLUMNS)} FROM {schema}.{STATE_TABLE}"),
+        engine,
+    )
+
+
+def contract_signatures(engine, table, schema="public", where="1=1") -> pd.DataFrame:
+    """Firma actual de cada contrato de la tabla: un solo GROUP BY en PostgreSQL."""
+    sql = f"""
+        SELECT t.contractcode::text AS contract_code,
+               count(*) AS row_count,
+               max(t.cruisedate)::text AS max_cruisedate,
+               sum(hashtext(t::text)::bigint) AS content_hash
+        FROM "{schema}"."{table}" AS t
+        WHERE t.contractcode IS NOT NULL AND ({where})
+        GROUP BY t.contractcode
+    """
+    sig = pd.read_sql(text(sql), engine)
+    sig["content_hash"] = sig["content_hash"].astype(str)
+    return sig[SIGNATURE_COLUMNS]
+
+
+def diff_signatures(current: pd.DataFrame, previous: pd.DataFrame) -> tuple[list[str], list[str]]:
+    """
+    (contratos nuevos o con firma distinta, contratos que ya no están), ordenados.
+    `previous` son las filas del estado de la misma tabla.
+    """
+    prev = previous[SIGNATURE_COLUMNS].astype(str)
+    merged = current[SIGNATURE_COLUMNS].astype(str).merge(
+        prev, on="contract_code", how="outer", suffixes=("", "_prev"), indicator=True
+    )
+    same = (merged["_merge"] == "both")
+    for col in SIGNATURE_COLUMNS[1:]:
+        same &= merged[col] == merged[f"{col}_prev"]
+    changed = merged.loc[(merged["_merge"] != "right_only") & ~same, "contract_code"]
+    removed = merged.loc[merged["_merge"] == "right_only", "contract_code"]
+    return sorted(changed), sorted(removed)
+
+
+def record_state(engine, signatures: dict, removed: dict = None, schema=STATE_SCHEMA, replace=False) -> None:
+    """
+    Upsert de las firmas {tabla: DataFrame} y borrado de {tabla: [contratos]}.
+    replace=True vacía antes el estado (después de una corrida completa).
+    """
+    rows = [
+        {"source_table": table, **rec, "refreshed_at": datetime.now()}
+        for table, sig in signatures.items()
+        for rec in sig[SIGNATURE_COLUMNS].to_dict("records")
+    ]
+    for row in rows:
+        row["row_count"] = int(row["row_count"])
+        row["content_hash"] = None if row["content_hash"] in (None, "None", "nan") else row["content_hash"]
+
+    ensure_state_table(engine, schema)
+    with engine.begin() as conn:
+        if replace:
+            conn.execute(text(f"DELETE FROM {schema}.{STATE_TABLE}"))
+        for table, codes in (removed or {}).items():
+            if codes:
+                conn.execute(
+                    text(f"DELETE FROM {schema}.{STATE_TABLE} "
+                         f"WHERE source_table = :table AND contract_code = ANY(:codes)"),
+                    {"table": table, "codes": list(codes)},
+                )
+        if rows:
+            conn.execute(text(f"""
+                INSERT INTO {schema}.{STATE_TABLE}
+                    (source_table, contract_code, row_count, max_cruisedate, content_hash, refreshed_at)
+                VALUES
+                    (:source_table, :contract_code, :row_count, :max_cruisedate, CAST(:content_hash AS NUMERIC), :refreshed_at)
+                ON CONFLICT (source_table, contract_code) DO UPDATE SET
+                    row_count      = EXCLUDED.row_count,
+                    max_cruisedate = EXCLUDED.max_cruisedate,
+                    content_hash   = EXCLUDED.content_hash,
+                    refreshed_at   = EXCLUDED.refreshed_at
+            """), rows)
+    print(f"📒 Estado de métricas actualizado: {len(rows)} contratos en {schema}.{STATE_TABLE}")
+
+
+def ensure_pkid_index(engine, table=METRICS_TABLE, schema=STATE_SCHEMA):
+    """Índice único sobre pkid (ON CONFLICT lo necesita; el replace completo lo borra)."""
+    with engine.begin() as conn:
+        dup = conn.execute(text(
+            f'SELECT count(*) FROM (SELECT pkid FROM {schema}."{table}" '
+            f"GROUP BY pkid HAVING count(*) > 1) d"
+        )).scalar()
+        if dup:
+            raise RuntimeError(
+                f"❌ {dup} pkid repetidos en {schema}.{table} (escrita por una versión anterior); "
+                f"corre una vez sin --incremental para reconstruirla"
+            )
+        conn.execute(text(
+            f'CREATE UNIQUE INDEX IF NOT EXISTS "{table}_pkid_key" ON {schema}."{table}" (pkid)'
+        ))
+
+
+def upsert_metrics(engine, df: pd.DataFrame, table=METRICS_TABLE, schema=STATE_SCHEMA) -> int:
+    """
+    INSERT ... ON CONFLICT (pkid) DO UPDATE de las filas de df (una por pkid,
+    ver generate_helpers.collapse_to_pkid). Sólo columnas que ya existen en la tabla.
+    """
+    if df.empty:
+        return 0
+    ensure_pkid_index(engine, table, schema)
+
+    target = table_column_types(engine, table, schema)
+    cols = [c for c in df.columns if c in target]
+    extra = [c for c in df.columns if c not in target]
+    if extra:
+        print(f"⚠️  Columnas que no existen en {schema}.{table} (se omiten): {extra}")
+
+    rows = df[cols].astype(object).where(df[cols].notna(), None).to_dict("records")
+
+    col_list = ", ".join(f'"{c}"' for c in cols)
+    values = ", ".join(f'CAST(:{c} AS {target[c]})' for c in cols)
+    updates = ",\n                ".join(f'"{c}" = EXCLUDED."{c}"' for c in cols if c != "pkid")
+    with engine.begin() as conn:
+        conn.execute(text(f"""
+            INSERT INTO {schema}."{table}" ({col_list})
+            VALUES ({values})
+            ON CONFLICT (pkid) DO UPDATE SET
+                {updates}
+        """), rows)
+    return len(rows)
+
+
+def delete_metrics(engine, pkids, table=METRICS_TABLE, schema=STATE_SCHEMA) -> int:
+    pkids = sorted(set(pkids))
+    if not pkids:
+        return 0
+    with engine.begin() as conn:
+        result = conn.execute(
+            text(f'DELETE FROM {schema}."{table}" WHERE pkid = ANY(:pkids)'),
+            {"pkids": pkids},
+        )
+    return result.rowcount
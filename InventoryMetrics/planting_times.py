@@ -1,7 +1,7 @@
 # InventoryMetrics/planting_times.py
 
 from core.db import get_engine
-from core.libs import pd, to_datetime, text
+from core.libs import pd, np, to_datetime, text, argparse
 
 def get_planting_info(engine, fields=("contract_code", "planting_year", "planting_date")):
     fields_sql = ", ".join(fields)
@@ -36,39 +36,79 @@ def pretty_tree_age(date1, date2):
     return f"{years} {months}/12"
 
 
-def update_tree_age_metrics(where="1=1"):
-    engine = get_engine()
+def _as_datetime(values) -> pd.Series:
+    """Fechas (date, str, datetime64) → Series datetime64; lo no convertible queda NaT."""
+    values = values if isinstance(values, pd.Series) else pd.Series(values)
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    return pd.to_datetime(values, errors="coerce", format="mixed")
+
+
+def months_between(date1, date2) -> pd.Series:
+    """
+    months_diff / pretty_tree_age por columna: meses de date1 a date2 sin redondear
+    (meses calendario + diferencia de días / 30.44); NaN si falta alguna fecha.
+    """
+    d1, d2 = _as_datetime(date1), _as_datetime(date2)
+    d2 = d2.set_axis(d1.index)
+    return ((d2.dt.year - d1.dt.year) * 12 + (d2.dt.month - d1.dt.month)
+            + (d2.dt.day - d1.dt.day) / 30.44)
+
+
+def tree_age_text(date1, date2) -> pd.Series:
+    """pretty_tree_age para columnas completas: 'año mes/12' o None, con el índice de date1."""
+    months_decimal = months_between(date1, date2).to_numpy(dtype=float)
+    valid = ~np.isnan(months_decimal)
+    years = np.floor_divide(months_decimal[valid], 12)
+    months = np.round(np.mod(months_decimal[valid], 12))
+    wrap = months == 12
+    years[wrap] += 1
+    months[wrap] = 0
+
+    out = np.full(len(months_decimal), None, dtype=object)
+    out[valid] = (pd.Series(years.astype(np.int64)).astype(str) + " "
+                  + pd.Series(months.astype(np.int64)).astype(str) + "/12").to_numpy()
+    index = date1.index if isinstance(date1, pd.Series) else None
+    return pd.Series(out, index=index, dtype=object)
+
+
+def update_tree_age_metrics(where="1=1", engine=None, schema="masterdatabase"):
+    engine = engine or get_engine()
     # 1. Traer planting_date por contrato con filtro dinámico
+    # (en text() ':x' es un bind parameter: se escapan los ':' literales del filtro, ej. '2020-01-01 00:00')
+    sql_where = where.replace(":", r"\:")
     contracts = pd.read_sql(
-        f"SELECT contract_code, planting_date FROM masterdatabase.contract_tree_information WHERE {where}", engine)
+        text(f"SELECT contract_code, planting_date FROM {schema}.contract_tree_information WHERE {sql_where}"), engine)
     contracts["planting_date"] = pd.to_datetime(contracts["planting_date"])
 
     # 2. Traer metrics con fechas SOLO para los contratos seleccionados
     # (opcional: podrías filtrar aquí también, pero basta con el merge)
     metrics = pd.read_sql(
-        "SELECT contract_code, inventory_date FROM masterdatabase.inventory_metrics", engine)
+        text(f"SELECT contract_code, inventory_date FROM {schema}.inventory_metrics"), engine)
     metrics["inventory_date"] = pd.to_datetime(metrics["inventory_date"])
 
     # 3. Merge y cálculo SOLO para los contratos filtrados
     merged = metrics.merge(contracts, how="inner", on="contract_code")
-    merged["tree_age"] = [
-        pretty_tree_age(row["planting_date"], row["inventory_date"])
-        for _, row in merged.iterrows()
-    ]
-
-    # 4. Actualiza tree_age solo para ese subconjunto
-    with engine.begin() as conn:
-        for _, row in merged.iterrows():
+    merged["tree_age"] = tree_age_text(merged["planting_date"], merged["inventory_date"])
+
+    # 4. Actualiza tree_age solo para ese subconjunto: un solo UPDATE ... FROM unnest(...)
+    #    (sin fecha de inventario no hay fila que igualar; si se repite la llave gana la última)
+    merged = merged[merged["inventory_date"].notna()].drop_duplicates(
+        ["contract_code", "inventory_date"], keep="last")
+    if not merged.empty:
+        with engine.begin() as conn:
             conn.execute(
                 text(
-                    "UPDATE masterdatabase.inventory_metrics "
-                    "SET tree_age = :tree_age "
-                    "WHERE contract_code = :contract_code AND inventory_date = :inventory_date"
+                    f"UPDATE {schema}.inventory_metrics AS m "
+                    "SET tree_age = v.tree_age "
+                    "FROM unnest(CAST(:codes AS TEXT[]), CAST(:dates AS DATE[]), CAST(:ages AS TEXT[])) "
+                    "AS v(contract_code, inventory_date, tree_age) "
+                    "WHERE m.contract_code = v.contract_code AND m.inventory_date = v.inventory_date"
                 ),
                 {
-                    "tree_age": row["tree_age"],
-                    "contract_code": row["contract_code"],
-                    "inventory_date": row["inventory_date"].date() if not pd.isnull(row["inventory_date"]) else None
+                    "codes": merged["contract_code"].astype(str).tolist(),
+                    "dates": [d.date() for d in merged["inventory_date"]],
+                    "ages": merged["tree_age"].tolist(),
                 }
             )
     print(f"✅ tree_age actualizado para contratos filtrados con: {where}")
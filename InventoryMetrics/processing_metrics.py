@@ -1,10 +1,114 @@
 #InventoryMetrics/processing_metrics
 from core.libs import pd, np
 from core.schema_helpers import get_column
-from core.db import get_engine
 from InventoryMetrics.generate_helpers import add_cruise_date_to_metrics
 
-engine = get_engine()
+# métrica → columna lógica (mean y std de cada una)
+STAT_FIELDS = {"dbh": "dbh_in", "tht": "tht_ft", "mht": "merch_ht_ft", "doyle_bf": "doyle_bf"}
+
+
+def _pct_text(pct: pd.Series) -> pd.Series:
+    """87.5 → '87.5%'; NaN → None (mismo formato que f"{round(x, 2)}%")."""
+    return pct.map(lambda v: None if np.isnan(v) else f"{v}%").astype(object)
+
+
+def _group_sums(values: np.ndarray, starts: np.ndarray, sizes: np.ndarray) -> np.ndarray:
+    """
+    Suma de cada grupo de filas contiguas, igual bit a bit que Series.sum() sobre
+    el grupo: numpy suma por pares y el resultado depende del largo, así que los
+    grupos del mismo tamaño se apilan en 2D y se suman por fila (un sum por tamaño).
+    Enteros: la suma es exacta en cualquier orden.
+    """
+    if values.dtype.kind in "iub":
+        return np.add.reduceat(values.astype(np.int64), starts) if len(starts) else np.zeros(0, np.int64)
+    out = np.empty(len(starts))
+    for size in np.unique(sizes):
+        rows = np.flatnonzero(sizes == size)
+        out[rows] = values[starts[rows, None] + np.arange(size)].sum(axis=1)
+    return out
+
+
+def _group_mean_std(values: np.ndarray, starts, sizes, counts):
+    """Series.mean() / Series.std() por grupo: mismos pasos que nanops.nanmean / nanvar."""
+    missing = np.isnan(values)
+    filled = np.where(missing, 0.0, values)
+    total = _group_sums(filled, starts, sizes)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = total / counts
+        sqr = (np.repeat(mean, sizes) - filled) ** 2
+        sqr[missing] = 0
+        var = _group_sums(sqr, starts, sizes) / (counts - 1)
+    var[counts <= 1] = np.nan
+    return mean, np.sqrt(var), total
+
+
+def contract_metrics(df, contract_col, year=None):
+    """
+    Métricas por contrato sin recorrer grupos en Python: las columnas numéricas
+    se convierten una vez (pd.to_numeric coerce), las filas se ordenan por contrato
+    y las sumas usan la misma suma por pares que Series.mean()/std()/sum() de cada
+    grupo, así el redondeo a 2 decimales es idéntico al del bucle anterior.
+    """
+    alive_col = get_column("alive_tree", df)
+    dead_col = get_column("dead_tree", df)
+    dbh_col = get_column("dbh_in", df)
+
+    # groupby(contract_col): contratos ordenados, sin NaN, filas en su orden original
+    codes, contracts = pd.factorize(df[contract_col], sort=True)
+    order = np.argsort(codes, kind="stable")
+    order = order[codes[order] >= 0]
+    sizes = np.bincount(codes[order], minlength=len(contracts))
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1])).astype(np.intp)
+
+    def column(col):
+        return df[col].to_numpy()[order]
+
+    def numeric(logical):
+        return pd.to_numeric(df[get_column(logical, df)], errors="coerce").to_numpy(dtype=float, na_value=np.nan)[order]
+
+    def total(col):
+        values = column(col)
+        if values.dtype.kind == "f":
+            values = np.where(np.isnan(values), 0.0, values)
+        return _group_sums(values, starts, sizes)
+
+    total_alive = total(alive_col)
+    total_dead = total(dead_col)
+    total_trees = pd.Series(total_alive + total_dead)
+    has_total = total_trees.notna() & (total_trees != 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        survival = (pd.Series(total_alive) / total_trees * 100).round(2).where(has_total)
+        mortality = (pd.Series(total_dead) / total_trees * 100).round(2).where(has_total)
+
+    stats = {}
+    for metric, logical in STAT_FIELDS.items():
+        values = numeric(logical)
+        counts = np.bincount(np.repeat(np.arange(len(sizes)), sizes), weights=~np.isnan(values),
+                             minlength=len(sizes))
+        stats[metric] = _group_mean_std(values, starts, sizes, counts)
+    noncom = _group_sums(df[dbh_col].lt(8).to_numpy()[order], starts, sizes)
+
+    # Redondeo y columnas igual que antes
+    df_metrics = pd.DataFrame({
+        "contract_code": np.asarray(contracts, dtype=object),
+        "inventory_year": year,
+        "inventory_date": None,  # Se rellena después con el merge
+        "total_trees": total_trees.to_numpy(),
+        "survival": _pct_text(survival).to_numpy(),
+        "mortality": _pct_text(mortality).to_numpy(),
+        "dbh_mean": stats["dbh"][0].round(2),
+        "dbh_std": stats["dbh"][1].round(2),
+        "noncom_dbh_count": noncom.astype("int64"),
+        "tht_mean": stats["tht"][0].round(2),
+        "tht_std": stats["tht"][1].round(2),
+        "mht_mean": stats["mht"][0].round(2),
+        "mht_std": stats["mht"][1].round(2),
+        "doyle_bf_mean": stats["doyle_bf"][0].round(2),
+        "doyle_bf_std": stats["doyle_bf"][1].round(2),
+        "doyle_bf_total": stats["doyle_bf"][2].round(2),
+    })
+    return df_metrics
+
 
 def aggregate_contracts(
     df,
@@ -39,46 +143,12 @@ def aggregate_contracts(
         required_fields = ["dbh_in", "tht_ft", "doyle_bf"]
     contract_col = get_column("contractcode", df)
 
-    # Filtra registros válidos si aplica
+    # Filtra registros válidos si aplica (una sola máscara)
     if filter_valid:
-        for field in required_fields:
-            df = df[df[get_column(field, df)].notna()]\
-
-    grouped = df.groupby(contract_col)
-    rows = []
-
-    for contract_code, group in grouped:
-        # Calcula sobrevivencia/mortalidad
-        alive_col = get_column("alive_tree", group)
-        dead_col = get_column("dead_tree", group)
-        total_alive = group[alive_col].sum() if alive_col in group else np.nan
-        total_dead = group[dead_col].sum() if dead_col in group else np.nan
-        total_trees = total_alive + total_dead if not np.isnan(total_alive) and not np.isnan(total_dead) else np.nan
-        survival = round((total_alive / total_trees) * 100, 2) if total_trees else np.nan
-        mortality = round((total_dead / total_trees) * 100, 2) if total_trees else np.nan
-
-        # Redondeo y columnas igual que antes
-        row = {
-            "contract_code": contract_code,
-            "inventory_year": year,
-            "inventory_date": None,  # Se rellena después con el merge
-            "total_trees": total_trees,
-            "survival": f"{survival}%" if not np.isnan(survival) else None,
-            "mortality": f"{mortality}%" if not np.isnan(mortality) else None,
-            "dbh_mean": round(pd.to_numeric(group[get_column("dbh_in", group)], errors='coerce').mean(), 2),
-            "dbh_std": round(pd.to_numeric(group[get_column("dbh_in", group)], errors='coerce').std(), 2),
-            "noncom_dbh_count": group[get_column("dbh_in", group)].lt(8).sum(),
-            "tht_mean": round(pd.to_numeric(group[get_column("tht_ft", group)], errors='coerce').mean(), 2),
-            "tht_std": round(pd.to_numeric(group[get_column("tht_ft", group)], errors='coerce').std(), 2),
-            "mht_mean": round(pd.to_numeric(group[get_column("merch_ht_ft", group)], errors='coerce').mean(), 2),
-            "mht_std": round(pd.to_numeric(group[get_column("merch_ht_ft", group)], errors='coerce').std(), 2),
-            "doyle_bf_mean": round(pd.to_numeric(group[get_column("doyle_bf", group)], errors='coerce').mean(), 2),
-            "doyle_bf_std": round(pd.to_numeric(group[get_column("doyle_bf", group)], errors='coerce').std(), 2),
-            "doyle_bf_total": round(pd.to_numeric(group[get_column("doyle_bf", group)], errors='coerce').sum(), 2),
-        }
-        rows.append(row)
-
-    df_metrics = pd.DataFrame(rows)
+        valid = df[[get_column(field, df) for field in required_fields]].notna().all(axis=1)
+        df = df[valid]
+
+    df_metrics = contract_metrics(df, contract_col, year)
     df_metrics = add_cruise_date_to_metrics(engine, df_metrics, country, year)
 
     # Mergea todos los contratos si se pide
@@ -87,11 +157,12 @@ def aggregate_contracts(
         df_contracts = pd.DataFrame({"contract_code": contracts})
         df_metrics = df_contracts.merge(df_metrics, on="contract_code", how="left")
 
-    # Agrega campo "progress"
+    # Agrega campo "progress" (columna a columna; una métrica inexistente cuenta como nula)
     if include_progress:
-        def status(row):
-            crit_ok = all(pd.notnull(row.get(f"{f}_mean")) for f in required_fields)
-            return "OK" if crit_ok else "error"
-        df_metrics["progress"] = df_metrics.apply(status, axis=1)
+        crit_ok = np.ones(len(df_metrics), dtype=bool)
+        for f in required_fields:
+            col = f"{f}_mean"
+            crit_ok &= df_metrics[col].notna().to_numpy() if col in df_metrics.columns else False
+        df_metrics["progress"] = np.where(crit_ok, "OK", "error")
 
     return df_metrics
@@ -0,0 +1,146 @@
+#InventoryMetrics/sql_metrics
+"""
+Métricas por contrato calculadas en PostgreSQL (misma salida que
+processing_metrics.aggregate_contracts, sin traer la tabla a pandas).
+
+Una sola consulta agrupada por tabla (AVG, STDDEV_SAMP, SUM, COUNT FILTER);
+sólo viaja una fila por contrato. El redondeo y los textos de survival /
+mortality se arman en pandas igual que en aggregate_contracts.
+
+    df_metrics = aggregate_contracts_sql(engine, "inventory_us_2025", country="us", year=2025)
+"""
+from core.libs import pd, np, text
+from core.schema_helpers import get_column
+from InventoryMetrics.generate_helpers import add_cruise_date_to_metrics
+from InventoryMetrics.processing_metrics import STAT_FIELDS, _pct_text
+
+NUMERIC_PG_TYPES = {"smallint", "integer", "bigint", "numeric", "real", "double precision"}
+# Texto que pd.to_numeric(errors="coerce") sí convierte; lo demás queda NULL
+_NUMBER_RE = r"^\s*[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?\s*$"
+
+NONCOM_DBH_IN = 8
+
+METRIC_COLUMNS = [
+    "contract_code", "inventory_year", "inventory_date", "total_trees", "survival", "mortality",
+    "dbh_mean", "dbh_std", "noncom_dbh_count", "tht_mean", "tht_std", "mht_mean", "mht_std",
+    "doyle_bf_mean", "doyle_bf_std", "doyle_bf_total",
+]
+
+
+def table_column_types(engine, table, schema="public") -> dict:
+    """{columna: data_type} de information_schema, en orden de la tabla."""
+    with engine.connect() as conn:
+        rows = conn.execute(text("""
+            SELECT column_name, data_type FROM information_schema.columns
+            WHERE table_schema = :schema AND table_name = :table
+            ORDER BY ordinal_position
+        """), {"schema": schema, "table": table})
+        return dict(rows.all())
+
+
+def _resolve(logical, columns: pd.DataFrame):
+    """get_column sobre las columnas de la tabla; None si la tabla no la tiene."""
+    try:
+        return get_column(logical, columns)
+    except KeyError:
+        return None
+
+
+def _numeric_sql(col, pg_type) -> str:
+    """Columna como double precision; texto no numérico → NULL (como pd.to_numeric coerce)."""
+    if pg_type in NUMERIC_PG_TYPES:
+        return f'"{col}"::double precision'
+    return f"""(CASE WHEN "{col}"::text ~ '{_NUMBER_RE}' THEN "{col}"::text::double precision END)"""
+
+
+def build_metrics_sql(col_types: dict, table, schema="public", where="1=1",
+                      filter_valid=True, required_fields=None) -> str:
+    """SELECT agrupado por contrato con los agregados sin redondear."""
+    required_fields = required_fields or ["dbh_in", "tht_ft", "doyle_bf"]
+    columns = pd.DataFrame(columns=list(col_types))
+    contract = get_column("contractcode", columns)
+
+    def num(logical):
+        col = _resolve(logical, columns)
+        return _numeric_sql(col, col_types[col]) if col else "NULL::double precision"
+
+    select = [f'"{contract}" AS contract_code']
+    for name in ("alive_tree", "dead_tree"):
+        col = _resolve(name, columns)
+        # sum() de pandas ignora NaN y da 0 en un grupo todo-NaN; sin columna → NaN
+        select.append(f"COALESCE(SUM({num(name)}), 0) AS total_{name.split('_')[0]}" if col
+                      else f"NULL::double precision AS total_{name.split('_')[0]}")
+    for metric, logical in STAT_FIELDS.items():
+        value = num(logical)
+        select.append(f"AVG({value}) AS {metric}_mean")
+        select.append(f"STDDEV_SAMP({value}) AS {metric}_std")
+    select.append(f"SUM({num('doyle_bf')}) AS doyle_bf_total")
+    select.append(f"COUNT(*) FILTER (WHERE {num('dbh_in')} < {NONCOM_DBH_IN}) AS noncom_dbh_count")
+
+    # La consulta va en text(), donde ':x' es un bind parameter: se escapan los ':' literales del filtro
+    sql_where = where.replace(":", r"\:")
+    conditions = [f'"{contract}" IS NOT NULL', f"({sql_where})"]
+    if filter_valid:
+        conditions += [f'"{get_column(f, columns)}" IS NOT NULL' for f in required_fields]
+
+    return (
+        f"SELECT {', '.join(select)}\n"
+        f'FROM "{schema}"."{table}"\n'
+        f"WHERE {' AND '.join(conditions)}\n"
+        f'GROUP BY "{contract}"'
+    )
+
+
+def aggregate_contracts_sql(
+    engine,
+    table,
+    country=None,
+    year=None,
+    schema="public",
+    where="1=1",
+    filter_valid=True,
+    required_fields=None,
+    include_progress=True,
+):
+    """
+    Igual que aggregate_contracts(pd.read_sql(SELECT * ...), engine, country, year),
+    pero agregando en la base. Los contratos salen ordenados por contract_code.
+    """
+    if required_fields is None:
+        required_fields = ["dbh_in", "tht_ft", "doyle_bf"]
+    sql = build_metrics_sql(table_column_types(engine, table, schema), table, schema, where,
+                            filter_valid, required_fields)
+    agg = pd.read_sql(text(sql), engine)
+    agg = agg.sort_values("contract_code", kind="stable", ignore_index=True)
+
+    total = agg["total_alive"] + agg["total_dead"]
+    valid = total.notna() & (total != 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        survival = (agg["total_alive"] / total * 100).round(2).where(valid)
+        mortality = (agg["total_dead"] / total * 100).round(2).where(valid)
+
+    df_metrics = pd.DataFrame({
+        "contract_code": agg["contract_code"],
+        "inventory_year": year,
+        "inventory_date": None,  # Se rellena después con el merge
+        "total_trees": total,
+        "survival": _pct_text(survival),
+        "mortality": _pct_text(mortality),
+    })
+    for metric in STAT_FIELDS:
+        df_metrics[f"{metric}_mean"] = agg[f"{metric}_mean"].astype(float).round(2)
+        df_metrics[f"{metric}_std"] = agg[f"{metric}_std"].astype(float).round(2)
+        if metric == "dbh":
+            df_metrics["noncom_dbh_count"] = agg["noncom_dbh_count"]
+    df_metrics["doyle_bf_total"] = agg["doyle_bf_total"].astype(float).fillna(0.0).round(2)
+    df_metrics = df_metrics[METRIC_COLUMNS]
+
+    df_metrics = add_cruise_date_to_metrics(engine, df_metrics, country, year)
+
+    if include_progress:
+        ok = pd.Series(True, index=df_metrics.index)
+        for f in required_fields:
+            ok &= df_metrics.get(f"{f}_mean", pd.Series(np.nan, index=df_metrics.index)).notna()
+        df_metrics["progress"] = np.where(ok, "OK", "error")
+
+    return df_metrics
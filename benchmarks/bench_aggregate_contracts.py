@@ -0,0 +1,103 @@
+# benchmarks/bench_aggregate_contracts.py
+"""
+Benchmark + regresión: métricas por contrato vectorizadas
+(processing_metrics.contract_metrics) vs el bucle anterior de
+aggregate_contracts (for contract_code, group in grouped, copiado abajo tal cual).
+
+Sólo se mide la agregación; el merge de cruise_date necesita la base.
+
+Uso:
+    python -m benchmarks.bench_aggregate_contracts --rows 1000000
+"""
+from core.libs import argparse, np, pd, time
+from core.schema_helpers import get_column
+from InventoryMetrics.processing_metrics import contract_metrics
+
+
+def contract_metrics_legacy(df, contract_col, year=None):
+    grouped = df.groupby(contract_col)
+    rows = []
+
+    for contract_code, group in grouped:
+        # Calcula sobrevivencia/mortalidad
+        alive_col = get_column("alive_tree", group)
+        dead_col = get_column("dead_tree", group)
+        total_alive = group[alive_col].sum() if alive_col in group else np.nan
+        total_dead = group[dead_col].sum() if dead_col in group else np.nan
+        total_trees = total_alive + total_dead if not np.isnan(total_alive) and not np.isnan(total_dead) else np.nan
+        survival = round((total_alive / total_trees) * 100, 2) if total_trees else np.nan
+        mortality = round((total_dead / total_trees) * 100, 2) if total_trees else np.nan
+
+        # Redondeo y columnas igual que antes
+        row = {
+            "contract_code": contract_code,
+            "inventory_year": year,
+            "inventory_date": None,  # Se rellena después con el merge
+            "total_trees": total_trees,
+            "survival": f"{survival}%" if not np.isnan(survival) else None,
+            "mortality": f"{mortality}%" if not np.isnan(mortality) else None,
+            "dbh_mean": round(pd.to_numeric(group[get_column("dbh_in", group)], errors='coerce').mean(), 2),
+            "dbh_std": round(pd.to_numeric(group[get_column("dbh_in", group)], errors='coerce').std(), 2),
+            "noncom_dbh_count": group[get_column("dbh_in", group)].lt(8).sum(),
+            "tht_mean": round(pd.to_numeric(group[get_column("tht_ft", group)], errors='coerce').mean(), 2),
+            "tht_std": round(pd.to_numeric(group[get_column("tht_ft", group)], errors='coerce').std(), 2),
+            "mht_mean": round(pd.to_numeric(group[get_column("merch_ht_ft", group)], errors='coerce').mean(), 2),
+            "mht_std": round(pd.to_numeric(group[get_column("merch_ht_ft", group)], errors='coerce').std(), 2),
+            "doyle_bf_mean": round(pd.to_numeric(group[get_column("doyle_bf", group)], errors='coerce').mean(), 2),
+            "doyle_bf_std": round(pd.to_numeric(group[get_column("doyle_bf", group)], errors='coerce').std(), 2),
+            "doyle_bf_total": round(pd.to_numeric(group[get_column("doyle_bf", group)], errors='coerce').sum(), 2),
+        }
+        rows.append(row)
+
+    return pd.DataFrame(rows)
+
+
+def compare_metrics(legacy: pd.DataFrame, new: pd.DataFrame):
+    """Columnas, dtypes, textos, conteos y medias/std redondeadas idénticos (sin tolerancia)."""
+    pd.testing.assert_frame_equal(legacy, new, check_exact=True)
+
+
+def make_synthetic_inventory(n_rows: int, n_contracts: int = 2_000, seed: int = 13) -> pd.DataFrame:
+    """Inventario como sale de la tabla SQL: numéricos con NaN y algunos contratos con un solo árbol."""
+    rng = np.random.default_rng(seed)
+    codes = np.array([f"US{i:05d}" for i in range(n_contracts)], dtype=object)
+    contract = codes[rng.integers(0, n_contracts, n_rows)]
+    contract[: n_contracts // 100] = codes[-(n_contracts // 100):]  # contratos de un árbol
+    dead = (rng.random(n_rows) < 0.1).astype(float)
+    dbh = rng.normal(9, 2.5, n_rows).round(1)
+    dbh[rng.random(n_rows) < 0.03] = np.nan
+    return pd.DataFrame({
+        "contractcode": contract,
+        "dbh_in": dbh,
+        "tht_ft": rng.normal(40, 8, n_rows).round(1),
+        "merch_ht_ft": rng.normal(20, 5, n_rows).round(1),
+        "doyle_bf": np.where(dbh >= 8, ((dbh - 4) ** 2) * 2.5, np.nan),
+        "alive_tree": 1 - dead,
+        "dead_tree": dead,
+    })
+
+
+def run(n_rows: int, check: bool = True):
+    df = make_synthetic_inventory(n_rows)
+
+    t0 = time.perf_counter()
+    legacy = contract_metrics_legacy(df, "contractcode", 2025)
+    t_legacy = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    new = contract_metrics(df, "contractcode", 2025)
+    t_new = time.perf_counter() - t0
+
+    print(f"⏱️  {n_rows:,} árboles, {len(new):,} contratos  bucle {t_legacy:6.2f}s  "
+          f"vectorizado {t_new:6.3f}s  → {t_legacy / t_new:.0f}x")
+    if check:
+        compare_metrics(legacy, new)
+        print("   ✅ métricas idénticas")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="aggregate_contracts: bucle por contrato vs vectorizado")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--no-check", action="store_true", help="No comparar las salidas")
+    args = parser.parse_args()
+    run(args.rows, check=not args.no_check)
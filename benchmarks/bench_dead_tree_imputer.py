@@ -0,0 +1,124 @@
+# benchmarks/bench_dead_tree_imputer.py
+"""
+Benchmark + regresión: add_imputed_dead_rows vectorizado (merge + np.repeat)
+vs la versión anterior con iterrows y re-filtrado del frame por parcela
+(copiada abajo tal cual).
+
+Uso:
+    python -m benchmarks.bench_dead_tree_imputer --rows 500000
+"""
+from core.libs import argparse, io, np, pd, time
+from contextlib import redirect_stdout
+from CruisesProcessor.dead_tree_imputer import add_imputed_dead_rows
+
+
+def add_imputed_dead_rows_legacy(df: pd.DataFrame, contract_col: str, plot_col: str, dead_col: str) -> pd.DataFrame:
+    df = df.copy()
+
+    plot_stats = (
+        df.groupby([contract_col, plot_col], as_index=False)
+        .agg(
+            total_arboles=('tree_number', 'nunique'),
+            muertos_parcela=(dead_col, 'sum')
+        )
+    )
+
+    valid_plots = plot_stats[
+        (plot_stats['muertos_parcela'] == 1) &
+        (plot_stats['total_arboles'] == 1)
+        ]
+
+    avg_per_contract = (
+        plot_stats[plot_stats['total_arboles'] > 1]
+        .groupby(contract_col)['total_arboles']
+        .mean()
+        .apply(np.floor)
+        .astype(int)
+        .to_dict()
+    )
+
+    rows_to_add = []
+    for _, row in valid_plots.iterrows():
+        contract = row[contract_col]
+        plot = row[plot_col]
+        target_count = avg_per_contract.get(contract, 0)
+
+        dead_row = df[
+            (df[contract_col] == contract) &
+            (df[plot_col] == plot) &
+            (df[dead_col] == 1)
+            ].iloc[0]
+
+        needed = max(0, target_count - 1)
+
+        for _ in range(needed):
+            rows_to_add.append(dead_row.to_dict())
+
+    if rows_to_add:
+        added = pd.DataFrame(rows_to_add)
+        df = pd.concat([df, added], ignore_index=True)
+        print("\n=== 🪵 Resumen de imputación ===")
+        print(f"Árboles imputados: {len(rows_to_add)}")
+        print("\n📋 Por contrato:")
+        print(added[contract_col].value_counts().sort_index())
+    else:
+        print("\n✅ No se imputaron árboles")
+
+    return df
+
+
+def make_synthetic_plots(n_rows: int, n_contracts: int = 200, seed: int = 5) -> pd.DataFrame:
+    """Parcelas de ~10 árboles; ~5% de parcelas con un único árbol muerto."""
+    rng = np.random.default_rng(seed)
+    plot_size = rng.integers(5, 15, n_rows // 5)
+    single = rng.random(len(plot_size)) < 0.05
+    plot_size[single] = 1
+    plot_id = np.repeat(np.arange(len(plot_size)), plot_size)[:n_rows]
+    tree = np.concatenate([np.arange(1, s + 1) for s in plot_size])[:n_rows]
+
+    dead = (rng.random(len(plot_id)) < 0.08).astype(float)
+    dead[single[plot_id]] = 1.0
+
+    contract = np.array([f"CR{i:04d}" for i in range(n_contracts)])[plot_id * n_contracts // len(plot_size)]
+    return pd.DataFrame({
+        "contractcode": contract,
+        "plot": (plot_id % 300 + 1).astype(str),
+        "tree_number": tree.astype(float),
+        "dead_tree": dead,
+        "alive_tree": 1.0 - dead,
+        "dbh_in": rng.normal(9, 2, len(plot_id)).round(1),
+    })
+
+
+def run_quiet(func, df):
+    buf = io.StringIO()
+    with redirect_stdout(buf):
+        out = func(df, contract_col="contractcode", plot_col="plot", dead_col="dead_tree")
+    return out, buf.getvalue()
+
+
+def run(n_rows: int, check: bool = True):
+    df = make_synthetic_plots(n_rows)
+
+    t0 = time.perf_counter()
+    legacy, legacy_log = run_quiet(add_imputed_dead_rows_legacy, df)
+    t_legacy = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    new, new_log = run_quiet(add_imputed_dead_rows, df)
+    t_new = time.perf_counter() - t0
+
+    print(f"⏱️  {len(df):,} filas, {len(new) - len(df):,} imputadas  legacy {t_legacy:6.2f}s"
+          f"  vectorizado {t_new:6.2f}s  → {t_legacy / t_new:.1f}x")
+    if check:
+        pd.testing.assert_frame_equal(legacy, new)
+        assert legacy_log == new_log
+        print("   ✅ Salida y resumen idénticos")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="add_imputed_dead_rows: legacy vs vectorizado")
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--no-check", action="store_true", help="No comparar las salidas")
+    args = parser.parse_args()
+    run(args.rows, check=not args.no_check)
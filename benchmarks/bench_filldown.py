@@ -0,0 +1,91 @@
+# benchmarks/bench_filldown.py
+"""
+Benchmark + regresión: forward_fill_headers agrupado por contrato (una pasada
+groupby().ffill() sólo sobre HEADER_COLS) vs la versión anterior con replace
+sobre todo el frame y ffill/bfill global (copiada abajo tal cual).
+
+Con contratos que no traen encabezado en sus primeras filas la versión anterior
+arrastra el valor del contrato previo; el benchmark cuenta esas celdas.
+
+Uso:
+    python -m benchmarks.bench_filldown --rows 1000000
+"""
+from core.libs import argparse, np, pd, time
+from CruisesProcessor.filldown import HEADER_COLS, forward_fill_headers
+
+
+def forward_fill_headers_legacy(df: pd.DataFrame,
+                                cols: list[str] | None = None) -> pd.DataFrame:
+    cols = cols or HEADER_COLS
+    df_filled = df.copy()
+
+    # Asegurar que solo use columnas existentes
+    existing = [col for col in cols if col in df_filled.columns]
+
+    # 🔥 Eliminar filas completamente vacías en columnas clave
+    df_filled = df_filled.replace("", pd.NA)
+    df_filled = df_filled.dropna(subset=existing, how="all")
+
+    # ✅ Aplicar filldown solo a las filas parcialmente completas
+    mask_non_empty = df_filled[existing].notna().any(axis=1)
+    df_filled.loc[mask_non_empty, existing] = (
+        df_filled.loc[mask_non_empty, existing]
+        .ffill()
+        .bfill()
+    )
+
+    return df_filled
+
+
+def make_synthetic_cruise(n_rows: int, n_contracts: int = 500, seed: int = 11) -> pd.DataFrame:
+    """Lote combinado como sale de combine_files: encabezados sólo en la primera fila de cada parcela."""
+    rng = np.random.default_rng(seed)
+    sizes = rng.multinomial(n_rows - n_contracts, np.full(n_contracts, 1 / n_contracts)) + 1
+    contract = np.repeat([f"US{i:04d}" for i in range(n_contracts)], sizes).astype(object)
+    starts = np.r_[0, np.cumsum(sizes)[:-1]]
+
+    plot_start = rng.random(n_rows) < 0.2
+    plot_start[starts] = True
+    plot = np.cumsum(plot_start).astype(str).astype(object)
+    plot[~plot_start] = ""
+
+    stand = rng.integers(1, 9, n_rows).astype(float)
+    stand[~plot_start] = np.nan
+    # ~5% de los contratos sin stand en su primera parcela
+    stand[starts[rng.random(n_contracts) < 0.05]] = np.nan
+
+    status = rng.choice(["Vivo", "Muerto", ""], n_rows, p=[0.8, 0.1, 0.1]).astype(object)
+    return pd.DataFrame({
+        "contractcode": contract,
+        "farmername": np.char.add("Farmer ", contract.astype(str)).astype(object),
+        "stand": stand,
+        "plot": plot,
+        "Status": status,
+        "tree_number": np.arange(n_rows) % 30 + 1,
+        "dbh_in": rng.normal(9, 2, n_rows).round(1),
+        "Species": rng.choice(["Teca", "Caoba", ""], n_rows).astype(object),
+    })
+
+
+def run(n_rows: int):
+    df = make_synthetic_cruise(n_rows)
+
+    t0 = time.perf_counter()
+    legacy = forward_fill_headers_legacy(df)
+    t_legacy = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    new = forward_fill_headers(df)
+    t_new = time.perf_counter() - t0
+
+    print(f"⏱️  {n_rows:,} filas  legacy {t_legacy:6.3f}s  agrupado {t_new:6.3f}s  → {t_legacy / t_new:.1f}x")
+    cols = [c for c in HEADER_COLS if c in df.columns]
+    differs = ~(legacy[cols].eq(new[cols]) | (legacy[cols].isna() & new[cols].isna()))
+    print(f"   celdas que la versión anterior copiaba de otro contrato: {int(differs.to_numpy().sum()):,}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="forward_fill_headers: global vs agrupado por contrato")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+    run(args.rows)
@@ -0,0 +1,127 @@
+# benchmarks/bench_fuse_metrics.py
+"""
+Benchmark + regresión: clean_and_fuse_metrics con replace('') +
+groupby().first() vs la versión anterior con groupby().apply(fuse_rows)
+y progress por apply(axis=1) (copiada abajo tal cual).
+
+Uso:
+    python -m benchmarks.bench_fuse_metrics --contracts 20000
+"""
+from core.libs import argparse, np, pd, time, warnings
+from InventoryMetrics.generate_helpers import clean_and_fuse_metrics
+
+
+def fuse_rows_legacy(group):
+    # Fusiona columna a columna: toma el primer valor no nulo (útil) de cada campo.
+    if len(group) == 1:
+        return group.iloc[0]
+    result = {}
+    for col in group.columns:
+        vals = group[col]
+        value = next((v for v in vals if pd.notnull(v) and v != ''), None)
+        result[col] = value
+    return pd.Series(result)
+
+
+def clean_and_fuse_metrics_legacy(df_full):
+    if "cruise_date" in df_full.columns:
+        df_full["inventory_date"] = df_full["cruise_date"]
+        df_full = df_full.drop(columns=["cruise_date"])
+
+    keys = ["contract_code", "inventory_year", "inventory_date"]
+    df_final = df_full.groupby(keys, dropna=False).apply(fuse_rows_legacy).reset_index(drop=True)
+
+    if "pkid" not in df_final.columns or df_final["pkid"].isnull().any():
+        df_final["pkid"] = df_final["contract_code"].astype(str) + " " + df_final["inventory_year"].astype(str)
+
+    df_final["progress"] = df_final.apply(
+        lambda row: "OK" if pd.notnull(row.get("total_trees")) and pd.notnull(row.get("survival")) else "error", axis=1
+    )
+
+    if 'planting_year_y' in df_final.columns:
+        df_final['planting_year'] = df_final['planting_year_y']
+    if 'planting_date_y' in df_final.columns:
+        df_final['planting_date'] = df_final['planting_date_y']
+    for col in ['planting_year_x', 'planting_year_y', 'planting_date_x', 'planting_date_y']:
+        if col in df_final.columns:
+            df_final.drop(col, axis=1, inplace=True)
+
+    schema = [
+        "rel_path", "contract_code", "planting_year", "tree_age", "inventory_year", "inventory_date", "survival",
+        "tht_mean", "tht_std", "mht_mean", "mht_std", "mht_pct_of_target",
+        "dbh_mean", "dbh_std", "noncom_dbh_count", "dbh_pct_of_target", "doyle_bf_mean", "doyle_bf_std",
+        "doyle_bf_total", "projected_dbh", "projected_doyle_bf", "pkid", "progress",
+        "total_trees", "mortality"
+    ]
+    for col in schema:
+        if col not in df_final.columns:
+            df_final[col] = None
+    df_final = df_final[schema]
+    return df_final
+
+
+def make_synthetic_metrics(n_contracts: int, dup_frac: float = 0.3, seed: int = 17) -> pd.DataFrame:
+    """Salida concatenada de aggregate_contracts: ~30% de los contratos repetidos con huecos complementarios."""
+    rng = np.random.default_rng(seed)
+    codes = np.array([f"US{i:05d}" for i in range(n_contracts)], dtype=object)
+    dup = codes[rng.random(n_contracts) < dup_frac]
+    contract = np.concatenate([codes, dup])
+    n = len(contract)
+    dates = pd.to_datetime(["2025-03-01", "2025-04-15", None])
+    df = pd.DataFrame({
+        "contract_code": contract,
+        "inventory_year": 2025,
+        "inventory_date": None,
+        "total_trees": rng.integers(50, 900, n).astype(float),
+        "survival": rng.choice(["91.2%", "88.0%", "", None], n).astype(object),
+        "mortality": rng.choice(["8.8%", "12.0%", None], n).astype(object),
+        "dbh_mean": rng.normal(9, 1, n).round(2),
+        "tht_mean": rng.normal(40, 5, n).round(2),
+        "doyle_bf_total": rng.normal(5000, 800, n).round(2),
+        "cruise_date": dates[np.r_[np.zeros(n_contracts, dtype=int), rng.integers(0, 2, len(dup))]],
+    })
+    holes = rng.random((n, 3)) < 0.2
+    for j, col in enumerate(("total_trees", "dbh_mean", "tht_mean")):
+        df.loc[holes[:, j], col] = np.nan
+    return df
+
+
+def run(n_contracts: int, check: bool = True):
+    df = make_synthetic_metrics(n_contracts)
+
+    t0 = time.perf_counter()
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", FutureWarning)  # apply sobre columnas de agrupación
+        legacy = clean_and_fuse_metrics_legacy(df.copy())
+    t_legacy = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    new = clean_and_fuse_metrics(df.copy())
+    t_new = time.perf_counter() - t0
+
+    print(f"⏱️  {len(df):,} filas → {len(new):,} métricas  apply {t_legacy:6.2f}s  first() {t_new:6.3f}s  → {t_legacy / t_new:.0f}x")
+    if check:
+        compare_fused(legacy, new)
+        print("   ✅ fusión idéntica")
+
+
+def compare_fused(legacy: pd.DataFrame, new: pd.DataFrame):
+    """
+    Mismos valores; nulo = None/NaN/NA/''. La versión anterior dejaba '' en los
+    grupos de una sola fila (y progress 'OK' con survival ''); ahora '' es nulo
+    en todos los grupos, así que progress se compara contra esa regla.
+    """
+    assert legacy.columns.tolist() == new.columns.tolist()
+    left = legacy.replace("", None)
+    left = left.astype(object).where(left.notna(), None)
+    left["progress"] = np.where(left["total_trees"].notna() & left["survival"].notna(), "OK", "error")
+    right = new.astype(object).where(new.notna(), None)
+    pd.testing.assert_frame_equal(left, right, check_dtype=False)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="clean_and_fuse_metrics: apply(fuse_rows) vs groupby.first")
+    parser.add_argument("--contracts", type=int, default=20_000)
+    parser.add_argument("--no-check", action="store_true", help="No comparar las salidas")
+    args = parser.parse_args()
+    run(args.contracts, check=not args.no_check)
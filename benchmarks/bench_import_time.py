@@ -0,0 +1,87 @@
+# benchmarks/bench_import_time.py
+"""
+Benchmark: tiempo de arranque (solo imports) de cada entry point `__main__`.
+
+Para cada paquete ejecuta en un proceso limpio
+    python -X importtime -c "import <paquete>.__main__"
+y reporta el tiempo acumulado del import, los módulos cargados y qué
+librerías pesadas terminaron en memoria.
+
+Uso:
+    python -m benchmarks.bench_import_time
+    python -m benchmarks.bench_import_time --repeat 5 CruisesProcessor InventoryMetrics
+"""
+from core.libs import argparse, os, Path, re, sys
+
+import statistics
+import subprocess
+
+ROOT = Path(__file__).resolve().parents[1]
+
+ENTRY_POINTS = [
+    "CruisesProcessor",
+    "CruisesProcessorHybrid",
+    "InventoryMetrics",
+    "MonthlyReport",
+    "ReportGenerator",
+    "MasterDatabaseManagement.Changes",
+    "MasterDatabaseManagement.Queries",
+]
+
+HEAVY = ["pandas", "numpy", "matplotlib", "plotly", "sqlalchemy", "psycopg2", "openpyxl", "tqdm", "pyarrow"]
+
+_MARK = "__HEAVY__:"
+_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure(package: str) -> dict:
+    """Un import en frío. Devuelve cumulative_ms, módulos, pesados o el error."""
+    env = dict(os.environ, PYTHONPATH=str(ROOT) + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    code = (
+        f"import sys, {package}.__main__\n"
+        f"print('{_MARK}' + ','.join(m for m in {HEAVY!r} if m in sys.modules))"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    modules = {}
+    for line in proc.stderr.splitlines():
+        m = _LINE.match(line)
+        if m:
+            modules[m.group(4)] = int(m.group(2))
+
+    if proc.returncode != 0:
+        err = [l for l in proc.stderr.splitlines() if l and not l.startswith("import time:")]
+        return {"error": err[-1] if err else f"exit {proc.returncode}"}
+
+    heavy = next((l[len(_MARK):] for l in reversed(proc.stdout.splitlines()) if l.startswith(_MARK)), "")
+    return {
+        "cumulative_ms": modules.get(f"{package}.__main__", max(modules.values(), default=0)) / 1000,
+        "modules": len(modules),
+        "heavy": [h for h in heavy.split(",") if h],
+    }
+
+
+def run(packages, repeat=3):
+    print(f"⏱️  Import time por entry point ({repeat} corridas, mediana)\n")
+    results = {}
+    for pkg in packages:
+        runs = [measure(pkg) for _ in range(repeat)]
+        if "error" in runs[0]:
+            print(f"  ❌ {pkg:<36} {runs[0]['error']}")
+            results[pkg] = runs[0]
+            continue
+        ms = statistics.median(r["cumulative_ms"] for r in runs)
+        heavy = ", ".join(runs[0]["heavy"]) or "—"
+        print(f"  ✅ {pkg:<36} {ms:8.1f} ms  {runs[0]['modules']:5d} módulos  pesados: {heavy}")
+        results[pkg] = {**runs[0], "cumulative_ms": ms}
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mide el arranque de los CLIs con -X importtime")
+    parser.add_argument("packages", nargs="*", default=ENTRY_POINTS)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    run(args.packages, repeat=args.repeat)
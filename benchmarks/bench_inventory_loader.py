@@ -0,0 +1,90 @@
+# benchmarks/bench_inventory_loader.py
+"""
+Benchmark: COPY FROM STDIN vs executemany en save_inventory_to_sql.
+
+Genera un inventario sintético con las columnas de FINAL_ORDER, crea dos
+tablas scratch con ensure_table y carga el mismo DataFrame con cada método.
+
+Uso:
+    python -m benchmarks.bench_inventory_loader --rows 500000
+"""
+from core.libs import argparse, np, pd, text, time
+from core.db import get_engine
+from core.schema_helpers import FINAL_ORDER
+from CruisesProcessor.general_importer import ensure_table, save_inventory_to_sql, prepare_df_for_sql
+
+
+def make_synthetic_inventory(n_rows: int, n_contracts: int = 400, seed: int = 7) -> pd.DataFrame:
+    """Inventario con forma real: contratos, parcelas de ~12 árboles, medidas y catálogos."""
+    rng = np.random.default_rng(seed)
+    contract_idx = np.sort(rng.integers(0, n_contracts, n_rows))
+    plot = (np.arange(n_rows) // 12) % 200 + 1
+    tree = np.arange(n_rows) % 12 + 1
+    contracts = np.array([f"CR{i:04d}" for i in range(n_contracts)])[contract_idx]
+
+    df = pd.DataFrame({
+        "contractcode": contracts,
+        "farmername": "Productor " + pd.Series(contract_idx).astype(str),
+        "cruisedate": pd.Timestamp("2024-03-05").date(),
+        "id": [f"{c}01{p:03d}{i:06d}" for c, p, i in zip(contracts, plot, range(n_rows))],
+        "stand": 1.0,
+        "plot": plot.astype(str),
+        "plot_coordinate": None,
+        "tree_number": tree.astype(float),
+        "dbh_in": rng.normal(9, 2.5, n_rows).round(2),
+        "tht_ft": rng.normal(40, 8, n_rows).round(1),
+        "merch_ht_ft": rng.normal(25, 6, n_rows).round(1),
+        "short_note": np.where(rng.random(n_rows) < 0.05, "revisar", None),
+        "Species_id": pd.array(rng.integers(1, 5, n_rows), dtype="Int64"),
+        "Defect_id": pd.array(rng.integers(1, 9, n_rows), dtype="Int64"),
+        "dead_tree": (rng.random(n_rows) < 0.1).astype(float),
+    })
+    df["alive_tree"] = 1.0 - df["dead_tree"]
+    df["doyle_bf"] = np.where(df["dbh_in"] >= 8, (df["dbh_in"] - 4) ** 2 * df["tht_ft"] / 16, np.nan)
+    return df
+
+
+def _prepare(df):
+    df_sql, _ = prepare_df_for_sql(df)
+    for col in df_sql.columns:
+        if "date" not in col.lower():
+            df_sql[col] = df_sql[col].replace({pd.NA: None})
+    return df_sql[[c for c in FINAL_ORDER if c in df_sql.columns]]
+
+
+def run(n_rows: int, methods=("copy", "executemany"), keep=False):
+    engine = get_engine()
+    df_sql = _prepare(make_synthetic_inventory(n_rows))
+    print(f"🧪 Inventario sintético: {len(df_sql):,} filas × {df_sql.shape[1]} columnas")
+
+    results = {}
+    for method in methods:
+        table = f"bench_inventory_{method}"
+        with engine.begin() as conn:
+            conn.execute(text(f'DROP TABLE IF EXISTS "{table}"'))
+        ensure_table(df_sql, engine, table)
+
+        t0 = time.perf_counter()
+        save_inventory_to_sql(df_sql, engine, table, method=method)
+        results[method] = time.perf_counter() - t0
+
+        with engine.connect() as conn:
+            count = conn.execute(text(f'SELECT COUNT(*) FROM "{table}"')).scalar()
+        print(f"⏱️  {method:<12} {results[method]:8.2f}s  ({count:,} filas en {table})")
+
+        if not keep:
+            with engine.begin() as conn:
+                conn.execute(text(f'DROP TABLE IF EXISTS "{table}"'))
+
+    if "copy" in results and "executemany" in results:
+        print(f"🚀 Speed-up COPY: {results['executemany'] / results['copy']:.1f}x")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="COPY vs executemany en save_inventory_to_sql")
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--methods", nargs="+", default=["copy", "executemany"])
+    parser.add_argument("--keep", action="store_true", help="No borrar las tablas de benchmark")
+    args = parser.parse_args()
+    run(args.rows, methods=args.methods, keep=args.keep)
@@ -0,0 +1,56 @@
+# benchmarks/bench_tree_age.py
+"""
+Benchmark + regresión: tree_age por columna (planting_times.tree_age_text) vs
+el list comprehension anterior sobre iterrows() con pretty_tree_age (copiado
+abajo tal cual, como estaba en generate.main y update_tree_age_metrics).
+
+Sólo se mide el cálculo; el UPDATE de update_tree_age_metrics necesita la base.
+
+Uso:
+    python -m benchmarks.bench_tree_age --rows 200000
+"""
+from core.libs import argparse, np, pd, time
+from InventoryMetrics.planting_times import pretty_tree_age, tree_age_text
+
+
+def tree_age_legacy(df):
+    return [
+        pretty_tree_age(row["planting_date"], row["inventory_date"])
+        for _, row in df.iterrows()
+    ]
+
+
+def make_synthetic_dates(n_rows: int, seed: int = 21) -> pd.DataFrame:
+    """Fechas de siembra e inventario como salen del merge: NaT, inventarios antes de la siembra y fin de mes."""
+    rng = np.random.default_rng(seed)
+    planting = pd.Timestamp("2012-01-01") + pd.to_timedelta(rng.integers(0, 4_000, n_rows), unit="D")
+    inventory = planting + pd.to_timedelta(rng.integers(-60, 4_000, n_rows), unit="D")
+    df = pd.DataFrame({"planting_date": planting, "inventory_date": inventory})
+    df.loc[rng.random(n_rows) < 0.05, "planting_date"] = pd.NaT
+    df.loc[rng.random(n_rows) < 0.05, "inventory_date"] = pd.NaT
+    return df
+
+
+def run(n_rows: int, check: bool = True):
+    df = make_synthetic_dates(n_rows)
+
+    t0 = time.perf_counter()
+    legacy = tree_age_legacy(df)
+    t_legacy = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    new = tree_age_text(df["planting_date"], df["inventory_date"])
+    t_new = time.perf_counter() - t0
+
+    print(f"⏱️  {n_rows:,} filas  iterrows {t_legacy:6.2f}s  columnas {t_new:6.3f}s  → {t_legacy / t_new:.0f}x")
+    if check:
+        assert new.tolist() == legacy
+        print("   ✅ tree_age idéntico")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="tree_age: iterrows + pretty_tree_age vs columnas datetime64")
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--no-check", action="store_true", help="No comparar las salidas")
+    args = parser.parse_args()
+    run(args.rows, check=not args.no_check)
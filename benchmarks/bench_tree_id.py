@@ -0,0 +1,140 @@
+# benchmarks/bench_tree_id.py
+"""
+Benchmark + regresión: split_by_id_validity vectorizado vs la versión
+anterior basada en .apply fila por fila (copiada abajo tal cual, con el
+import de `os` que le faltaba).
+
+Uso:
+    python -m benchmarks.bench_tree_id --rows 1000000
+"""
+from core.libs import argparse, np, os, pd, time
+from core.schema_helpers import get_column
+from CruisesProcessor.tree_id import (
+    split_by_id_validity, pad_plot,
+    PLOT_LOGICAL, STAND_LOGICAL, TREE_LOGICAL, CONTRACT_LOGICAL,
+)
+
+
+def split_by_id_validity_legacy(df: pd.DataFrame):
+    df = df.copy()
+
+    plot_col     = get_column(PLOT_LOGICAL, df)
+    tree_col     = get_column(TREE_LOGICAL, df)
+    contract_col = get_column(CONTRACT_LOGICAL, df)
+    stand_col = get_column(STAND_LOGICAL, df)
+
+    df["plot_str"] = df[plot_col].astype(str).str.strip()
+    df["plot_clean"] = df["plot_str"].apply(pad_plot)
+    df["tree_num"] = pd.to_numeric(df[tree_col], errors="coerce")
+    df["contractcode"] = df[contract_col]
+
+    if stand_col is not None:
+        def parse_stand(x):
+            if pd.isnull(x) or str(x).strip() == "" or str(x).lower() == "nan":
+                return ""
+            try:
+                return str(int(float(x))).zfill(2)
+            except Exception:
+                return str(x).strip()
+
+        df["stand_str"] = df[stand_col].apply(parse_stand)
+    else:
+        df["stand_str"] = ""
+
+    bad_mask = (
+            df["contractcode"].isna() |
+            df["contractcode"].str.strip().eq("") |
+            df["plot_clean"].eq("") |
+            df["tree_num"].isna()
+    )
+    ok = ~bad_mask
+
+    df.loc[ok, "tree_padded"] = df.loc[ok, "tree_num"].astype(int).astype(str).str.zfill(3)
+
+    df.loc[ok, "id"] = (
+        df.loc[ok, "contractcode"].str.upper().str.strip() +
+        df.loc[ok, "stand_str"] +
+        df.loc[ok, "plot_clean"] +
+        df.loc[ok, "tree_padded"]
+    )
+
+    def detect_id_error(row):
+        if pd.isna(row["contractcode"]) or str(row["contractcode"]).strip() == "":
+            return "❌ Falta contractcode"
+        if pd.isna(row["plot_clean"]) or str(row["plot_clean"]).strip() == "":
+            return "❌ Falta plot"
+        if pd.isna(row["tree_num"]):
+            return "❌ tree_number no numérico"
+        return "❌ Desconocido"
+
+    df.loc[bad_mask, "id_error"] = df.loc[bad_mask].apply(detect_id_error, axis=1)
+
+    if "path" in df.columns:
+        df.loc[bad_mask, "id_error"] += df.loc[bad_mask]["path"].apply(lambda p: f" ← archivo: {os.path.basename(p)}")
+
+    drop_cols = ["plot_str", "plot_clean", "tree_num", "stand_str","tree_padded"]
+    return (
+        df.loc[ok].drop(columns=drop_cols),
+        df.loc[bad_mask].drop(columns=drop_cols),
+    )
+
+
+def make_synthetic_trees(n_rows: int, n_contracts: int = 400, seed: int = 11, stand_numeric: bool = False) -> pd.DataFrame:
+    """Inventario con la forma del Input: plots sucios, stands mezclados y ~2% de filas inválidas."""
+    rng = np.random.default_rng(seed)
+    contracts = np.array([f"cr{i:04d} " for i in range(n_contracts)], dtype=object)
+    contract = contracts[np.sort(rng.integers(0, n_contracts, n_rows))]
+    contract[rng.random(n_rows) < 0.005] = None
+    contract[rng.random(n_rows) < 0.005] = "  "
+
+    plots = np.array(["1", " 2 ", "12a", "P-4", "7.0", "003", "15B", "", "ñ2", "²3", "x", "120"], dtype=object)
+    plot = plots[rng.integers(0, len(plots), n_rows)]
+    plot[rng.random(n_rows) < 0.003] = np.nan
+
+    if stand_numeric:
+        stand = rng.integers(1, 30, n_rows).astype(float)
+        stand[rng.random(n_rows) < 0.01] = np.nan
+    else:
+        stands = np.array([1.0, 2, "3", " 4 ", "A", "", "nan", np.nan, None, "2.7", "inf", -1], dtype=object)
+        stand = stands[rng.integers(0, len(stands), n_rows)]
+
+    tree = rng.integers(1, 40, n_rows).astype(object)
+    tree[rng.random(n_rows) < 0.005] = "n/a"
+    tree[rng.random(n_rows) < 0.005] = None
+
+    return pd.DataFrame({
+        "contractcode": contract,
+        "Stand #": stand,
+        "Plot #": plot,
+        "Tree #": tree,
+        "path": np.array([f"C:/cruises/{c}.xlsx" for c in range(4)], dtype=object)[rng.integers(0, 4, n_rows)],
+    })
+
+
+def run(n_rows: int, check: bool = True):
+    for stand_numeric in (False, True):
+        df = make_synthetic_trees(n_rows, stand_numeric=stand_numeric)
+        label = "stand numérico" if stand_numeric else "stand mixto"
+
+        t0 = time.perf_counter()
+        legacy = split_by_id_validity_legacy(df)
+        t_legacy = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        new = split_by_id_validity(df)
+        t_new = time.perf_counter() - t0
+
+        print(f"⏱️  {label:<15} {n_rows:,} filas  legacy {t_legacy:6.2f}s  vectorizado {t_new:6.2f}s"
+              f"  → {t_legacy / t_new:.1f}x")
+        if check:
+            for old_part, new_part in zip(legacy, new):
+                pd.testing.assert_frame_equal(old_part, new_part)
+            print("   ✅ Salida idéntica (válidos y con error)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="split_by_id_validity: legacy vs vectorizado")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--no-check", action="store_true", help="No comparar las salidas")
+    args = parser.parse_args()
+    run(args.rows, check=not args.no_check)
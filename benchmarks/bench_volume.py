@@ -0,0 +1,74 @@
+# benchmarks/bench_volume.py
+"""
+Benchmark + regresión: calculate_doyle sobre arrays float64 (core.doyle_calculator)
+vs la versión anterior con pd.to_numeric + Series.where (copiada abajo tal cual),
+más el costo de cada regla de tree_volume.
+
+Uso:
+    python -m benchmarks.bench_volume --rows 2000000
+"""
+from core.libs import argparse, io, np, pd, time
+from contextlib import redirect_stdout
+from core.doyle_calculator import VOLUME_RULES, calculate_doyle, tree_volume
+from core.schema_helpers import get_column
+
+
+def calculate_doyle_legacy(df: pd.DataFrame, force_recalc=True) -> pd.DataFrame:
+    dbh_col = get_column("dbh_in", df)
+    tht_col = get_column("tht_ft", df)
+    doyle_col = get_column("doyle_bf", df) if "doyle_bf" in df.columns else "doyle_bf"
+
+    df[dbh_col] = pd.to_numeric(df[dbh_col], errors='coerce')
+    df[tht_col] = pd.to_numeric(df[tht_col], errors='coerce')
+
+    if force_recalc or doyle_col not in df.columns:
+        # Calcula solo para DBH >= 8, el resto queda en blanco
+        doyle = ((df[dbh_col] - 4) ** 2) * (df[tht_col] / 16)
+        doyle_masked = doyle.where(df[dbh_col] >= 8, other=pd.NA)
+        df[doyle_col] = doyle_masked
+        print("🌳 Doyle recalculado")
+    else:
+        print("🌳 Doyle ya existe, no se recalcula (usa force_recalc=True para forzar)")
+
+    return df
+
+
+def make_synthetic_trees(n_rows: int, seed: int = 3) -> pd.DataFrame:
+    """DBH/THT como salen del pipeline: numéricos con ~2% de NaN y ~30% de DBH < 8."""
+    rng = np.random.default_rng(seed)
+    dbh = rng.normal(9, 2.5, n_rows).round(1)
+    tht = rng.normal(40, 10, n_rows).round(1)
+    dbh[rng.random(n_rows) < 0.02] = np.nan
+    tht[rng.random(n_rows) < 0.02] = np.nan
+    return pd.DataFrame({"dbh_in": dbh, "tht_ft": tht})
+
+
+def run(n_rows: int, check: bool = True):
+    df = make_synthetic_trees(n_rows)
+
+    t0 = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        legacy = calculate_doyle_legacy(df.copy())
+    t_legacy = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    new = calculate_doyle(df.copy())
+    t_new = time.perf_counter() - t0
+
+    print(f"⏱️  {n_rows:,} árboles  legacy {t_legacy:6.3f}s  arrays {t_new:6.3f}s  → {t_legacy / t_new:.1f}x")
+    if check:
+        pd.testing.assert_frame_equal(legacy, new)
+        print("   ✅ doyle_bf idéntico")
+
+    for rule in VOLUME_RULES:
+        t0 = time.perf_counter()
+        tree_volume(df["dbh_in"], df["tht_ft"], rule)
+        print(f"   {rule:14s} {time.perf_counter() - t0:6.3f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="calculate_doyle: legacy vs motor de volumen")
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--no-check", action="store_true", help="No comparar las salidas")
+    args = parser.parse_args()
+    run(args.rows, check=not args.no_check)
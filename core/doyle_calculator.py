@@ -1,28 +1,159 @@
 # core/doyle_calculator.py
+"""
+Motor de volumen por árbol: board feet (Doyle, Scribner, International 1/4")
+y volumen cúbico por área basal × altura × factor de forma.
 
-from core.libs import pd
+Trabaja sobre arrays float64 contiguos (DBH en pulgadas, altura en pies) y
+aplica la máscara DBH ≥ 8 una sola vez. Cada regla también existe como
+expresión SQL (volume_sql), para recalcular en la base sin pasar por pandas:
+
+    board_feet(dbh, tht, rule="scribner")          # np.ndarray
+    volume_sql("doyle")                            # CASE WHEN "dbh_in" >= 8 ...
+    recalculate_volume_in_db(engine, "inventory_us_2025")
+"""
+from core.libs import np, pd, text
 from core.schema_helpers import get_column
 
-def calculate_doyle(df: pd.DataFrame, force_recalc=True) -> pd.DataFrame:
+LOG_RULES = ("doyle", "scribner", "international")
+VOLUME_RULES = LOG_RULES + ("cubic",)
+
+# Por debajo de este DBH (in) el árbol no es comercial: sin board feet
+MIN_DBH_IN = 8
+# Factor de forma del volumen cúbico (mismo 0.5 que CruisesProcessorHybrid)
+FORM_FACTOR = 0.5
+
+# Área basal = π (DBH / k)²: pulgadas → ft² (k = 24), centímetros → m² (k = 200)
+_BASAL_AREA_DIVISOR = {"in": 24.0, "cm": 200.0}
+
+
+def _as_float_array(values) -> np.ndarray:
+    """Series/array → float64 contiguo (texto no numérico → NaN), sin copiar si ya lo es."""
+    if isinstance(values, pd.Series):
+        if not pd.api.types.is_float_dtype(values.dtype) or isinstance(values.dtype, pd.ArrowDtype):
+            values = pd.to_numeric(values, errors="coerce")
+        return np.ascontiguousarray(values.to_numpy(dtype="float64", na_value=np.nan))
+    return np.ascontiguousarray(values, dtype="float64")
+
+
+# ───── Reglas (D = DBH in, L = altura ft) ─────
+def _doyle(d, length):
+    out = d - 4.0
+    out *= out
+    out *= length
+    out /= 16.0
+    return out
+
+
+def _scribner(d, length):
+    # Scribner Decimal C en forma de fórmula (Bruce): (0.79 D² − 2 D − 4) · L/16
+    return (0.79 * d * d - 2.0 * d - 4.0) * (length / 16.0)
+
+
+def _international(d, length):
+    # International 1/4": polinomio de Grosenbaugh con conicidad de 1/2" cada 4 ft
+    return (0.04976191 * length * d * d + 0.006220239 * length * length * d
+            - 0.1854762 * length * d + 0.0002591767 * length ** 3
+            - 0.01159226 * length * length + 0.04222222 * length)
+
+
+_RULES = {"doyle": _doyle, "scribner": _scribner, "international": _international}
+
+
+def basal_area(dbh, unit: str = "in") -> np.ndarray:
+    """Área basal por árbol: ft² si DBH está en pulgadas, m² si está en centímetros."""
+    return np.pi * (_as_float_array(dbh) / _BASAL_AREA_DIVISOR[unit]) ** 2
+
+
+def cubic_volume(dbh, height, unit: str = "in", form_factor: float = FORM_FACTOR) -> np.ndarray:
+    """Volumen cúbico = área basal × altura × factor de forma (ft³ o m³ según unit)."""
+    return basal_area(dbh, unit) * _as_float_array(height) * form_factor
+
+
+def board_feet(dbh, height, rule: str = "doyle", min_dbh: float = MIN_DBH_IN) -> np.ndarray:
+    """Board feet por árbol según `rule`; NaN donde DBH < min_dbh o falta un dato."""
+    if rule not in _RULES:
+        raise ValueError(f"❌ Regla '{rule}' no soportada. Opciones: {LOG_RULES}")
+    d = _as_float_array(dbh)
+    length = _as_float_array(height)
+
+    # Cálculo sobre el array completo y una sola máscara (evita copiar d[ok], length[ok])
+    out = _RULES[rule](d, length)
+    out[~(d >= min_dbh)] = np.nan  # NaN >= 8 → False
+    return out
+
+
+def tree_volume(dbh, height, rule: str = "doyle") -> np.ndarray:
+    """board_feet para LOG_RULES; cubic_volume (ft³) para rule='cubic'."""
+    if rule == "cubic":
+        return cubic_volume(dbh, height)
+    return board_feet(dbh, height, rule)
+
+
+# ───── SQL ─────
+def volume_sql(rule: str = "doyle", dbh: str = "dbh_in", height: str = "tht_ft",
+               min_dbh: float = MIN_DBH_IN) -> str:
+    """Expresión SQL (PostgreSQL) equivalente a tree_volume sobre columnas de la tabla."""
+    d = f'"{dbh}"::double precision'
+    length = f'"{height}"::double precision'
+    if rule == "cubic":
+        return f"(pi() * power({d} / {_BASAL_AREA_DIVISOR['in']}, 2) * {length} * {FORM_FACTOR})"
+
+    formulas = {
+        "doyle": f"power({d} - 4, 2) * ({length} / 16)",
+        "scribner": f"(0.79 * {d} * {d} - 2 * {d} - 4) * ({length} / 16)",
+        "international": (
+            f"(0.04976191 * {length} * {d} * {d} + 0.006220239 * {length} * {length} * {d}"
+            f" - 0.1854762 * {length} * {d} + 0.0002591767 * power({length}, 3)"
+            f" - 0.01159226 * {length} * {length} + 0.04222222 * {length})"
+        ),
+    }
+    if rule not in formulas:
+        raise ValueError(f"❌ Regla '{rule}' no soportada. Opciones: {VOLUME_RULES}")
+    return f"(CASE WHEN {d} >= {min_dbh} THEN {formulas[rule]} END)"
+
+
+def recalculate_volume_in_db(engine, table: str, rule: str = "doyle", column: str = "doyle_bf",
+                             schema: str = "public") -> int:
+    """UPDATE en bloque de `column` con volume_sql(rule); devuelve filas actualizadas."""
+    with engine.begin() as conn:
+        result = conn.execute(text(f'UPDATE "{schema}"."{table}" SET "{column}" = {volume_sql(rule)}'))
+    return result.rowcount
+
+
+# ───── DataFrame ─────
+def calculate_volume(df: pd.DataFrame, rule: str = "doyle", column: str = None, verbose: bool = False) -> pd.DataFrame:
+    """Añade/actualiza `column` (por defecto '<rule>_bf', o 'cubic_ft3') con tree_volume."""
+    dbh_col = get_column("dbh_in", df)
+    tht_col = get_column("tht_ft", df)
+    column = column or ("cubic_ft3" if rule == "cubic" else f"{rule}_bf")
+
+    df[column] = tree_volume(df[dbh_col], df[tht_col], rule)
+    if verbose:
+        print(f"🌳 {column} calculado ({rule})")
+    return df
+
+
+def calculate_doyle(df: pd.DataFrame, force_recalc=True, rule: str = "doyle", verbose: bool = False) -> pd.DataFrame:
     """
     Calcula y añade/actualiza la columna 'doyle_bf' basada en DBH (in) y THT (ft).
     Usa los keys estándar (schema) y respeta aliases.
-    Si el DBH < 8, el valor se deja en blanco (None).
+    Si el DBH < 8, el valor se deja en blanco (NaN). `rule` permite guardar
+    Scribner o International en la misma columna.
     """
     dbh_col = get_column("dbh_in", df)
     tht_col = get_column("tht_ft", df)
     doyle_col = get_column("doyle_bf", df) if "doyle_bf" in df.columns else "doyle_bf"
 
-    df[dbh_col] = pd.to_numeric(df[dbh_col], errors='coerce')
-    df[tht_col] = pd.to_numeric(df[tht_col], errors='coerce')
+    # dbh/tht quedan numéricos en el df (como antes), pero sólo se convierten si hace falta
+    for col in (dbh_col, tht_col):
+        if not pd.api.types.is_numeric_dtype(df[col].dtype):
+            df[col] = pd.to_numeric(df[col], errors="coerce")
 
     if force_recalc or doyle_col not in df.columns:
-        # Calcula solo para DBH >= 8, el resto queda en blanco
-        doyle = ((df[dbh_col] - 4) ** 2) * (df[tht_col] / 16)
-        doyle_masked = doyle.where(df[dbh_col] >= 8, other=pd.NA)
-        df[doyle_col] = doyle_masked
-        print("🌳 Doyle recalculado")
-    else:
+        df[doyle_col] = board_feet(df[dbh_col], df[tht_col], rule)
+        if verbose:
+            print("🌳 Doyle recalculado")
+    elif verbose:
         print("🌳 Doyle ya existe, no se recalcula (usa force_recalc=True para forzar)")
 
     return df
@@ -1,15 +1,9 @@
 # core/libs.py
-
-# ───── Data Analysis ─────
-import pandas as pd
-import numpy as np
-from pandas import to_datetime
-
-# ───── Plotting ─────
-import matplotlib.pyplot as plt
-from matplotlib import rcParams
-import plotly.express as px
-import plotly.graph_objects as go
+#
+# Punto único de imports del proyecto. Las librerías pesadas (pandas, numpy,
+# matplotlib, plotly, sqlalchemy, psycopg2, openpyxl, tqdm) se cargan de forma
+# perezosa (PEP 562): `from core.libs import pd` sigue funcionando igual, pero
+# un CLI que sólo usa `os`/`Path` ya no paga el arranque de matplotlib o plotly.
 
 # ───── System & IO ─────
 import os
@@ -19,46 +13,102 @@ import unicodedata
 from pathlib import Path
 from datetime import datetime
 import ctypes
+import io
 import json
+import hashlib
 import time
 import traceback
 from time import sleep
 import shutil
 import sys
+from collections import deque
+from itertools import islice
+from functools import lru_cache
+from contextlib import redirect_stdout
+from importlib import import_module
 
 # ───── Regex & CLI ─────
 import re
 import argparse
 
-# ───── SQL ─────
-from sqlalchemy import create_engine, inspect, text, Integer, Text
-import psycopg2
-from psycopg2.extras import execute_values
-from pandas import to_datetime
-from sqlalchemy.exc import NoSuchTableError
+
+# ───── Lazy imports ─────
+# nombre exportado -> (módulo, atributo | None para el módulo completo)
+_LAZY = {
+    # Data Analysis
+    "pd": ("pandas", None),
+    "np": ("numpy", None),
+    "to_datetime": ("pandas", "to_datetime"),
+    # Plotting
+    "plt": ("matplotlib.pyplot", None),
+    "rcParams": ("matplotlib", "rcParams"),
+    "px": ("plotly.express", None),
+    "go": ("plotly.graph_objects", None),
+    # Concurrency
+    "ProcessPoolExecutor": ("concurrent.futures", "ProcessPoolExecutor"),
+    "ThreadPoolExecutor": ("concurrent.futures", "ThreadPoolExecutor"),
+    # SQL
+    "create_engine": ("sqlalchemy", "create_engine"),
+    "inspect": ("sqlalchemy", "inspect"),
+    "text": ("sqlalchemy", "text"),
+    "Integer": ("sqlalchemy", "Integer"),
+    "Text": ("sqlalchemy", "Text"),
+    "NoSuchTableError": ("sqlalchemy.exc", "NoSuchTableError"),
+    "psycopg2": ("psycopg2", None),
+    "execute_values": ("psycopg2.extras", "execute_values"),
+    # Excel
+    "openpyxl": ("openpyxl", None),
+    "load_workbook": ("openpyxl", "load_workbook"),
+    "range_boundaries": ("openpyxl.utils", "range_boundaries"),
+    # UX
+    "tqdm": ("tqdm", "tqdm"),
+}
 
 
-# ───── Excel ─────
-import openpyxl
-from openpyxl import load_workbook
-from openpyxl.utils import range_boundaries
+# ───── Global Config ─────
+# Se aplica la primera vez que se resuelve la librería correspondiente.
+def _configure_pandas(pd):
+    pd.set_option('display.max_columns', None)
+    pd.set_option('display.max_rows', None)
+    pd.set_option('display.width', None)
 
-# ───── UX ─────
-from tqdm import tqdm
 
+def _configure_matplotlib(matplotlib):
+    matplotlib.rcParams.update({
+        'figure.figsize': (8, 5),
+        'axes.titlesize': 'large',
+        'axes.labelsize': 'medium',
+        'xtick.labelsize': 'small',
+        'ytick.labelsize': 'small',
+    })
 
-# ───── Global Config ─────
-pd.set_option('display.max_columns', None)
-pd.set_option('display.max_rows', None)
-pd.set_option('display.width', None)
-
-rcParams.update({
-    'figure.figsize': (8, 5),
-    'axes.titlesize': 'large',
-    'axes.labelsize': 'medium',
-    'xtick.labelsize': 'small',
-    'ytick.labelsize': 'small',
-})
+
+_CONFIGURE = {
+    "pandas": _configure_pandas,
+    "matplotlib": _configure_matplotlib,
+}
+_configured = set()
+
+
+def __getattr__(name):
+    try:
+        module_name, attr = _LAZY[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+
+    module = import_module(module_name)
+    root = module_name.split(".")[0]
+    if root in _CONFIGURE and root not in _configured:
+        _configured.add(root)
+        _CONFIGURE[root](import_module(root))
+
+    value = module if attr is None else getattr(module, attr)
+    globals()[name] = value  # siguientes accesos no pasan por __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
 
 
 # ───── Utilities ─────
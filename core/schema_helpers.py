@@ -1,22 +1,36 @@
 #core/schema_helpers
 
-from core.libs import pd, unicodedata, re
+from core.libs import pd, unicodedata, re, lru_cache
 from core.schema import COLUMNS
 
 from sqlalchemy import Text, Float, Numeric, Integer, DateTime, SmallInteger, Date
 
+# Contadores de los índices de alias (ver index_stats)
+_STATS = {"rename_hits": 0, "rename_misses": 0, "get_column_hits": 0, "get_column_misses": 0}
+
+
 def rename_columns_using_schema(df):
+  """
+  Renombra columnas a su clave lógica usando ALIAS_INDEX (alias normalizado → key).
+  Misma semántica que el barrido COLUMNS × aliases × df.columns original:
+  - si varios col_def comparten alias normalizado, gana el último de COLUMNS
+  - sólo se renombra la PRIMERA columna del df con cada nombre normalizado
+  """
   rename_map = {}
+  seen = set()
 
-  for col_def in COLUMNS:
-    logical = col_def["key"]
-    candidates = [col_def["sql_name"]] + col_def.get("aliases", [])
+  for real_col in df.columns:
+    cleaned = clean_column_name(real_col)
+    if cleaned in seen:
+      continue
+    seen.add(cleaned)
 
-    for alias in candidates:
-      for real_col in df.columns:
-        if clean_column_name(real_col) == clean_column_name(alias):
-          rename_map[real_col] = logical
-          break
+    logical = ALIAS_INDEX.get(cleaned)
+    if logical is None:
+      _STATS["rename_misses"] += 1
+      continue
+    _STATS["rename_hits"] += 1
+    rename_map[real_col] = logical
 
   df = df.rename(columns=rename_map)
   return df
@@ -58,6 +72,7 @@ _SA_TO_PD = {
 }
 
 
+@lru_cache(maxsize=4096, typed=True)  # typed: 1 y 1.0 no comparten resultado
 def clean_column_name(name):
   name = str(name)
   name = re.sub(r'[#\s]+', '_', name)
@@ -73,12 +88,12 @@ def get_column(logical_name: str, df: pd.DataFrame = None) -> str:
   Si `df` es None → devuelve la clave lógica estándar (`key`) desde schema.
   Si `df` se proporciona → busca el nombre real en el DataFrame según aliases definidos.
   """
-  for entry in COLUMNS:
-    if logical_name == entry["key"] or logical_name == entry["sql_name"] or logical_name in entry.get("aliases", []):
-      candidates = [entry["key"], entry["sql_name"]] + entry.get("aliases", [])
-      break
-  else:
+  entry = ENTRY_INDEX.get(logical_name)
+  if entry is None:
+    _STATS["get_column_misses"] += 1
     raise KeyError(f"❌ '{logical_name}' no está definido en schema")
+  _STATS["get_column_hits"] += 1
+  candidates = [entry["key"], entry["sql_name"]] + entry.get("aliases", [])
 
   if df is None:
     return entry["key"]  # ← caso moderno: solo dame el nombre estandarizado
@@ -93,6 +108,40 @@ def get_column(logical_name: str, df: pd.DataFrame = None) -> str:
   )
 
 
+def _build_alias_index():
+  """alias normalizado → key lógica; el último col_def de COLUMNS gana (como el rename original)."""
+  index = {}
+  for col_def in COLUMNS:
+    for alias in [col_def["sql_name"]] + col_def.get("aliases", []):
+      index[clean_column_name(alias)] = col_def["key"]
+  return index
+
+
+def _build_entry_index():
+  """key / sql_name / alias exacto → col_def; el primero de COLUMNS gana (como get_column original)."""
+  index = {}
+  for entry in COLUMNS:
+    for name in [entry["key"], entry["sql_name"]] + entry.get("aliases", []):
+      index.setdefault(name, entry)
+  return index
+
+
+ALIAS_INDEX = _build_alias_index()
+ENTRY_INDEX = _build_entry_index()
+
+
+def index_stats() -> dict:
+  """Aciertos/fallos de los índices de alias y del caché LRU de clean_column_name."""
+  info = clean_column_name.cache_info()
+  return {**_STATS, "clean_hits": info.hits, "clean_misses": info.misses, "clean_size": info.currsize}
+
+
+def reset_index_stats():
+  for k in _STATS:
+    _STATS[k] = 0
+  clean_column_name.cache_clear()
+
+
 SQL_COLUMNS = { col["key"]: col["sql_name"] for col in COLUMNS }
 FINAL_ORDER = [
     "contractcode",
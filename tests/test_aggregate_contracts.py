@@ -0,0 +1,73 @@
+# tests/test_aggregate_contracts.py
+"""
+contract_metrics vectorizado: columnas, dtypes, textos de survival/mortality,
+conteos y medias/std redondeadas fijadas (comparación exacta) sobre un
+inventario determinista con un contrato grande (suma por bloques), uno de un
+árbol, uno con total 0, textos no numéricos y filas sin contrato.
+"""
+
+import numpy as np
+import pandas as pd
+
+from InventoryMetrics.processing_metrics import contract_metrics
+
+
+def make_inventory():
+    i = np.arange(170)
+    dbh = (i % 17) * 0.35 + 5.05
+    df = pd.DataFrame({
+        "contractcode": np.repeat(["A", "B", "C", "D", "E"], [150, 9, 1, 4, 6]).astype(object),
+        "dbh_in": dbh,
+        "tht_ft": (i % 11) * 1.7 + 30.1,
+        "merch_ht_ft": ((i % 7) * 2.3 + 10.2).astype(object),
+        "doyle_bf": np.where(dbh >= 8, (i % 13) * 3.1 + 12.4, np.nan),
+        "alive_tree": (i % 10 != 3).astype(float),
+        "dead_tree": (i % 10 == 3).astype(float),
+    })
+    df.loc[i % 23 == 0, "merch_ht_ft"] = "n/a"
+    df.loc[i % 31 == 0, "dbh_in"] = np.nan
+    df.loc[df["contractcode"] == "D", ["alive_tree", "dead_tree"]] = 0.0  # total 0 → sin %
+    df.loc[[5, 80, 165], "contractcode"] = None
+    return df
+
+
+def test_pinned_metrics():
+    out = contract_metrics(make_inventory(), "contractcode", 2025)
+    expected = pd.DataFrame({
+        "contract_code": ["A", "B", "C", "D", "E"],
+        "inventory_year": 2025,
+        "inventory_date": None,
+        "total_trees": [148.0, 9.0, 1.0, 0.0, 5.0],
+        "survival": ["89.86%", "88.89%", "100.0%", None, "100.0%"],
+        "mortality": ["10.14%", "11.11%", "0.0%", None, "0.0%"],
+        "dbh_mean": [7.8, 7.59, 7.15, 8.02, 9.88],
+        "dbh_std": [1.71, 2.32, np.nan, 0.45, 0.67],
+        "noncom_dbh_count": [77, 5, 1, 2, 0],
+        "tht_mean": [38.46, 38.41, 38.6, 42.85, 36.9],
+        "tht_std": [5.4, 6.27, np.nan, 2.19, 6.01],
+        "mht_mean": [16.97, 17.36, 21.7, 17.1, 17.1],
+        "mht_std": [4.64, 4.37, np.nan, 6.09, 5.86],
+        "doyle_bf_mean": [30.09, 37.2, np.nan, 32.55, 37.82],
+        "doyle_bf_std": [11.82, 3.1, np.nan, 2.19, 14.93],
+        "doyle_bf_total": [2046.0, 111.6, 0.0, 65.1, 189.1],
+    })
+    pd.testing.assert_frame_equal(out, expected, check_exact=True)
+
+
+def test_survival_text_and_single_tree_contract():
+    df = pd.DataFrame({
+        "contractcode": ["A", "A", "A", "B", "C", "C"],
+        "dbh_in": [7.5, 9.0, 10.0, 12.0, 6.0, np.nan],
+        "tht_ft": [30.0, 35.0, 40.0, 45.0, 20.0, 25.0],
+        "merch_ht_ft": [10.0, 12.0, 14.0, 16.0, 8.0, 9.0],
+        "doyle_bf": [np.nan, 15.6, 22.5, 49.0, np.nan, np.nan],
+        "alive_tree": [1, 1, 0, 1, 0, 0],
+        "dead_tree": [0, 0, 1, 0, 0, 0],
+    })
+    out = contract_metrics(df, "contractcode", year=None)
+    assert out["survival"].tolist() == ["66.67%", "100.0%", None]
+    assert out["mortality"].tolist() == ["33.33%", "0.0%", None]
+    assert out["total_trees"].tolist() == [3, 1, 0]
+    assert out["noncom_dbh_count"].tolist() == [1, 0, 1]
+    assert np.isnan(out.loc[1, "dbh_std"]) and out.loc[2, "doyle_bf_total"] == 0.0
+    assert out["inventory_year"].isna().all()
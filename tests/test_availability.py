@@ -0,0 +1,68 @@
+# tests/test_availability.py
+"""
+Backends de disponibilidad (utils.onedriver) y pre-flight del lote: en Linux
+ningún backend toca ctypes.windll, y los archivos que faltan se descartan en
+una pasada concurrente con reintentos agrupados (sin sleep por archivo); el
+backend windows (COM) corre en serie en el hilo que llama.
+"""
+
+import threading
+
+import pytest
+
+from CruisesProcessor.utils import onedriver
+from CruisesProcessor.utils.onedriver import force_download, preflight_files, resolve_backend
+
+
+@pytest.fixture
+def batch(tmp_path):
+    good = tmp_path / "US0001_a.xlsx"
+    good.write_bytes(b"PK\x03\x04" + b"\0" * 60)
+    empty = tmp_path / "US0002_b.xlsx"
+    empty.touch()
+    stub = tmp_path / "US0003_c.xlsx"  # placeholder de un montaje sin contenido real
+    stub.write_bytes(b"\0" * 64)
+    return good, empty, stub, tmp_path / "US0004_missing.xlsx"
+
+
+def test_backends(batch, monkeypatch):
+    good, empty, stub, missing = batch
+    assert [force_download(p, "posix") for p in batch] == [True, False, True, False]
+    assert [force_download(p, "rclone") for p in batch] == [True, False, False, False]
+    assert all(force_download(p, "none") for p in batch)
+
+    # auto: rclone dentro de un montaje FUSE, posix fuera
+    monkeypatch.setattr(onedriver, "_mount_table", lambda: ((str(good.parent), "fuse.rclone"), ("/", "ext4")))
+    assert resolve_backend(good, "auto") == "rclone"
+    assert resolve_backend("/etc/hosts", "auto") == "posix"
+    assert force_download(stub, "auto") is False
+
+
+def test_preflight_keeps_order_and_retries_once_per_pass(batch, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(onedriver, "sleep", sleeps.append)
+    files = [str(p) for p in batch] * 50
+    available, missing = preflight_files(files, backend="posix", retries=2, delay=3)
+    assert available == [str(batch[0]), str(batch[2])] * 50
+    assert missing == [str(batch[1]), str(batch[3])] * 50
+    assert sleeps == [3, 3]  # una espera por pasada, no por archivo
+
+    monkeypatch.setenv(onedriver.BACKEND_ENV, "none")
+    assert preflight_files(files) == (files, [])
+    with pytest.raises(ValueError):
+        onedriver.set_availability_backend("smb")
+
+
+def test_windows_backend_runs_serially_in_caller_thread(batch, monkeypatch):
+    threads = []
+
+    def fake_windows(path):
+        threads.append(threading.current_thread())
+        return path.exists()
+
+    monkeypatch.setitem(onedriver._CHECKS, "windows", fake_windows)
+    monkeypatch.setattr(onedriver, "sleep", lambda s: None)
+    available, missing = preflight_files([str(p) for p in batch], backend="windows", retries=1)
+    assert available == [str(p) for p in batch[:3]]
+    assert missing == [str(batch[3])]
+    assert set(threads) == {threading.current_thread()}  # COM/Excel nunca en hilos del pool
@@ -0,0 +1,60 @@
+# tests/test_batch_validation.py
+"""
+validate: stat + encabezados de cada archivo del lote en hilos, con un estado
+por archivo y reporte JSON/Excel, sin leer filas de datos.
+"""
+
+import json
+
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+from CruisesProcessor.batch_validation import validate_cli, validate_files
+
+
+def make_xlsx(path, header, sheet="Input"):
+    wb = Workbook()
+    wb.active.title = "Summary"
+    ws = wb.create_sheet(sheet)
+    ws.append(header)
+    ws.append([1] * len(header))
+    wb.save(path)
+    return path
+
+
+@pytest.fixture
+def batch(tmp_path):
+    ok = make_xlsx(tmp_path / "US0001_ok.xlsx", ["Tree #", "Estado", "DBH (in)", None, None])
+    no_status = make_xlsx(tmp_path / "US0002_nostatus.xlsx", ["Tree #", "DBH (in)"], sheet="DataInput")
+    empty = tmp_path / "US0003_empty.xlsx"
+    empty.touch()
+    broken = tmp_path / "US0004_broken.xlsx"
+    broken.write_bytes(b"not a zip file")
+    return [str(p) for p in (ok, no_status, empty, broken, tmp_path / "US0005_missing.xlsx", ok)]
+
+
+def test_validate_files_statuses(batch):
+    report = validate_files(batch, threads=4)
+    assert report["status"].tolist() == ["ok", "missing_columns", "empty", "unreadable", "missing", "ok"]
+    assert report["contract"].tolist() == ["US0001", "US0002", "US0003", "US0004", "US0005", "US0001"]
+    assert report["duplicated"].tolist() == [False] * 5 + [True]
+    assert report.loc[0, "input_sheet"] == "Input" and report.loc[0, "n_columns"] == 3
+    assert report.loc[1, "input_sheet"] == "DataInput"
+    assert report.loc[1, "missing_columns"] == "status"
+
+
+def test_validate_cli_writes_reports(batch, tmp_path, capsys):
+    out = tmp_path / "validation"
+    with pytest.raises(SystemExit) as exc:
+        validate_cli(["--files", *batch, "--output", str(out)])
+    assert exc.value.code == 1
+
+    summary = json.loads((tmp_path / "validation.json").read_text(encoding="utf-8"))
+    assert summary["ready"] is False and summary["files"] == 6
+    assert summary["by_status"] == {"ok": 2, "missing_columns": 1, "empty": 1, "unreadable": 1, "missing": 1}
+    assert len(pd.read_excel(tmp_path / "validation.xlsx")) == 6
+
+    validate_cli(["--files", batch[0], "--output", str(out), "--format", "json"])
+    assert json.loads((tmp_path / "validation.json").read_text(encoding="utf-8"))["ready"] is True
+    assert "Lote listo" in capsys.readouterr().out
@@ -0,0 +1,61 @@
+# tests/test_chunked_processing.py
+"""
+--chunked: iter_contract_frames agrupa los archivos por contrato (un DataFrame
+por contrato, con su lista de source_files) y ensure_pipeline_columns completa
+las columnas que un contrato aislado no trae.
+"""
+
+from pathlib import Path
+
+import pandas as pd
+
+from CruisesProcessor import xlsx_read_and_merge
+from CruisesProcessor.general_processing import PIPELINE_COLUMNS, ensure_pipeline_columns
+from core.schema_helpers import get_column
+
+
+def fake_frames(all_files, workers=1, cache=None, filter_func=None):
+    for path in all_files:
+        code = path.name.split("_")[0]
+        df = pd.DataFrame({"contractcode": [code] * 2, "tree": [1, 2]})
+        yield path, df, {"contract_code": code}
+
+
+def test_contract_frames_group_files_by_contract(monkeypatch):
+    monkeypatch.setattr(xlsx_read_and_merge, "iter_cruise_frames", fake_frames)
+    files = ["US0002_b.xlsx", "US0001_a.xlsx", "US0002_a.xlsx", "US0003_a.xlsx"]
+
+    chunks = list(xlsx_read_and_merge.iter_contract_frames(files))
+
+    assert [c["contractcode"].unique().tolist() for c in chunks] == [["US0001"], ["US0002"], ["US0003"]]
+    assert [len(c) for c in chunks] == [2, 4, 2]
+    # Orden estable dentro del contrato
+    assert [Path(f["path"]).name for f in chunks[1].attrs["source_files"]] == ["US0002_b.xlsx", "US0002_a.xlsx"]
+    assert {f["rows"] for c in chunks for f in c.attrs["source_files"]} == {2}
+
+
+def test_contract_frames_group_by_metadata_code(monkeypatch):
+    # US0009_x.xlsx trae US0001 en el Summary: debe ir en el mismo bloque que US0001
+    codes = {"US0001_a.xlsx": "US0001", "US0002_a.xlsx": "US0002", "US0009_x.xlsx": "US0001"}
+
+    def frames(all_files, workers=1, cache=None, filter_func=None):
+        for path in all_files:
+            code = codes[path.name]
+            yield path, pd.DataFrame({"contractcode": [code] * 2, "tree": [1, 2]}), {"contract_code": code}
+
+    monkeypatch.setattr(xlsx_read_and_merge, "iter_cruise_frames", frames)
+    monkeypatch.setattr(xlsx_read_and_merge, "read_contract_code", lambda path: codes[Path(path).name])
+
+    chunks = list(xlsx_read_and_merge.iter_contract_frames(["US0002_a.xlsx", "US0009_x.xlsx", "US0001_a.xlsx"]))
+
+    assert [c["contractcode"].unique().tolist() for c in chunks] == [["US0001"], ["US0002"]]
+    assert [Path(f["path"]).name for f in chunks[0].attrs["source_files"]] == ["US0009_x.xlsx", "US0001_a.xlsx"]
+
+
+def test_ensure_pipeline_columns_adds_missing_as_na():
+    df = pd.DataFrame({"contractcode": ["US0001"], "Tree #": [1]})
+    out = ensure_pipeline_columns(df)
+    for logical in PIPELINE_COLUMNS:
+        assert get_column(logical, out) in out.columns
+    assert out["Tree #"].tolist() == [1]
+    assert out[get_column("Species")].isna().all()
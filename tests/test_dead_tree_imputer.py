@@ -0,0 +1,73 @@
+# tests/test_dead_tree_imputer.py
+"""
+add_imputed_dead_rows vectorizado: filas imputadas (copias de la primera fila
+muerta de cada parcela de un solo árbol), dtypes, índice y resumen impreso,
+fijados sobre frames chicos.
+"""
+
+import pandas as pd
+
+from CruisesProcessor.dead_tree_imputer import add_imputed_dead_rows
+
+
+def impute(df):
+    return add_imputed_dead_rows(df, contract_col="contractcode", plot_col="plot", dead_col="dead_tree")
+
+
+def test_copies_per_contract_average(capsys):
+    df = pd.DataFrame({
+        "contractcode": ["A"] * 5 + ["B"] * 6 + ["C"],
+        "plot":         ["1", "1", "1", "2", "3", "1", "1", "1", "1", "2", "3", "1"],
+        "tree_number":  [1, 2, 3, 1, 1, 1, 2, 3, 4, 1, 1, 1],
+        "dead_tree":    [0.0, 1, 0, 1, 0, 0, 0, 0, 0, 1, 1, 1],
+        "dbh_in":       [9.0, 8, 7, 6, 5, 4, 3, 2, 1, 0.5, 0.25, 7],
+        "Species":      ["T", "T", "T", "C", None, "T", "T", "T", "T", "X", "Y", "Z"],
+    })
+    before = df.copy()
+    out = impute(df)
+    pd.testing.assert_frame_equal(df, before)
+
+    # A: promedio 3 → parcela 2 recibe 2 copias (la 3 no tiene muerto);
+    # B: promedio 4 → 3 copias de las parcelas 2 y 3; C no tiene parcelas de más de un árbol
+    pd.testing.assert_frame_equal(out.iloc[:len(df)], df)
+    added = out.iloc[len(df):]
+    assert added.index.tolist() == list(range(12, 20))
+    assert added.to_dict("list") == {
+        "contractcode": ["A", "A", "B", "B", "B", "B", "B", "B"],
+        "plot":         ["2", "2", "2", "2", "2", "3", "3", "3"],
+        "tree_number":  [1] * 8,
+        "dead_tree":    [1.0] * 8,
+        "dbh_in":       [6.0, 6.0, 0.5, 0.5, 0.5, 0.25, 0.25, 0.25],
+        "Species":      ["C", "C", "X", "X", "X", "Y", "Y", "Y"],
+    }
+    assert out.dtypes.to_dict() == df.dtypes.to_dict()
+
+    log = capsys.readouterr().out
+    assert "Árboles imputados: 8" in log
+    assert "A    2\nB    6" in log
+
+
+def test_imputes_first_dead_row_up_to_contract_average(capsys):
+    df = pd.DataFrame({
+        "contractcode": ["A"] * 7 + ["B"],
+        "plot":         ["1", "1", "1", "2", "2", "2", "3", "1"],
+        "tree_number":  [1, 2, 3, 1, 2, 3, 1, 1],
+        "dead_tree":    [0, 0, 0, 0, 1, 0, 1, 1],
+        "dbh_in":       [9, 8, 7, 6, 5, 4, 3, 2],
+    })
+    out = impute(df)
+    # A: promedio 3 → parcela 3 recibe 2 copias; B no tiene parcelas >1 árbol
+    added = out.iloc[len(df):]
+    assert added["plot"].tolist() == ["3", "3"]
+    assert added["dbh_in"].tolist() == [3, 3]
+    assert "Árboles imputados: 2" in capsys.readouterr().out
+
+
+def test_no_imputation_message(capsys):
+    df = pd.DataFrame({
+        "contractcode": ["A", "A"], "plot": ["1", "1"],
+        "tree_number": [1, 2], "dead_tree": [0, 1],
+    })
+    out = impute(df)
+    assert len(out) == 2
+    assert "No se imputaron árboles" in capsys.readouterr().out
@@ -0,0 +1,61 @@
+# tests/test_fuse_metrics.py
+"""
+clean_and_fuse_metrics con replace('') + groupby().first(): primer valor no
+vacío por (contrato, año, fecha), fechas NaT como llave, planting_year_y sobre
+_x, columnas del schema y progress, fijados sobre frames chicos.
+"""
+
+import numpy as np
+import pandas as pd
+
+from InventoryMetrics.generate_helpers import clean_and_fuse_metrics
+
+
+def test_fuse_by_contract_year_and_date():
+    df = pd.DataFrame({
+        "contract_code": ["US0001", "US0001", "US0002", "US0002", "US0003", "US0003"],
+        "inventory_year": [2024, 2024, 2024, 2024, 2025, 2025],
+        "cruise_date": [pd.Timestamp("2024-03-01")] * 2
+                       + [pd.NaT, pd.NaT, pd.Timestamp("2025-01-10"), pd.Timestamp("2025-01-11")],
+        "survival": ["", "91.0%", None, "80.0%", "70.0%", ""],
+        "total_trees": [np.nan, 100.0, 40.0, 41.0, 30.0, np.nan],
+        "dbh_mean": [8.1, np.nan, np.nan, 7.2, 9.9, 9.8],
+        "planting_year_x": [2019, 2019, 2020, 2020, 2021, 2021],
+        "planting_year_y": [2018, None, 2020, 2020, 2021, 2021],
+    })
+    out = clean_and_fuse_metrics(df)
+
+    assert out.columns.tolist() == [
+        "rel_path", "contract_code", "planting_year", "tree_age", "inventory_year", "inventory_date", "survival",
+        "tht_mean", "tht_std", "mht_mean", "mht_std", "mht_pct_of_target",
+        "dbh_mean", "dbh_std", "noncom_dbh_count", "dbh_pct_of_target", "doyle_bf_mean", "doyle_bf_std",
+        "doyle_bf_total", "projected_dbh", "projected_doyle_bf", "pkid", "progress",
+        "total_trees", "mortality",
+    ]
+    # NaT es una llave más (US0002); US0003 tiene dos fechas → dos filas (ver collapse_to_pkid)
+    assert out["contract_code"].tolist() == ["US0001", "US0002", "US0003", "US0003"]
+    assert out["inventory_date"].tolist()[::2] == [pd.Timestamp("2024-03-01"), pd.Timestamp("2025-01-10")]
+    assert pd.isna(out.loc[1, "inventory_date"])
+    assert out["survival"].tolist()[:3] == ["91.0%", "80.0%", "70.0%"] and pd.isna(out.loc[3, "survival"])
+    assert out["total_trees"].tolist()[:3] == [100.0, 40.0, 30.0]
+    assert out["dbh_mean"].tolist() == [8.1, 7.2, 9.9, 9.8]
+    assert out["planting_year"].tolist() == [2018.0, 2020.0, 2021.0, 2021.0]
+    assert out["pkid"].tolist() == ["US0001 2024", "US0002 2024", "US0003 2025", "US0003 2025"]
+    assert out["progress"].tolist() == ["OK", "OK", "OK", "error"]
+    assert out[["rel_path", "tht_mean", "mortality"]].isna().all().all()
+
+
+def test_first_non_empty_value_wins():
+    df = pd.DataFrame({
+        "contract_code": ["US0001", "US0001", "US0001", "US0002"],
+        "inventory_year": [2025, 2025, 2025, 2025],
+        "cruise_date": [None, None, None, pd.Timestamp("2025-03-01")],
+        "survival": ["", None, "90.0%", ""],
+        "total_trees": [np.nan, 120.0, 80.0, 50.0],
+    })
+    out = clean_and_fuse_metrics(df)
+    assert out["contract_code"].tolist() == ["US0001", "US0002"]
+    assert out.loc[0, "survival"] == "90.0%" and out.loc[0, "total_trees"] == 120.0
+    assert pd.isna(out.loc[1, "survival"])
+    assert out["progress"].tolist() == ["OK", "error"]
+    assert out["pkid"].tolist() == ["US0001 2025", "US0002 2025"]
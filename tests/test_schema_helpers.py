@@ -0,0 +1,87 @@
+# tests/test_schema_helpers.py
+"""
+Índices de alias de core.schema_helpers: rename_columns_using_schema y
+get_column deben resolver exactamente igual que el barrido lineal anterior
+(copiado abajo como referencia).
+"""
+
+import random
+
+import pandas as pd
+import pytest
+
+from core.schema import COLUMNS
+from core.schema_helpers import (
+    clean_column_name, get_column, index_stats, rename_columns_using_schema, reset_index_stats,
+)
+
+
+def rename_legacy(df):
+    rename_map = {}
+    for col_def in COLUMNS:
+        logical = col_def["key"]
+        candidates = [col_def["sql_name"]] + col_def.get("aliases", [])
+        for alias in candidates:
+            for real_col in df.columns:
+                if clean_column_name(real_col) == clean_column_name(alias):
+                    rename_map[real_col] = logical
+                    break
+    return df.rename(columns=rename_map)
+
+
+def get_column_legacy(logical_name, df=None):
+    for entry in COLUMNS:
+        if logical_name == entry["key"] or logical_name == entry["sql_name"] or logical_name in entry.get("aliases", []):
+            candidates = [entry["key"], entry["sql_name"]] + entry.get("aliases", [])
+            break
+    else:
+        raise KeyError(logical_name)
+    if df is None:
+        return entry["key"]
+    for candidate in candidates:
+        if candidate in df.columns:
+            return candidate
+    raise KeyError(logical_name)
+
+
+ALL_ALIASES = sorted({a for c in COLUMNS for a in [c["key"], c["sql_name"]] + c.get("aliases", [])})
+
+
+def variants(name):
+    return [name, name.upper(), f" {name} ", name.replace(" ", "  "), name.replace("_", " ")]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_rename_matches_legacy(seed):
+    rng = random.Random(seed)
+    cols = [rng.choice(variants(rng.choice(ALL_ALIASES))) for _ in range(25)] + ["Extra", "Unnamed: 3", 7, 7.0]
+    rng.shuffle(cols)
+    df = pd.DataFrame([range(len(cols))], columns=cols)
+    assert rename_legacy(df).columns.tolist() == rename_columns_using_schema(df).columns.tolist()
+
+
+def test_get_column_matches_legacy():
+    df = pd.DataFrame(columns=["Plot #", "tree_number", "Especie", "status", "contractcode"])
+    for name in ALL_ALIASES:
+        assert get_column(name) == get_column_legacy(name)
+        try:
+            expected = get_column_legacy(name, df)
+        except KeyError:
+            with pytest.raises(KeyError):
+                get_column(name, df)
+        else:
+            assert get_column(name, df) == expected
+    with pytest.raises(KeyError):
+        get_column("no existe")
+
+
+def test_stats_count_hits_and_misses():
+    reset_index_stats()
+    df = pd.DataFrame(columns=["Plot #", "Tree #", "Columna rara"])
+    rename_columns_using_schema(df)
+    rename_columns_using_schema(df)
+    stats = index_stats()
+    assert stats["rename_hits"] == 4
+    assert stats["rename_misses"] == 2
+    assert stats["clean_misses"] == 3
+    assert stats["clean_hits"] == 3
@@ -0,0 +1,85 @@
+# tests/test_tree_id.py
+"""
+split_by_id_validity vectorizado: id (llave primaria en SQL), id_error y
+columnas de salida, fijados sobre frames chicos con los casos sucios del Input
+(plots con letras o unicode, stands mezclados, árboles no numéricos).
+"""
+
+import numpy as np
+import pandas as pd
+
+from CruisesProcessor.tree_id import (
+    split_by_id_validity, pad_plot, pad_plot_series, parse_stand, parse_stand_series,
+)
+
+
+def test_all_valid_rows():
+    df = pd.DataFrame({
+        "contractcode": ["cr01", "CR02 "],
+        "Stand #": [1.0, 12.0],
+        "Plot #": [3, "4b"],
+        "Tree #": [1, "7"],
+    })
+    good, bad = split_by_id_validity(df)
+    assert good["id"].tolist() == ["CR0101003001", "CR0212004b007"]
+    assert good.columns.tolist() == ["contractcode", "Stand #", "Plot #", "Tree #", "id", "id_error"]
+    assert good["id_error"].isna().all()
+    assert bad.empty
+
+
+def test_dirty_stands_and_plots():
+    df = pd.DataFrame({
+        "contractcode": ["cr0001 "] * 12,
+        "Stand #": pd.Series([1.0, 2, "3", " 4 ", "A", "", "nan", np.nan, None, "2.7", "inf", -1], dtype=object),
+        "Plot #": pd.Series(["1", " 2 ", "12a", "P-4", "7.0", "003", "15B", "ñ2", "²3", "x", "120", 5], dtype=object),
+        "Tree #": list(range(1, 13)),
+    })
+    good, bad = split_by_id_validity(df)
+    assert good["id"].tolist() == [
+        "CR000101001001", "CR000102002002", "CR000103012a003", "CR000104004P004",
+        "CR0001A070005", "CR0001003006", "CR0001015B007", "CR0001002ñ008",
+        "CR00010²3009", "CR000102000x010", "CR0001inf120011", "CR0001-1005012",
+    ]
+    assert bad.empty
+
+
+def test_error_labels_and_path():
+    df = pd.DataFrame({
+        "contractcode": [None, "  ", "CR1", "CR1", "CR1", "CR1"],
+        "Stand #": ["", "A", None, 2, 1, 1],
+        "Plot #": ["1", "2", "3", "4", "1", "1"],
+        "Tree #": [1, 2, "x", 4, None, 3.0],
+        "path": ["C:/a/uno.xlsx", "C:/a/dos.xlsx", "C:/a/tres.xlsx", "C:/a/cuatro.xlsx", "C:/a/cinco.xlsx", "C:/a/seis.xlsx"],
+    })
+    good, bad = split_by_id_validity(df)
+    assert good["id"].tolist() == ["CR102004004", "CR101001003"]
+    assert bad.index.tolist() == [0, 1, 2, 4]
+    assert bad["id"].isna().all()
+    assert bad["id_error"].tolist() == [
+        "❌ Falta contractcode ← archivo: uno.xlsx",
+        "❌ Falta contractcode ← archivo: dos.xlsx",
+        "❌ tree_number no numérico ← archivo: tres.xlsx",
+        "❌ tree_number no numérico ← archivo: cinco.xlsx",
+    ]
+
+
+def test_mixed_int_float_plots_are_not_merged():
+    # 1 y 1.0 comparten hash: no deben colapsar a la misma cadena
+    df = pd.DataFrame({
+        "contractcode": ["CR1"] * 4,
+        "Stand #": [1, 1.0, True, "1"],
+        "Plot #": pd.Series([1, 1.0, True, "1"], dtype=object),
+        "Tree #": [1, 2, 3, 4],
+    })
+    good, _ = split_by_id_validity(df)
+    assert good["id"].tolist() == ["CR101001001", "CR101010002", "CR101000True003", "CR101001004"]
+
+
+def test_pad_plot_series_unicode_fallback():
+    values = pd.Series(["12a", "ñ2", "²3", " P-4 ", "", "nan"])
+    assert pad_plot_series(values).tolist() == [pad_plot(v) for v in values]
+
+
+def test_parse_stand_series_numeric_edges():
+    stand = pd.Series([1.9, -3.2, np.nan, np.inf, 1e20, 0.0])
+    assert parse_stand_series(stand).tolist() == [parse_stand(x) for x in stand]